@@ -0,0 +1,173 @@
+"""
+Span timing, per-request cost accounting and Prometheus histograms.
+
+`span(name)` times a block of work. Inside a request (see
+`InstrumentationMiddleware`) the time is also added to that request's
+`RequestStats`, which end up in its `Server-Timing` header; everywhere it is
+observed in the process-wide `span_duration_seconds` histogram served by
+the metrics endpoint. Histograms are per process: with several workers,
+each one's endpoint reports its own share.
+"""
+
+import bisect
+import contextvars
+import threading
+import time
+from collections import defaultdict
+from contextlib import contextmanager
+
+# Prometheus client defaults, in seconds
+DEFAULT_BUCKETS = (0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1, 2.5, 5, 10)
+COUNT_BUCKETS = (1, 2, 5, 10, 20, 50, 100, 200, 500, 1000)
+
+
+class Histogram:
+    """Cumulative-bucket histogram with labels, rendered in Prometheus text format."""
+
+    def __init__(
+        self,
+        name: str,
+        documentation: str,
+        labelnames: tuple[str, ...] = (),
+        buckets: tuple[float, ...] = DEFAULT_BUCKETS,
+    ) -> None:
+        self.name = name
+        self.documentation = documentation
+        self.labelnames = labelnames
+        self.buckets = buckets
+
+        self._lock = threading.Lock()
+        # labels -> (per-bucket counts with a trailing +Inf bucket, sum)
+        self._series: dict[tuple[str, ...], list] = {}
+
+    def observe(self, value: float, **labels) -> None:
+        key = tuple(str(labels[name]) for name in self.labelnames)
+        with self._lock:
+            series = self._series.get(key)
+            if series is None:
+                series = self._series[key] = [[0] * (len(self.buckets) + 1), 0.0]
+            series[0][bisect.bisect_left(self.buckets, value)] += 1
+            series[1] += value
+
+    @staticmethod
+    def _format_labels(pairs) -> str:
+        if not pairs:
+            return ""
+        escaped = (
+            (name, value.replace("\\", "\\\\").replace('"', '\\"').replace("\n", "\\n"))
+            for name, value in pairs
+        )
+        return "{" + ",".join(f'{name}="{value}"' for name, value in escaped) + "}"
+
+    def render(self) -> list[str]:
+        lines = [
+            f"# HELP {self.name} {self.documentation}",
+            f"# TYPE {self.name} histogram",
+        ]
+        with self._lock:
+            series = sorted(
+                (key, list(counts), total)
+                for key, (counts, total) in self._series.items()
+            )
+
+        for key, counts, total in series:
+            labels = list(zip(self.labelnames, key, strict=True))
+            cumulative = 0
+            for bound, count in zip((*self.buckets, "+Inf"), counts, strict=True):
+                cumulative += count
+                le = bound if bound == "+Inf" else f"{bound:g}"
+                lines.append(
+                    f"{self.name}_bucket{self._format_labels([*labels, ('le', le)])} "
+                    f"{cumulative}"
+                )
+            lines.append(f"{self.name}_sum{self._format_labels(labels)} {total}")
+            lines.append(f"{self.name}_count{self._format_labels(labels)} {cumulative}")
+        return lines
+
+
+REQUEST_DURATION = Histogram(
+    "spotter_http_request_duration_seconds",
+    "Time spent handling HTTP requests.",
+    labelnames=("method", "route", "status"),
+)
+REQUEST_DB_QUERIES = Histogram(
+    "spotter_http_request_db_queries",
+    "Database queries issued per HTTP request.",
+    labelnames=("method", "route"),
+    buckets=COUNT_BUCKETS,
+)
+REQUEST_DB_DURATION = Histogram(
+    "spotter_http_request_db_duration_seconds",
+    "Time spent in database queries per HTTP request.",
+    labelnames=("method", "route"),
+)
+SPAN_DURATION = Histogram(
+    "spotter_span_duration_seconds",
+    "Time spent in instrumented blocks of work (external calls, simulation phases).",
+    labelnames=("span",),
+)
+HISTOGRAMS = (REQUEST_DURATION, REQUEST_DB_QUERIES, REQUEST_DB_DURATION, SPAN_DURATION)
+
+
+def render_metrics() -> str:
+    return "\n".join(line for h in HISTOGRAMS for line in h.render()) + "\n"
+
+
+class RequestStats:
+    """Costs of one request. Spans may report from pool threads, hence the lock."""
+
+    def __init__(self) -> None:
+        self._lock = threading.Lock()
+        self.db_queries = 0
+        self.db_seconds = 0.0
+        # span name -> [calls, total seconds]
+        self.spans: dict[str, list] = defaultdict(lambda: [0, 0.0])
+
+    def add_query(self, seconds: float) -> None:
+        with self._lock:
+            self.db_queries += 1
+            self.db_seconds += seconds
+
+    def add_span(self, name: str, seconds: float) -> None:
+        with self._lock:
+            self.spans[name][0] += 1
+            self.spans[name][1] += seconds
+
+
+current_request: contextvars.ContextVar[RequestStats | None] = contextvars.ContextVar(
+    "current_request", default=None
+)
+
+
+@contextmanager
+def span(name: str):
+    started = time.perf_counter()
+    try:
+        yield
+    finally:
+        elapsed = time.perf_counter() - started
+        SPAN_DURATION.observe(elapsed, span=name)
+        stats = current_request.get()
+        if stats is not None:
+            stats.add_span(name, elapsed)
+
+
+def query_counter(execute, sql, params, many, context):
+    """`connection.execute_wrapper` hook charging queries to the current request"""
+    started = time.perf_counter()
+    try:
+        return execute(sql, params, many, context)
+    finally:
+        stats = current_request.get()
+        if stats is not None:
+            stats.add_query(time.perf_counter() - started)
+
+
+def install_query_counter(sender, connection, **kwargs):
+    """
+    `connection_created` receiver adding `query_counter` to every connection.
+    Installed on the connections themselves rather than per request, as the
+    queries of an async request run on the connections of worker threads.
+    """
+    if query_counter not in connection.execute_wrappers:
+        connection.execute_wrappers.append(query_counter)
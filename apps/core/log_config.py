@@ -0,0 +1,22 @@
+import sys
+
+from loguru import logger
+
+
+def configure_logging(config: dict) -> None:
+    """
+    Django `LOGGING_CONFIG` hook: replaces loguru's default sink with one
+    built from the `LOGGING` setting. With `enqueue`, records are handed to
+    a background writer, so request threads never block on log I/O; with
+    `serialize`, each record is written as one JSON object, including the
+    fields bound to it.
+    """
+    logger.remove()
+    logger.add(
+        sys.stderr,
+        level=config["level"],
+        serialize=config["serialize"],
+        enqueue=config["enqueue"],
+        # Tracebacks with local variables are costly and may leak payloads
+        diagnose=False,
+    )
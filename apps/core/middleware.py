@@ -0,0 +1,124 @@
+import time
+from contextlib import contextmanager
+
+from asgiref.sync import iscoroutinefunction, markcoroutinefunction, sync_to_async
+from whitenoise.middleware import WhiteNoiseMiddleware
+
+from django.conf import settings
+from django.db import connections
+from django.db.backends.signals import connection_created
+
+from apps.core.instrumentation import (
+    REQUEST_DB_DURATION,
+    REQUEST_DB_QUERIES,
+    REQUEST_DURATION,
+    RequestStats,
+    current_request,
+    install_query_counter,
+)
+
+
+class InstrumentationMiddleware:
+    """
+    Accounts each request's database queries and instrumented spans, records
+    them in the metrics histograms and reports them in a `Server-Timing`
+    header. Works in sync and async (ASGI) middleware chains.
+
+    A streaming response is measured up to the point its body starts: the
+    queries run while the trip export streams its rows are in neither the
+    histograms nor the header.
+    """
+
+    sync_capable = True
+    async_capable = True
+
+    def __init__(self, get_response):
+        self.get_response = get_response
+        if iscoroutinefunction(get_response):
+            markcoroutinefunction(self)
+
+        connection_created.connect(install_query_counter, dispatch_uid=__name__)
+        for connection in connections.all(initialized_only=True):
+            install_query_counter(None, connection)
+
+    @staticmethod
+    @contextmanager
+    def _accounted():
+        """Charges the queries and spans of the enclosed block to a new request"""
+        stats = RequestStats()
+        token = current_request.set(stats)
+        try:
+            yield stats
+        finally:
+            current_request.reset(token)
+
+    def __call__(self, request):
+        if iscoroutinefunction(self):
+            return self.__acall__(request)
+        started = time.perf_counter()
+        with self._accounted() as stats:
+            response = self.get_response(request)
+        return self._report(request, response, stats, started)
+
+    async def __acall__(self, request):
+        started = time.perf_counter()
+        with self._accounted() as stats:
+            response = await self.get_response(request)
+        return self._report(request, response, stats, started)
+
+    def _report(self, request, response, stats: RequestStats, started: float):
+        elapsed = time.perf_counter() - started
+
+        # View names, not paths, so the label set stays bounded
+        match = getattr(request, "resolver_match", None)
+        route = match.view_name if match else "unmatched"
+        REQUEST_DURATION.observe(
+            elapsed, method=request.method, route=route, status=response.status_code
+        )
+        REQUEST_DB_QUERIES.observe(stats.db_queries, method=request.method, route=route)
+        REQUEST_DB_DURATION.observe(
+            stats.db_seconds, method=request.method, route=route
+        )
+
+        response["Server-Timing"] = self._server_timing(stats, elapsed)
+        return response
+
+    @staticmethod
+    def _server_timing(stats: RequestStats, elapsed: float) -> str:
+        entries = [
+            f'db;dur={stats.db_seconds * 1000:.1f};desc="{stats.db_queries} queries"'
+        ]
+        for name, (calls, seconds) in stats.spans.items():
+            entries.append(f'{name};dur={seconds * 1000:.1f};desc="{calls} calls"')
+        entries.append(f"total;dur={elapsed * 1000:.1f}")
+        return ", ".join(entries)
+
+
+class AsyncWhiteNoiseMiddleware(WhiteNoiseMiddleware):
+    """
+    WhiteNoise for async (ASGI) middleware chains. WhiteNoise's own middleware
+    is sync only, which would push every request below it into a thread;
+    here only the static files it serves are read in one.
+    """
+
+    sync_capable = True
+    async_capable = True
+
+    def __init__(self, get_response=None, settings=settings):
+        super().__init__(get_response, settings)
+        if iscoroutinefunction(get_response):
+            markcoroutinefunction(self)
+
+    def __call__(self, request):
+        if iscoroutinefunction(self):
+            return self.__acall__(request)
+        return super().__call__(request)
+
+    async def __acall__(self, request):
+        if self.autorefresh:
+            static_file = await sync_to_async(self.find_file)(request.path_info)
+        else:
+            static_file = self.files.get(request.path_info)
+        if static_file is not None:
+            return await sync_to_async(self.serve)(static_file, request)
+        return await self.get_response(request)
@@ -0,0 +1,25 @@
+from django.test import SimpleTestCase, override_settings
+from django.urls import reverse
+
+
+@override_settings(METRICS_TOKEN="s3cret", METRICS_ALLOWED_IPS=["10.0.0.5"])
+class MetricsAccessTests(SimpleTestCase):
+    def _get(self, **extra):
+        return self.client.get(reverse("metrics"), REMOTE_ADDR="203.0.113.7", **extra)
+
+    def test_refuses_unknown_clients(self):
+        self.assertEqual(self._get().status_code, 403)
+        self.assertEqual(self._get(HTTP_AUTHORIZATION="Bearer wrong").status_code, 403)
+
+    def test_serves_clients_with_the_token(self):
+        response = self._get(HTTP_AUTHORIZATION="Bearer s3cret")
+        self.assertEqual(response.status_code, 200)
+        self.assertIn("text/plain", response["Content-Type"])
+
+    def test_serves_allowed_addresses(self):
+        response = self.client.get(reverse("metrics"), REMOTE_ADDR="10.0.0.5")
+        self.assertEqual(response.status_code, 200)
+
+    @override_settings(METRICS_TOKEN="")
+    def test_no_token_is_not_a_wildcard(self):
+        self.assertEqual(self._get(HTTP_AUTHORIZATION="Bearer ").status_code, 403)
@@ -6,3 +6,18 @@ class DriverStatus(models.TextChoices):
     SLEEPER_BERTH = "SLEEPER_BERTH", "Sleeper Berth"
     DRIVING = "DRIVING", "Driving"
     ON_DUTY = "ON_DUTY", "On Duty (not driving)"
+
+
+class JobStatus(models.TextChoices):
+    PENDING = "PENDING", "Pending"
+    RUNNING = "RUNNING", "Running"
+    DONE = "DONE", "Done"
+    FAILED = "FAILED", "Failed"
+
+
+class GenerationStage(models.TextChoices):
+    """Last step of `EldService.generate_full_trip` saved for a trip"""
+
+    ROUTED = "ROUTED", "Routed"
+    LOADED = "LOADED", "Simulated up to the pickup"
+    DONE = "DONE", "Done"
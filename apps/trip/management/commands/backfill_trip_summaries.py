@@ -0,0 +1,23 @@
+from loguru import logger
+
+from django.core.management.base import BaseCommand
+
+from apps.trip.models import Trip
+from apps.trip.services.summary_service import SummaryService
+
+
+class Command(BaseCommand):
+    help = (
+        "Writes the TripSummary rows missing for trips generated before the "
+        "summaries existed, by replaying their stored logs."
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument("--driver-id", help="Only this driver's trips")
+
+    def handle(self, *args, **options):
+        trips = Trip.objects.all()
+        if options["driver_id"]:
+            trips = trips.filter(driver_id=options["driver_id"])
+        written = SummaryService.backfill(trips)
+        logger.info("Backfilled the summaries of {written} trips", written=written)
@@ -0,0 +1,259 @@
+import json
+import platform
+import statistics
+import time
+import tracemalloc
+from datetime import UTC, datetime
+from pathlib import Path
+
+import numpy as np
+from loguru import logger
+
+from django.conf import settings
+from django.core.management import call_command
+from django.core.management.base import BaseCommand, CommandError
+from django.db import connection, transaction
+from django.test.utils import CaptureQueriesContext
+
+from apps.trip.models import Trip
+from apps.trip.services.eld_service import EldService
+
+# Fixed start, so midnight splits (and segment counts) are the same every run
+START_TIME = datetime(2026, 1, 5, 8, 0, tzinfo=UTC)
+# Share of each synthetic route driven before the pickup
+PICKUP_SHARE = 0.1
+# Slowdowns smaller than this are timer noise, whatever their relative size
+NOISE_FLOOR_MS = 0.1
+
+
+def _metrics(miles: float) -> dict:
+    to_pickup = round(miles * PICKUP_SHARE, 2)
+    return {
+        "to_pickup_miles": to_pickup,
+        "to_drop_off_miles": round(miles - to_pickup, 2),
+        "total_miles": miles,
+    }
+
+
+def _csv(cast):
+    return lambda value: [cast(part) for part in value.split(",") if part]
+
+
+class Command(BaseCommand):
+    help = (
+        "Benchmarks the HOS simulation over a synthetic corpus of trip lengths "
+        "and starting cycle hours. `memory` runs simulate_trip only; `db` runs "
+        "generate_trip against SQLite (use DJANGO_SETTINGS_MODULE="
+        "spotter.settings.benchmark). Optionally saves the results as a "
+        "baseline, or fails if they regress against one."
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            "--mode", choices=["memory", "db", "both"], default="memory"
+        )
+        parser.add_argument(
+            "--miles",
+            type=_csv(float),
+            default=[50, 250, 1000, 2500, 5000, 10000],
+            help="Comma-separated trip lengths",
+        )
+        parser.add_argument(
+            "--cycle-hours",
+            type=_csv(float),
+            default=[0, 35, 65],
+            help="Comma-separated initial_cycle_hours values",
+        )
+        parser.add_argument("--repeat", type=int, default=5)
+        parser.add_argument(
+            "--log",
+            action="store_true",
+            help="Keep the simulation's logging enabled while measuring",
+        )
+        parser.add_argument("--output", help="Write the results as JSON here")
+        parser.add_argument("--baseline", help="Compare against this results JSON")
+        parser.add_argument(
+            "--tolerance",
+            type=float,
+            default=0.25,
+            help="Allowed relative slowdown / allocation growth vs the baseline",
+        )
+
+    def _run_once(self, mode: str, miles: float, cycle_hours: float):
+        """
+        One simulation; returns its service, wall time (ms) and the queries
+        it issued. Only the simulation itself is measured.
+        """
+        metrics = _metrics(miles)
+        if mode == "memory":
+            trip = Trip(initial_cycle_hours=cycle_hours, created_at=START_TIME)
+            with CaptureQueriesContext(connection) as queries:
+                started = time.perf_counter()
+                service = EldService.for_trip(trip)
+                service.simulate_trip(metrics)
+                elapsed = time.perf_counter() - started
+            return service, elapsed * 1000, len(queries)
+
+        with transaction.atomic():
+            trip = Trip.objects.create(
+                start_address="Start",
+                pickup_address="Pickup",
+                drop_off_address="Drop-off",
+                initial_cycle_hours=cycle_hours,
+                metrics=metrics,
+            )
+            trip.created_at = START_TIME
+            with CaptureQueriesContext(connection) as queries:
+                started = time.perf_counter()
+                service = EldService.for_trip(trip)
+                service.generate_trip(metrics)
+                elapsed = time.perf_counter() - started
+            # Keep the database the same size for every run
+            transaction.set_rollback(True)
+        return service, elapsed * 1000, len(queries)
+
+    def _measure(self, mode: str, miles: float, cycle_hours: float, repeat: int):
+        timings = []
+        for _ in range(repeat):
+            service, elapsed, queries = self._run_once(mode, miles, cycle_hours)
+            timings.append(elapsed)
+
+        # Separate run: tracing allocations slows everything down
+        tracemalloc.start()
+        self._run_once(mode, miles, cycle_hours)
+        _, peak = tracemalloc.get_traced_memory()
+        tracemalloc.stop()
+
+        return {
+            "mode": mode,
+            "miles": miles,
+            "initial_cycle_hours": cycle_hours,
+            "wall_ms_min": round(min(timings), 3),
+            "wall_ms_median": round(statistics.median(timings), 3),
+            "peak_alloc_kib": round(peak / 1024, 1),
+            "queries": queries,
+            "segments": len(service.segments),
+            "days": len(service.days),
+        }
+
+    @staticmethod
+    def _scaling(results: list[dict]) -> dict:
+        """Log-log slope of time and segments against miles, per mode"""
+
+        def exponent(rows, field):
+            slope, _ = np.polyfit(
+                np.log([row["miles"] for row in rows]),
+                np.log([row[field] for row in rows]),
+                1,
+            )
+            return round(float(slope), 3)
+
+        scaling = {}
+        for mode in sorted({result["mode"] for result in results}):
+            rows = [r for r in results if r["mode"] == mode and r["miles"] > 0]
+            if len({row["miles"] for row in rows}) < 2:
+                continue
+            scaling[mode] = {
+                "time_exponent": exponent(rows, "wall_ms_min"),
+                "segments_exponent": exponent(rows, "segments"),
+            }
+        return scaling
+
+    @staticmethod
+    def _compare(results: list[dict], baseline: dict, tolerance: float) -> list[str]:
+        def key(result):
+            return result["mode"], result["miles"], result["initial_cycle_hours"]
+
+        previous = {key(result): result for result in baseline["results"]}
+        regressions = []
+        for result in results:
+            before = previous.get(key(result))
+            if before is None:
+                continue
+            case = "{} {:g} mi, {:g} h".format(*key(result))
+
+            slowdown = result["wall_ms_min"] - before["wall_ms_min"]
+            if slowdown > NOISE_FLOOR_MS and result["wall_ms_min"] > before[
+                "wall_ms_min"
+            ] * (1 + tolerance):
+                regressions.append(
+                    f"{case}: {result['wall_ms_min']} ms vs {before['wall_ms_min']} ms"
+                )
+            if result["peak_alloc_kib"] > before["peak_alloc_kib"] * (1 + tolerance):
+                regressions.append(
+                    f"{case}: {result['peak_alloc_kib']} KiB vs "
+                    f"{before['peak_alloc_kib']} KiB peak"
+                )
+            if result["queries"] > before["queries"]:
+                regressions.append(
+                    f"{case}: {result['queries']} queries vs {before['queries']}"
+                )
+            if result["segments"] != before["segments"]:
+                logger.warning(
+                    "{case}: {segments} segments vs {before}",
+                    case=case,
+                    segments=result["segments"],
+                    before=before["segments"],
+                )
+        return regressions
+
+    def handle(self, *args, **options):
+        modes = ["memory", "db"] if options["mode"] == "both" else [options["mode"]]
+        if "db" in modes:
+            if connection.vendor != "sqlite":
+                raise CommandError(
+                    "The db mode only runs against SQLite; use "
+                    "DJANGO_SETTINGS_MODULE=spotter.settings.benchmark"
+                )
+            call_command("migrate", verbosity=0)
+
+        if not options["log"]:
+            logger.disable("apps.trip.services")
+        try:
+            results = [
+                self._measure(mode, miles, cycle_hours, options["repeat"])
+                for mode in modes
+                for miles in options["miles"]
+                for cycle_hours in options["cycle_hours"]
+            ]
+        finally:
+            logger.enable("apps.trip.services")
+
+        for result in results:
+            self.stdout.write(
+                "{mode:<6} {miles:>8g} mi {initial_cycle_hours:>4g} h  "
+                "{wall_ms_min:>9.3f} ms  {peak_alloc_kib:>9.1f} KiB  "
+                "{queries:>3} queries  {segments:>4} segments  {days:>3} days".format(
+                    **result
+                )
+            )
+        scaling = self._scaling(results)
+        for mode, exponents in scaling.items():
+            self.stdout.write(
+                f"{mode}: time ~ miles^{exponents['time_exponent']}, "
+                f"segments ~ miles^{exponents['segments_exponent']}"
+            )
+
+        if options["output"]:
+            Path(options["output"]).write_text(
+                json.dumps(
+                    {
+                        "python": platform.python_version(),
+                        "machine": platform.machine(),
+                        "segment_storage": settings.ELD_SEGMENT_STORAGE,
+                        "repeat": options["repeat"],
+                        "results": results,
+                        "scaling": scaling,
+                    },
+                    indent=2,
+                )
+            )
+
+        if options["baseline"]:
+            baseline = json.loads(Path(options["baseline"]).read_text())
+            regressions = self._compare(results, baseline, options["tolerance"])
+            if regressions:
+                raise CommandError(
+                    "Regressions against baseline:\n" + "\n".join(regressions)
+                )
+            self.stdout.write(self.style.SUCCESS("No regressions against baseline"))
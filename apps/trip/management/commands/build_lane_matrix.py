@@ -0,0 +1,136 @@
+import csv
+from datetime import timedelta
+from itertools import batched
+
+from loguru import logger
+
+from django.core.management.base import BaseCommand
+from django.utils import timezone
+
+from apps.trip.models import Hub, HubLane
+from apps.trip.services.geo_service import GeoService
+from apps.trip.services.route_cache import normalize_address
+
+
+class Command(BaseCommand):
+    help = (
+        "Builds or refreshes the hub-to-hub lane matrix. Only missing lanes and "
+        "lanes older than --max-age are routed, unless --all is given."
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            "--hubs",
+            help="CSV with name, address columns; hubs are added or renamed",
+        )
+        parser.add_argument(
+            "--max-age",
+            type=int,
+            default=30,
+            help="Days after which a lane is routed again",
+        )
+        parser.add_argument("--all", action="store_true", help="Route every lane again")
+        parser.add_argument(
+            "--batch-size",
+            type=int,
+            default=200,
+            help="Lanes routed and saved per round",
+        )
+
+    def _import_hubs(self, path: str) -> None:
+        with open(path, newline="") as f:
+            hubs = [
+                Hub(
+                    name=row["name"],
+                    address=row["address"],
+                    normalized_address=normalize_address(row["address"])[:255],
+                )
+                for row in csv.DictReader(f)
+            ]
+        Hub.objects.bulk_create(
+            hubs,
+            update_conflicts=True,
+            unique_fields=["normalized_address"],
+            update_fields=["name", "address", "updated_at"],
+        )
+        logger.info("Imported {hubs} hubs", hubs=len(hubs))
+
+    def _route(self, lanes: tuple[tuple[Hub, Hub], ...]) -> list[HubLane]:
+        futures = [
+            GeoService.executor.submit(
+                GeoService.provider.route, origin.address, destination.address
+            )
+            for origin, destination in lanes
+        ]
+
+        routed = []
+        for (origin, destination), future in zip(lanes, futures, strict=True):
+            leg = future.result()
+            if leg is None:
+                logger.warning(
+                    "No route for lane {origin} -> {destination}",
+                    origin=origin,
+                    destination=destination,
+                )
+                continue
+            routed.append(
+                HubLane(
+                    origin=origin,
+                    destination=destination,
+                    distance_meters=leg.pop("distance_meters"),
+                    duration_seconds=leg.pop("duration_seconds"),
+                    geometry=leg,
+                )
+            )
+        return routed
+
+    def handle(self, *args, **options):
+        if options["hubs"]:
+            self._import_hubs(options["hubs"])
+
+        hubs = list(Hub.objects.all())
+        refreshed = set()
+        if not options["all"]:
+            cutoff = timezone.now() - timedelta(days=options["max_age"])
+            refreshed = {
+                (origin_id, destination_id)
+                for origin_id, destination_id in HubLane.objects.filter(
+                    updated_at__gte=cutoff
+                ).values_list("origin_id", "destination_id")
+            }
+
+        pending = [
+            (origin, destination)
+            for origin in hubs
+            for destination in hubs
+            if origin.id != destination.id
+            and (origin.id, destination.id) not in refreshed
+        ]
+        logger.info(
+            "Lane matrix: {hubs} hubs, {fresh} fresh lanes, {pending} to route",
+            hubs=len(hubs),
+            fresh=len(refreshed),
+            pending=len(pending),
+        )
+
+        saved = 0
+        for lanes in batched(pending, options["batch_size"], strict=False):
+            routed = self._route(lanes)
+            HubLane.objects.bulk_create(
+                routed,
+                update_conflicts=True,
+                unique_fields=["origin", "destination"],
+                update_fields=[
+                    "distance_meters",
+                    "duration_seconds",
+                    "geometry",
+                    "updated_at",
+                ],
+            )
+            saved += len(routed)
+            logger.info(
+                "Saved {saved}/{pending} lanes", saved=saved, pending=len(pending)
+            )
+
+        GeoService.lanes.invalidate()
+        logger.info("Lane matrix built: {saved} lanes routed", saved=saved)
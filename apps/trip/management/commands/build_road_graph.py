@@ -0,0 +1,103 @@
+import csv
+import json
+from pathlib import Path
+
+import numpy as np
+from loguru import logger
+
+from django.core.management.base import BaseCommand, CommandError
+
+
+class Command(BaseCommand):
+    help = (
+        "Builds the memory-mapped road graph used by the local_graph routing "
+        "provider from node, edge and (optional) place CSV files."
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument("nodes", help="CSV with id, lat, lng columns")
+        parser.add_argument(
+            "edges",
+            help="CSV with source, target, length_meters, duration_seconds columns",
+        )
+        parser.add_argument("output", help="Directory the graph files are written to")
+        parser.add_argument(
+            "--places",
+            help="CSV with name, lat, lng columns, snapped to their nearest node",
+        )
+        parser.add_argument(
+            "--bidirectional",
+            action="store_true",
+            help="Add the reverse of every edge",
+        )
+
+    def handle(self, *args, **options):
+        with open(options["nodes"], newline="") as f:
+            rows = list(csv.DictReader(f))
+        node_index = {row["id"]: i for i, row in enumerate(rows)}
+        nodes = np.array(
+            [(float(row["lat"]), float(row["lng"])) for row in rows], dtype=np.float64
+        )
+
+        sources, targets, lengths, durations = [], [], [], []
+        with open(options["edges"], newline="") as f:
+            for row in csv.DictReader(f):
+                try:
+                    source, target = (
+                        node_index[row["source"]],
+                        node_index[row["target"]],
+                    )
+                except KeyError as e:
+                    raise CommandError(f"Edge references unknown node {e}") from e
+                sources.append(source)
+                targets.append(target)
+                lengths.append(float(row["length_meters"]))
+                durations.append(float(row["duration_seconds"]))
+
+        sources = np.array(sources, dtype=np.int64)
+        targets = np.array(targets, dtype=np.int64)
+        lengths = np.array(lengths, dtype=np.float32)
+        durations = np.array(durations, dtype=np.float32)
+        if options["bidirectional"]:
+            sources, targets = (
+                np.concatenate((sources, targets)),
+                np.concatenate((targets, sources)),
+            )
+            lengths = np.concatenate((lengths, lengths))
+            durations = np.concatenate((durations, durations))
+
+        # Compressed sparse rows: edges grouped by source node
+        order = np.argsort(sources, kind="stable")
+        indptr = np.zeros(len(nodes) + 1, dtype=np.int64)
+        np.cumsum(np.bincount(sources, minlength=len(nodes)), out=indptr[1:])
+
+        output = Path(options["output"])
+        output.mkdir(parents=True, exist_ok=True)
+        np.save(output / "nodes.npy", nodes)
+        np.save(output / "indptr.npy", indptr)
+        np.save(output / "indices.npy", targets[order])
+        np.save(output / "lengths.npy", lengths[order])
+        np.save(output / "durations.npy", durations[order])
+
+        places = {}
+        if options["places"]:
+            with open(options["places"], newline="") as f:
+                for row in csv.DictReader(f):
+                    lat, lng = (
+                        np.radians(float(row["lat"])),
+                        np.radians(float(row["lng"])),
+                    )
+                    # Equirectangular distance is plenty to pick the closest node
+                    dx = (np.radians(nodes[:, 1]) - lng) * np.cos(lat)
+                    dy = np.radians(nodes[:, 0]) - lat
+                    places[row["name"]] = int(np.argmin(dx**2 + dy**2))
+        (output / "places.json").write_text(json.dumps(places))
+
+        logger.info(
+            "Wrote road graph to {output}: {nodes} nodes, {edges} edges, "
+            "{places} places",
+            output=output,
+            nodes=len(nodes),
+            edges=len(targets),
+            places=len(places),
+        )
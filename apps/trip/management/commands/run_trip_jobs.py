@@ -0,0 +1,108 @@
+import threading
+import time
+from datetime import timedelta
+
+from loguru import logger
+
+from django.core.management.base import BaseCommand
+from django.db import close_old_connections
+
+from apps.trip.services.job_service import JobService
+
+# Longest a worker waits before polling again after an error
+MAX_ERROR_BACKOFF_SECONDS = 60
+
+
+class Command(BaseCommand):
+    help = "Runs a pool of workers that process queued trip generation jobs."
+
+    def add_arguments(self, parser):
+        parser.add_argument("--workers", type=int, default=4)
+        parser.add_argument(
+            "--poll-interval",
+            type=float,
+            default=1.0,
+            help="Seconds to wait when the queue is empty",
+        )
+        parser.add_argument(
+            "--stale-after",
+            type=int,
+            default=30,
+            help="Minutes after which a running job is considered abandoned",
+        )
+        parser.add_argument(
+            "--requeue-interval",
+            type=float,
+            default=60.0,
+            help="Seconds between checks for abandoned jobs",
+        )
+        parser.add_argument(
+            "--once",
+            action="store_true",
+            help="Drain the queue and exit instead of polling forever",
+        )
+
+    def _work(self, poll_interval: float, once: bool):
+        errors = 0
+        while True:
+            close_old_connections()
+            try:
+                job = JobService.claim_next()
+                if job is not None:
+                    JobService.run(job)
+            except Exception as e:
+                # E.g. the database going away; the worker keeps polling
+                errors += 1
+                backoff = min(poll_interval * 2**errors, MAX_ERROR_BACKOFF_SECONDS)
+                logger.error(
+                    "Trip job worker error, retrying in {backoff:.1f}s: {error}",
+                    backoff=backoff,
+                    error=e,
+                )
+                time.sleep(backoff)
+                continue
+            errors = 0
+            if job is None:
+                if once:
+                    break
+                time.sleep(poll_interval)
+        close_old_connections()
+
+    @staticmethod
+    def _requeue_stale(stale_after: timedelta) -> None:
+        try:
+            requeued = JobService.requeue_stale(stale_after)
+        except Exception as e:
+            logger.error("Could not requeue stale trip jobs: {error}", error=e)
+            return
+        finally:
+            close_old_connections()
+        if requeued:
+            logger.warning("Requeued {count} stale trip jobs", count=requeued)
+
+    def handle(self, *args, **options):
+        stale_after = timedelta(minutes=options["stale_after"])
+        self._requeue_stale(stale_after)
+
+        logger.info("Starting {count} trip job workers", count=options["workers"])
+        workers = [
+            threading.Thread(
+                target=self._work,
+                args=(options["poll_interval"], options["once"]),
+                name=f"trip-job-{i}",
+                daemon=True,
+            )
+            for i in range(options["workers"])
+        ]
+        for worker in workers:
+            worker.start()
+
+        try:
+            # Jobs abandoned by another process's workers are picked up too
+            while any(worker.is_alive() for worker in workers):
+                deadline = time.monotonic() + options["requeue_interval"]
+                for worker in workers:
+                    worker.join(max(deadline - time.monotonic(), 0))
+                self._requeue_stale(stale_after)
+        except KeyboardInterrupt:
+            logger.info("Stopping trip job workers")
@@ -0,0 +1,36 @@
+# Generated by Django 6.0.2 on 2026-10-17 22:43
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+    dependencies = [
+        ("trip", "0001_initial"),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name="RouteCacheEntry",
+            fields=[
+                (
+                    "id",
+                    models.BigAutoField(
+                        auto_created=True,
+                        primary_key=True,
+                        serialize=False,
+                        verbose_name="ID",
+                    ),
+                ),
+                ("created_at", models.DateTimeField(auto_now_add=True)),
+                ("updated_at", models.DateTimeField(auto_now=True)),
+                ("key", models.CharField(max_length=64, unique=True)),
+                ("origin", models.CharField(max_length=255)),
+                ("destination", models.CharField(max_length=255)),
+                ("leg", models.JSONField()),
+                ("expires_at", models.DateTimeField(db_index=True)),
+            ],
+            options={
+                "abstract": False,
+            },
+        ),
+    ]
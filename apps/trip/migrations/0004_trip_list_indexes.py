@@ -0,0 +1,30 @@
+# Generated by Django 6.0.2 on 2026-10-17 22:48
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+    dependencies = [
+        ("trip", "0003_trip_job"),
+    ]
+
+    operations = [
+        migrations.AddIndex(
+            model_name="trip",
+            index=models.Index(fields=["-created_at", "-id"], name="trip_created_idx"),
+        ),
+        migrations.AddIndex(
+            model_name="trip",
+            index=models.Index(
+                fields=["driver_id", "-created_at", "-id"],
+                name="trip_driver_created_idx",
+            ),
+        ),
+        migrations.AddIndex(
+            model_name="trip",
+            index=models.Index(
+                fields=["vehicle_id", "-created_at", "-id"],
+                name="trip_vehicle_created_idx",
+            ),
+        ),
+    ]
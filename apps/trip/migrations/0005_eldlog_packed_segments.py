@@ -0,0 +1,17 @@
+# Generated by Django 6.0.2 on 2026-10-17 22:49
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+    dependencies = [
+        ("trip", "0004_trip_list_indexes"),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name="eldlog",
+            name="packed_segments",
+            field=models.BinaryField(blank=True, null=True),
+        ),
+    ]
@@ -0,0 +1,17 @@
+# Generated by Django 6.0.2 on 2026-10-17 22:50
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+    dependencies = [
+        ("trip", "0005_eldlog_packed_segments"),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name="trip",
+            name="geometry_levels",
+            field=models.JSONField(blank=True, editable=False, null=True),
+        ),
+    ]
@@ -0,0 +1,17 @@
+# Generated by Django 6.0.2 on 2026-10-17 23:07
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+    dependencies = [
+        ("trip", "0007_hub_lanes"),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name="trip",
+            name="checkpoint",
+            field=models.JSONField(blank=True, editable=False, null=True),
+        ),
+    ]
@@ -0,0 +1,62 @@
+# Generated by Django 6.0.2 on 2026-10-17 23:12
+
+import django.db.models.deletion
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+    dependencies = [
+        ("trip", "0008_trip_checkpoint"),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name="DriverState",
+            fields=[
+                (
+                    "id",
+                    models.BigAutoField(
+                        auto_created=True,
+                        primary_key=True,
+                        serialize=False,
+                        verbose_name="ID",
+                    ),
+                ),
+                ("created_at", models.DateTimeField(auto_now_add=True)),
+                ("updated_at", models.DateTimeField(auto_now=True)),
+                ("driver_id", models.CharField(max_length=255, unique=True)),
+                (
+                    "as_of",
+                    models.DateTimeField(help_text="End of the driver's latest trip"),
+                ),
+                ("cycle_recap", models.JSONField()),
+                (
+                    "last_reset_at",
+                    models.DateTimeField(
+                        help_text="End of the last 10hr / 34hr reset, i.e. the start of the current 14hr duty window"
+                    ),
+                ),
+                ("driving_hrs_today", models.FloatField(default=0.0)),
+                (
+                    "break_clock_driving",
+                    models.FloatField(
+                        default=0.0,
+                        help_text="Driving hours since the last 30min break",
+                    ),
+                ),
+                (
+                    "last_trip",
+                    models.ForeignKey(
+                        blank=True,
+                        null=True,
+                        on_delete=django.db.models.deletion.SET_NULL,
+                        related_name="+",
+                        to="trip.trip",
+                    ),
+                ),
+            ],
+            options={
+                "abstract": False,
+            },
+        ),
+    ]
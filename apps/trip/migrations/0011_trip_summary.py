@@ -0,0 +1,78 @@
+# Generated by Django 6.0.2 on 2026-10-17 23:16
+
+import django.db.models.deletion
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+    dependencies = [
+        ("trip", "0010_idempotency_keys"),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name="TripSummary",
+            fields=[
+                (
+                    "id",
+                    models.BigAutoField(
+                        auto_created=True,
+                        primary_key=True,
+                        serialize=False,
+                        verbose_name="ID",
+                    ),
+                ),
+                ("created_at", models.DateTimeField(auto_now_add=True)),
+                ("updated_at", models.DateTimeField(auto_now=True)),
+                ("driver_id", models.CharField(max_length=255)),
+                ("vehicle_id", models.CharField(max_length=255)),
+                ("started_at", models.DateTimeField()),
+                (
+                    "ended_at",
+                    models.DateTimeField(help_text="End of the trip's last segment"),
+                ),
+                (
+                    "days",
+                    models.PositiveIntegerField(
+                        default=0, help_text="Daily log sheets"
+                    ),
+                ),
+                ("total_miles", models.FloatField(default=0.0)),
+                ("driving_hours", models.FloatField(default=0.0)),
+                (
+                    "on_duty_hours",
+                    models.FloatField(default=0.0, help_text="Not driving"),
+                ),
+                ("off_duty_hours", models.FloatField(default=0.0)),
+                ("sleeper_berth_hours", models.FloatField(default=0.0)),
+                ("daily_resets", models.PositiveIntegerField(default=0)),
+                (
+                    "restarts",
+                    models.PositiveIntegerField(default=0, help_text="34hr restarts"),
+                ),
+                ("rest_breaks", models.PositiveIntegerField(default=0)),
+                ("fuel_stops", models.PositiveIntegerField(default=0)),
+                (
+                    "trip",
+                    models.OneToOneField(
+                        on_delete=django.db.models.deletion.CASCADE,
+                        related_name="summary",
+                        to="trip.trip",
+                    ),
+                ),
+            ],
+            options={
+                "indexes": [
+                    models.Index(fields=["started_at"], name="summary_started_idx"),
+                    models.Index(
+                        fields=["driver_id", "started_at"],
+                        name="summary_driver_started_idx",
+                    ),
+                    models.Index(
+                        fields=["vehicle_id", "started_at"],
+                        name="summary_vehicle_started_idx",
+                    ),
+                ],
+            },
+        ),
+    ]
@@ -0,0 +1,17 @@
+# Generated by Django 6.0.2 on 2026-10-17 23:46
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+    dependencies = [
+        ("trip", "0011_trip_summary"),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name="tripjob",
+            name="retry_at",
+            field=models.DateTimeField(blank=True, null=True),
+        ),
+    ]
@@ -1,7 +1,7 @@
 from django.db import models
 
 from apps.core.models import BaseModel
-from apps.trip.constants import DriverStatus
+from apps.trip.constants import DriverStatus, JobStatus
 
 
 class Trip(BaseModel):
@@ -18,6 +18,26 @@ class Trip(BaseModel):
     trailer_id = models.TextField(max_length=255, blank=True, default="TLI-0001")
     metrics = models.JSONField(null=True, blank=True)
     route_geometry = models.JSONField(null=True, blank=True)
+    # Simplified route polylines per zoom level, built from route_geometry on
+    # first use (see apps.trip.services.geometry_service)
+    geometry_levels = models.JSONField(null=True, blank=True, editable=False)
+    # HOS clock state after the last saved generation step, so an interrupted
+    # generation resumes there (see EldService.checkpoint)
+    checkpoint = models.JSONField(null=True, blank=True, editable=False)
+
+    class Meta:
+        indexes = [
+            # Keyset pagination of the trip list, optionally per driver/vehicle
+            models.Index(fields=["-created_at", "-id"], name="trip_created_idx"),
+            models.Index(
+                fields=["driver_id", "-created_at", "-id"],
+                name="trip_driver_created_idx",
+            ),
+            models.Index(
+                fields=["vehicle_id", "-created_at", "-id"],
+                name="trip_vehicle_created_idx",
+            ),
+        ]
 
     def __str__(self):
         return f"Trip for {self.driver_id} from {self.pickup_address} to {self.drop_off_address}"
@@ -30,6 +50,10 @@ class ELDLog(BaseModel):
     # metadata fields for ELD sheet
     total_miles = models.FloatField(default=0.0)
 
+    # Set when the day's segments are stored packed instead of as TimeLog rows
+    # (see apps.trip.services.segment_codec)
+    packed_segments = models.BinaryField(null=True, blank=True)
+
     class Meta:
         unique_together = ("trip", "date")
         ordering = ["date"]
@@ -49,3 +73,141 @@ class TimeLog(BaseModel):
 
     class Meta:
         ordering = ["start_time"]
+
+
+class RouteCacheEntry(BaseModel):
+    """
+    Shared tier of GeoService's caches, keyed on normalized origin/destination.
+    Reverse-geocode entries use the coordinates as origin and no destination.
+    """
+
+    key = models.CharField(max_length=64, unique=True)
+    origin = models.CharField(max_length=255)
+    destination = models.CharField(max_length=255)
+    leg = models.JSONField()
+    expires_at = models.DateTimeField(db_index=True)
+
+
+class Hub(BaseModel):
+    """A frequently used terminal; legs between hubs are precomputed as HubLanes."""
+
+    name = models.CharField(max_length=255)
+    address = models.CharField(max_length=255)
+    # What trip addresses are matched against (see route_cache.normalize_address)
+    normalized_address = models.CharField(max_length=255, unique=True)
+
+    def __str__(self):
+        return self.name
+
+
+class HubLane(BaseModel):
+    """Precomputed leg between two hubs, built by the `build_lane_matrix` command."""
+
+    origin = models.ForeignKey(
+        Hub, on_delete=models.CASCADE, related_name="outbound_lanes"
+    )
+    destination = models.ForeignKey(
+        Hub, on_delete=models.CASCADE, related_name="inbound_lanes"
+    )
+    distance_meters = models.PositiveIntegerField()
+    duration_seconds = models.PositiveIntegerField()
+    # Rest of the routed leg: polyline, start/end coords and bounds
+    geometry = models.JSONField()
+
+    class Meta:
+        unique_together = ("origin", "destination")
+        indexes = [models.Index(fields=["updated_at"])]
+
+
+class TripJob(BaseModel):
+    """Queued trip generation, claimed and run by the `run_trip_jobs` workers."""
+
+    trip = models.OneToOneField(Trip, on_delete=models.CASCADE, related_name="job")
+    status = models.CharField(
+        max_length=10, choices=JobStatus.choices, default=JobStatus.PENDING
+    )
+    attempts = models.PositiveIntegerField(default=0)
+    error = models.TextField(blank=True)
+    started_at = models.DateTimeField(null=True, blank=True)
+    finished_at = models.DateTimeField(null=True, blank=True)
+    # Set when a failed job is queued again; it is not claimed before then
+    retry_at = models.DateTimeField(null=True, blank=True)
+
+    class Meta:
+        indexes = [models.Index(fields=["status", "created_at"])]
+
+
+class DriverState(BaseModel):
+    """
+    Rolling HOS summary of a driver as of the end of their latest generated
+    trip, kept up to date as trips are generated. A new trip for the driver
+    starts its clocks from it instead of from `Trip.initial_cycle_hours`.
+    """
+
+    driver_id = models.CharField(max_length=255, unique=True)
+    last_trip = models.ForeignKey(
+        Trip, null=True, blank=True, on_delete=models.SET_NULL, related_name="+"
+    )
+    as_of = models.DateTimeField(help_text="End of the driver's latest trip")
+    # CycleRecap state: [ordinal of its last day, on-duty hours per day slot]
+    cycle_recap = models.JSONField()
+    last_reset_at = models.DateTimeField(
+        help_text="End of the last 10hr / 34hr reset, i.e. the start of the "
+        "current 14hr duty window"
+    )
+    driving_hrs_today = models.FloatField(default=0.0)
+    break_clock_driving = models.FloatField(
+        default=0.0, help_text="Driving hours since the last 30min break"
+    )
+
+
+class IdempotencyKey(BaseModel):
+    """
+    A client-supplied `Idempotency-Key` and the response it got, replayed to
+    retries of the same request until it expires. A row without a status
+    code is a request still in flight.
+    """
+
+    key = models.CharField(max_length=255, unique=True)
+    # SHA-256 of the request, so a key reused for another request is caught
+    fingerprint = models.CharField(max_length=64)
+    status_code = models.PositiveSmallIntegerField(null=True, blank=True)
+    response = models.JSONField(null=True, blank=True)
+    expires_at = models.DateTimeField(db_index=True)
+
+
+class TripSummary(BaseModel):
+    """
+    Aggregates of a trip's generated logs, written together with them by
+    EldService, so dashboards roll trips up in SQL instead of loading every
+    segment. The driver and vehicle are copied from the trip, so rollups group
+    on this table alone.
+    """
+
+    trip = models.OneToOneField(Trip, on_delete=models.CASCADE, related_name="summary")
+    driver_id = models.CharField(max_length=255)
+    vehicle_id = models.CharField(max_length=255)
+    started_at = models.DateTimeField()
+    ended_at = models.DateTimeField(help_text="End of the trip's last segment")
+    days = models.PositiveIntegerField(default=0, help_text="Daily log sheets")
+    total_miles = models.FloatField(default=0.0)
+    driving_hours = models.FloatField(default=0.0)
+    on_duty_hours = models.FloatField(default=0.0, help_text="Not driving")
+    off_duty_hours = models.FloatField(default=0.0)
+    sleeper_berth_hours = models.FloatField(default=0.0)
+    daily_resets = models.PositiveIntegerField(default=0)
+    restarts = models.PositiveIntegerField(default=0, help_text="34hr restarts")
+    rest_breaks = models.PositiveIntegerField(default=0)
+    fuel_stops = models.PositiveIntegerField(default=0)
+
+    class Meta:
+        indexes = [
+            # Rollups over a time range, optionally per driver/vehicle
+            models.Index(fields=["started_at"], name="summary_started_idx"),
+            models.Index(
+                fields=["driver_id", "started_at"], name="summary_driver_started_idx"
+            ),
+            models.Index(
+                fields=["vehicle_id", "started_at"], name="summary_vehicle_started_idx"
+            ),
+        ]
@@ -0,0 +1,95 @@
+from datetime import datetime
+
+from rest_framework.exceptions import NotFound
+from rest_framework.pagination import Cursor, CursorPagination
+
+from django.db.models import Q
+
+
+class TripCursorPagination(CursorPagination):
+    """
+    Keyset pagination over (created_at, id), served by `trip_created_idx`.
+    The cursor carries both keys of the row it stops at, so trips created in
+    the same instant (e.g. a batch) are neither skipped nor repeated. The page
+    can also be fetched with the async ORM (`apaginate_queryset`).
+    """
+
+    ordering = ("-created_at", "-id")
+    page_size = 50
+    page_size_query_param = "page_size"
+    max_page_size = 200
+
+    def paginate_queryset(self, queryset, request, view=None):
+        query = self._page_query(queryset, request)
+        if query is None:
+            return None
+        return self._set_page(list(query))
+
+    async def apaginate_queryset(self, queryset, request, view=None):
+        query = self._page_query(queryset, request)
+        if query is None:
+            return None
+        return self._set_page([instance async for instance in query])
+
+    def _page_query(self, queryset, request):
+        """The query for the requested page and the row after it"""
+        self.request = request
+        self.page_size = self.get_page_size(request)
+        if not self.page_size:
+            return None
+
+        self.base_url = request.build_absolute_uri()
+        self.cursor = self.decode_cursor(request)
+        if self.cursor is None:
+            return queryset.order_by("-created_at", "-id")[: self.page_size + 1]
+
+        created_at, trip_id = self.cursor.position
+        if self.cursor.reverse:
+            # Back towards newer trips, nearest first
+            queryset = queryset.filter(
+                Q(created_at__gt=created_at) | Q(created_at=created_at, id__gt=trip_id)
+            ).order_by("created_at", "id")
+        else:
+            queryset = queryset.filter(
+                Q(created_at__lt=created_at) | Q(created_at=created_at, id__lt=trip_id)
+            ).order_by("-created_at", "-id")
+        return queryset[: self.page_size + 1]
+
+    def _set_page(self, results: list) -> list:
+        """The page out of the query's rows, and whether there are more"""
+        self.page = results[: self.page_size]
+        has_more = len(results) > len(self.page)
+        if self.cursor is not None and self.cursor.reverse:
+            self.page.reverse()
+            self.has_previous, self.has_next = has_more, True
+        else:
+            self.has_previous, self.has_next = self.cursor is not None, has_more
+
+        if (self.has_previous or self.has_next) and self.template is not None:
+            self.display_page_controls = True
+        return self.page
+
+    def decode_cursor(self, request):
+        cursor = super().decode_cursor(request)
+        if cursor is None:
+            return None
+        try:
+            created_at, trip_id = cursor.position.split("|")
+            position = (datetime.fromisoformat(created_at), int(trip_id))
+        except (AttributeError, ValueError) as e:
+            raise NotFound(self.invalid_cursor_message) from e
+        return Cursor(offset=0, reverse=cursor.reverse, position=position)
+
+    def _link(self, instance, reverse: bool) -> str:
+        position = f"{instance.created_at.isoformat()}|{instance.id}"
+        return self.encode_cursor(Cursor(offset=0, reverse=reverse, position=position))
+
+    def get_next_link(self):
+        if not self.has_next or not self.page:
+            return None
+        return self._link(self.page[-1], reverse=False)
+
+    def get_previous_link(self):
+        if not self.has_previous or not self.page:
+            return None
+        return self._link(self.page[0], reverse=True)
@@ -1,6 +1,13 @@
-from rest_framework.serializers import ModelSerializer
+from rest_framework.serializers import (
+    CharField,
+    DateTimeField,
+    ModelSerializer,
+    Serializer,
+    SerializerMethodField,
+)
 
-from apps.trip.models import ELDLog, TimeLog, Trip
+from apps.trip.models import ELDLog, TimeLog, Trip, TripJob, TripSummary
+from apps.trip.services import segment_codec
 
 
 class TimeLogSerializer(ModelSerializer):
@@ -10,19 +17,44 @@ class TimeLogSerializer(ModelSerializer):
 
 
 class ELDLogSerializer(ModelSerializer):
-    status_changes = TimeLogSerializer(many=True, read_only=True)
+    status_changes = SerializerMethodField()
 
     class Meta:
         model = ELDLog
         fields = ["date", "total_miles", "status_changes"]
 
+    def get_status_changes(self, obj):
+        if not obj.packed_segments:
+            return TimeLogSerializer(obj.status_changes.all(), many=True).data
+
+        # Packed days are only decoded here, when they are rendered
+        segments = segment_codec.decode(obj.date, obj.packed_segments)
+        time_logs = [
+            TimeLog(
+                status=segment.status,
+                start_time=segment.start_time,
+                end_time=segment.end_time,
+                location_text=segment.location,
+                remarks=segment.remarks,
+            )
+            for segment in segments
+        ]
+        return TimeLogSerializer(time_logs, many=True).data
+
+
+class TripSummarySerializer(ModelSerializer):
+    class Meta:
+        model = TripSummary
+        exclude = ["id", "trip", "driver_id", "vehicle_id", "created_at", "updated_at"]
+
 
 class TripDetailSerializer(ModelSerializer):
     daily_logs = ELDLogSerializer(many=True, read_only=True)
+    summary = TripSummarySerializer(read_only=True)
 
     class Meta:
         model = Trip
-        fields = "__all__"
+        exclude = ["geometry_levels", "checkpoint"]
 
 
 class TripListSerializer(ModelSerializer):
@@ -37,3 +69,40 @@ class TripListSerializer(ModelSerializer):
             "drop_off_address",
             "created_at",
         ]
+
+
+class TripSpecSerializer(ModelSerializer):
+    """A single trip of a batch planning request"""
+
+    class Meta:
+        model = Trip
+        fields = [
+            "start_address",
+            "pickup_address",
+            "drop_off_address",
+            "initial_cycle_hours",
+            "driver_id",
+            "vehicle_id",
+            "trailer_id",
+        ]
+
+
+class TripJobSerializer(ModelSerializer):
+    class Meta:
+        model = TripJob
+        fields = [
+            "trip",
+            "status",
+            "attempts",
+            "error",
+            "started_at",
+            "finished_at",
+            "retry_at",
+        ]
+
+
+class TripAmendSerializer(Serializer):
+    """A new drop-off for a trip, effective at `amended_at` (default: now)"""
+
+    drop_off_address = CharField(max_length=255)
+    amended_at = DateTimeField(required=False)
@@ -0,0 +1,206 @@
+import dataclasses
+
+import numpy as np
+from googlemaps.convert import encode_polyline
+from loguru import logger
+
+from django.db import transaction
+from django.utils import timezone
+
+from apps.core.instrumentation import span
+from apps.trip.constants import DriverStatus, GenerationStage
+from apps.trip.models import ELDLog, Trip
+from apps.trip.services import segment_codec
+from apps.trip.services.driver_state_service import DriverStateService
+from apps.trip.services.eld_records import SegmentRecord
+from apps.trip.services.eld_service import EldService
+from apps.trip.services.geo_service import METERS_TO_MILES, SECONDS_TO_HOURS, GeoService
+from apps.trip.services.geometry_service import decode_polyline
+from apps.trip.services.location_service import LocationService, RoutePositionIndex
+
+
+class AmendService:
+    """
+    Changes the drop-off of an already planned trip from a point in time on.
+    The logs up to that point are kept; the HOS clocks are replayed from them
+    and only the rest of the trip is simulated again. Only the leg towards the
+    new drop-off is routed, and only the days from the amendment on are
+    rewritten.
+    """
+
+    @staticmethod
+    def _load_segments(trip: Trip) -> list[SegmentRecord]:
+        eld_logs = trip.daily_logs.prefetch_related("status_changes")
+        segments = [
+            segment
+            for eld_log in eld_logs
+            for segment in segment_codec.load_segments(eld_log)
+        ]
+        return sorted(segments, key=lambda segment: segment.start_time)
+
+    @staticmethod
+    def _kept_segments(segments: list[SegmentRecord], amended_at) -> list:
+        """
+        The segments before `amended_at`. Driving is cut short at that point;
+        any other duty status (a stop, a rest) is kept until it ends, including
+        its continuation past midnight.
+        """
+        cut = amended_at
+        for i, segment in enumerate(segments):
+            if segment.start_time <= cut < segment.end_time:
+                if segment.status != DriverStatus.DRIVING:
+                    cut = segment.end_time
+                    for following in segments[i + 1 :]:
+                        if (
+                            following.start_time != cut
+                            or following.status != segment.status
+                            or following.remarks != segment.remarks
+                        ):
+                            break
+                        cut = following.end_time
+                break
+
+        return [
+            dataclasses.replace(segment, end_time=min(segment.end_time, cut))
+            for segment in segments
+            if segment.start_time < cut
+        ]
+
+    @staticmethod
+    def _metrics(metrics: dict, kept_miles: float, to_pickup_miles: float, leg):
+        """
+        Trip metrics with the route after `kept_miles` replaced by `leg`. Only
+        the trip's totals are stored, so the kept part's duration is its share
+        of them.
+        """
+        kept_seconds = (
+            metrics["raw_seconds"] * kept_miles / metrics["total_miles"]
+            if metrics["total_miles"]
+            else 0.0
+        )
+        raw_seconds = kept_seconds + leg["duration_seconds"]
+        raw_meters = kept_miles / METERS_TO_MILES + leg["distance_meters"]
+        total_miles = kept_miles + leg["distance_meters"] * METERS_TO_MILES
+        return {
+            "to_pickup_miles": round(to_pickup_miles, 2),
+            "to_drop_off_miles": round(total_miles - to_pickup_miles, 2),
+            "total_miles": round(total_miles, 2),
+            "total_duration_hrs": round(raw_seconds * SECONDS_TO_HOURS, 2),
+            "raw_seconds": raw_seconds,
+            "raw_meters": raw_meters,
+        }
+
+    @staticmethod
+    def _traveled_points(polyline: str, leg_miles: float, miles: float):
+        """The points of a leg's polyline up to `miles` along it"""
+        index = RoutePositionIndex([polyline], [leg_miles])
+        if len(index.coords) == 0:
+            return np.empty((0, 2))
+        position = index.locate(np.array([miles]))
+        return np.concatenate((index.coords[index.distances < miles], position))
+
+    @classmethod
+    def _reroute(cls, trip: Trip, driven_miles: float, loaded: bool):
+        """
+        Routes the remaining trip to the new drop-off: from the pickup if it
+        has not been reached yet, else from the current position. Returns the
+        new metrics and geometry.
+        """
+        metrics, geometry = trip.metrics, trip.route_geometry
+        to_pickup_miles = metrics["to_pickup_miles"]
+
+        if not loaded:
+            origin, kept_miles, traveled = trip.pickup_address, to_pickup_miles, None
+        else:
+            driven_on_leg = driven_miles - to_pickup_miles
+            traveled = cls._traveled_points(
+                geometry["polyline"][1], metrics["to_drop_off_miles"], driven_on_leg
+            )
+            if len(traveled) == 0:
+                raise ValueError("The trip's current position is unknown.")
+            lat, lng = traveled[-1]
+            origin, kept_miles = f"{lat:.6f},{lng:.6f}", driven_miles
+
+        leg = GeoService.get_leg(origin, trip.drop_off_address)
+        if not leg:
+            raise ValueError("Routing service failed to calculate legs.")
+
+        polyline = leg["polyline"]
+        if traveled is not None:
+            polyline = encode_polyline(
+                np.concatenate((traveled, decode_polyline(polyline))).tolist()
+            )
+        return cls._metrics(metrics, kept_miles, to_pickup_miles, leg), {
+            **geometry,
+            "polyline": [geometry["polyline"][0], polyline],
+            "drop_off_coords": leg["end_coords"],
+        }
+
+    @classmethod
+    def amend(cls, trip: Trip, drop_off_address: str, amended_at=None) -> Trip:
+        amended_at = amended_at or timezone.now()
+        logger.info(
+            "Amending Trip ID: {trip_id} at {amended_at}: "
+            "drop-off {old_drop_off!r} -> {drop_off!r}",
+            trip_id=trip.id,
+            amended_at=amended_at,
+            old_drop_off=trip.drop_off_address,
+            drop_off=drop_off_address,
+        )
+        if amended_at < trip.created_at:
+            raise ValueError("The amendment predates the trip.")
+
+        segments = cls._load_segments(trip)
+        if not segments:
+            raise ValueError("The trip has no logs to amend yet.")
+        if amended_at >= segments[-1].end_time:
+            raise ValueError("The trip has already been completed.")
+        # A trip planned after the driver's previous one starts when it ends
+        if amended_at < segments[0].start_time:
+            raise ValueError("The trip has not started yet.")
+        kept = cls._kept_segments(segments, amended_at)
+        remarks = {segment.remarks for segment in kept}
+        if "Unloading Freight" in remarks:
+            raise ValueError("The freight has already been delivered.")
+        loaded = "Loading Freight" in remarks
+
+        # Replayed on top of the clocks the driver started the trip with
+        service = EldService.for_trip(
+            trip, driver_state=DriverStateService.from_checkpoint(trip.checkpoint)
+        )
+        service.replay(kept)
+
+        trip.drop_off_address = drop_off_address
+        with span("trip.routing"):
+            trip.metrics, trip.route_geometry = cls._reroute(
+                trip, service.odometer, loaded
+            )
+        trip.geometry_levels = None
+
+        service.simulate_legs(
+            max(trip.metrics["to_pickup_miles"] - service.odometer, 0),
+            trip.metrics["to_drop_off_miles"]
+            - max(service.odometer - trip.metrics["to_pickup_miles"], 0),
+            loaded=loaded,
+        )
+        with span("trip.labelling"):
+            LocationService.label_segments([service])
+
+        # The day of the cut keeps its earlier segments, but is rewritten whole
+        since = kept[-1].end_time.date()
+        trip.checkpoint = service.checkpoint(GenerationStage.DONE)
+        with transaction.atomic():
+            trip.save(
+                update_fields=[
+                    "drop_off_address",
+                    "metrics",
+                    "route_geometry",
+                    "geometry_levels",
+                    "checkpoint",
+                    "updated_at",
+                ]
+            )
+            ELDLog.objects.filter(trip=trip, date__gte=since).delete()
+            service.persist(since=since)
+            DriverStateService.record([service])
+        return trip
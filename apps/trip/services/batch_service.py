@@ -0,0 +1,168 @@
+import multiprocessing
+from concurrent.futures import ProcessPoolExecutor
+
+from loguru import logger
+
+import django
+from django.conf import settings
+from django.db import transaction
+from django.utils import timezone
+
+from apps.core.instrumentation import span
+from apps.trip.constants import GenerationStage
+from apps.trip.models import Trip
+from apps.trip.services.driver_state_service import (
+    UNASSIGNED_DRIVER_ID,
+    DriverStateService,
+)
+from apps.trip.services.eld_service import EldService
+from apps.trip.services.geo_service import GeoService
+from apps.trip.services.location_service import LocationService
+
+
+def _simulate(trips: list[Trip], driver_state=None) -> list[EldService | Exception]:
+    """
+    Process pool task: runs the HOS simulations of one driver's trips in
+    memory, in order, each starting from where the previous one left the
+    driver. A trip that fails is skipped; the next starts from the one before.
+    """
+    results = []
+    for trip in trips:
+        try:
+            service = EldService.for_trip(trip, driver_state=driver_state)
+            service.simulate_trip(trip.metrics)
+        except Exception as e:
+            results.append(e)
+            continue
+        results.append(service)
+        driver_state = DriverStateService.state_after(service)
+    return results
+
+
+class BatchService:
+    """Plans many trips at once, e.g. for the morning fleet dispatch."""
+
+    _executor: ProcessPoolExecutor | None = None
+
+    @classmethod
+    def _get_executor(cls) -> ProcessPoolExecutor:
+        # Spawned (not forked) workers, so request-thread state and the
+        # GeoService pool never leak into them; each sets Django up once
+        if cls._executor is None:
+            cls._executor = ProcessPoolExecutor(
+                max_workers=settings.TRIP_BATCH_WORKERS,
+                mp_context=multiprocessing.get_context("spawn"),
+                initializer=django.setup,
+            )
+        return cls._executor
+
+    @classmethod
+    def _simulate_all(cls, trips: list[Trip]) -> list[EldService | Exception]:
+        # A driver's trips run in batch order, the first from their state as
+        # of before the batch; trips without a driver each run on their own
+        states = DriverStateService.get_many(trip.driver_id for trip in trips)
+        chains: dict = {}
+        for i, trip in enumerate(trips):
+            key = i if trip.driver_id == UNASSIGNED_DRIVER_ID else trip.driver_id
+            chains.setdefault(key, []).append(i)
+
+        def args(indices):
+            return [trips[i] for i in indices], states.get(trips[indices[0]].driver_id)
+
+        if len(trips) < settings.TRIP_BATCH_MIN_PARALLEL:
+            futures = None
+        else:
+            executor = cls._get_executor()
+            futures = {
+                key: executor.submit(_simulate, *args(indices))
+                for key, indices in chains.items()
+            }
+
+        results: list[EldService | Exception] = [None] * len(trips)
+        for key, indices in chains.items():
+            try:
+                if futures is None:
+                    simulated = _simulate(*args(indices))
+                else:
+                    simulated = futures[key].result()
+            except Exception as e:
+                simulated = [e] * len(indices)
+            for i, result in zip(indices, simulated, strict=True):
+                results[i] = result
+        return results
+
+    @classmethod
+    def plan_trips(cls, specs: list[dict]) -> list[Trip | Exception]:
+        """
+        Routes, simulates and saves a trip for each validated spec. Returns the
+        saved trip for each spec, or the error that prevented it.
+        """
+        logger.info("Planning batch of {trips} trips", trips=len(specs))
+        with span("trip.routing"):
+            routes = GeoService.get_route_data_many(
+                [
+                    (
+                        spec["start_address"],
+                        spec["pickup_address"],
+                        spec["drop_off_address"],
+                    )
+                    for spec in specs
+                ]
+            )
+
+        results: list[Trip | Exception] = list(routes)
+        planned = [
+            i for i, route_data in enumerate(routes) if isinstance(route_data, dict)
+        ]
+        # Simulated unsaved, so routing, simulation and labelling hold no
+        # transaction open; the trips all start from the same moment
+        now = timezone.now()
+        trips = [
+            Trip(
+                **specs[i],
+                metrics=routes[i]["metrics"],
+                route_geometry=routes[i]["geometry"],
+                created_at=now,
+            )
+            for i in planned
+        ]
+
+        services = []
+        with span("batch.simulate"):
+            simulated = cls._simulate_all(trips)
+        for i, service in zip(planned, simulated, strict=True):
+            if isinstance(service, Exception):
+                logger.error(
+                    "Batch item {index} failed simulation: {error}",
+                    index=i,
+                    error=service,
+                )
+                results[i] = service
+            else:
+                # The simulated (possibly pickled) copy of the trip, carrying
+                # any cycle hours derived from a driver state, and the state
+                # itself in its checkpoint for amendments
+                service.trip.checkpoint = service.checkpoint(GenerationStage.DONE)
+                results[i] = service.trip
+                services.append(service)
+
+        with span("trip.labelling"):
+            LocationService.label_segments(services)
+
+        # The trips are only reported as created once their logs are saved
+        # with them; a failure anywhere leaves none of the batch behind
+        with span("eld.persist"), transaction.atomic():
+            saved = Trip.objects.bulk_create(service.trip for service in services)
+            # created_at is stamped on insert; put back the time simulated from
+            for trip in saved:
+                trip.created_at = now
+            Trip.objects.bulk_update(saved, ["created_at"])
+            EldService.persist_many(services)
+            DriverStateService.record(services)
+
+        logger.info(
+            "Planned {planned} of {trips} trips",
+            planned=len(services),
+            trips=len(specs),
+        )
+        return results
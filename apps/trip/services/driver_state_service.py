@@ -0,0 +1,114 @@
+from datetime import datetime
+
+from loguru import logger
+
+from apps.trip.models import DriverState, Trip
+
+# Trips created without a driver all carry the field default; they are not
+# one driver, so they never share a state
+UNASSIGNED_DRIVER_ID = Trip._meta.get_field("driver_id").default
+
+
+class DriverStateService:
+    """Reads and maintains the per-driver rolling HOS summaries."""
+
+    @staticmethod
+    def get_many(driver_ids) -> dict[str, DriverState]:
+        driver_ids = set(driver_ids) - {UNASSIGNED_DRIVER_ID}
+        if not driver_ids:
+            return {}
+        return {
+            state.driver_id: state
+            for state in DriverState.objects.filter(driver_id__in=driver_ids)
+        }
+
+    @classmethod
+    def get(cls, driver_id: str) -> DriverState | None:
+        return cls.get_many([driver_id]).get(driver_id)
+
+    @staticmethod
+    def state_after(service) -> DriverState:
+        """The (unsaved) state a generated EldService leaves its driver in"""
+        return DriverState(
+            driver_id=service.trip.driver_id,
+            last_trip=service.trip,
+            as_of=service.current_time,
+            cycle_recap=service.recap.to_state(),
+            last_reset_at=service.day_start_time,
+            driving_hrs_today=service.driving_hrs_today,
+            break_clock_driving=service.break_clock_driving,
+        )
+
+    @staticmethod
+    def to_checkpoint(state: DriverState | None) -> dict | None:
+        """A trip's starting state, as kept in its checkpoint to replay it"""
+        if state is None:
+            return None
+        return {
+            "as_of": state.as_of.isoformat(),
+            "cycle_recap": state.cycle_recap,
+            "last_reset_at": state.last_reset_at.isoformat(),
+            "driving_hrs_today": state.driving_hrs_today,
+            "break_clock_driving": state.break_clock_driving,
+        }
+
+    @staticmethod
+    def from_checkpoint(checkpoint: dict | None) -> DriverState | None:
+        """
+        The (unsaved) state a trip started from, if its checkpoint kept one;
+        `None` for a trip that started afresh, or was generated before
+        checkpoints kept it.
+        """
+        state = (checkpoint or {}).get("driver_state")
+        if state is None:
+            return None
+        return DriverState(
+            as_of=datetime.fromisoformat(state["as_of"]),
+            cycle_recap=state["cycle_recap"],
+            last_reset_at=datetime.fromisoformat(state["last_reset_at"]),
+            driving_hrs_today=state["driving_hrs_today"],
+            break_clock_driving=state["break_clock_driving"],
+        )
+
+    @classmethod
+    def record(cls, services) -> None:
+        """
+        Moves each driver's state to the end of their latest trip among the
+        given (generated) EldServices, unless it already reflects a later
+        trip.
+        """
+        latest = {}
+        for service in services:
+            driver_id = service.trip.driver_id
+            if driver_id == UNASSIGNED_DRIVER_ID:
+                continue
+            if (
+                driver_id not in latest
+                or service.current_time > latest[driver_id].current_time
+            ):
+                latest[driver_id] = service
+        if not latest:
+            return
+
+        current = cls.get_many(latest)
+        states = [
+            cls.state_after(service)
+            for driver_id, service in latest.items()
+            if driver_id not in current
+            or service.current_time >= current[driver_id].as_of
+        ]
+        DriverState.objects.bulk_create(
+            states,
+            update_conflicts=True,
+            unique_fields=["driver_id"],
+            update_fields=[
+                "last_trip",
+                "as_of",
+                "cycle_recap",
+                "last_reset_at",
+                "driving_hrs_today",
+                "break_clock_driving",
+                "updated_at",
+            ],
+        )
+        logger.info("Updated the HOS state of {drivers} drivers", drivers=len(states))
@@ -0,0 +1,121 @@
+from dataclasses import dataclass
+from datetime import date, datetime
+
+from apps.trip.constants import DriverStatus
+
+
+@dataclass(slots=True)
+class DayRecord:
+    """In-memory daily log sheet, persisted as an ``ELDLog`` row."""
+
+    date: date
+    total_miles: float = 0.0
+
+
+@dataclass(slots=True)
+class SegmentRecord:
+    """In-memory duty-status segment, persisted as a ``TimeLog`` row."""
+
+    date: date
+    status: str
+    start_time: datetime
+    end_time: datetime
+    location: str = ""
+    remarks: str = ""
+    # Route miles driven when the segment starts, used to place it on the map
+    odometer: float = 0.0
+
+
+# Events counted in a trip's totals, by the remarks of their segments
+EVENT_REMARKS = {
+    "10hr Daily Reset": "daily_resets",
+    "34hr Restart": "restarts",
+    "30min Rest Break": "rest_breaks",
+    "Fueling Stop": "fuel_stops",
+}
+STATUS_HOURS = {
+    DriverStatus.DRIVING: "driving_hours",
+    DriverStatus.ON_DUTY: "on_duty_hours",
+    DriverStatus.OFF_DUTY: "off_duty_hours",
+    DriverStatus.SLEEPER_BERTH: "sleeper_berth_hours",
+}
+
+
+@dataclass(slots=True)
+class TripTotals:
+    """Running aggregates of a trip's segments, persisted as its ``TripSummary``."""
+
+    driving_hours: float = 0.0
+    on_duty_hours: float = 0.0
+    off_duty_hours: float = 0.0
+    sleeper_berth_hours: float = 0.0
+    daily_resets: int = 0
+    restarts: int = 0
+    rest_breaks: int = 0
+    fuel_stops: int = 0
+
+    def add(self, status: str, hours: float, remarks: str, continued: bool) -> None:
+        """
+        Counts a segment. One that `continued` the previous segment past
+        midnight is the same event, so it only adds hours.
+        """
+        field = STATUS_HOURS[status]
+        setattr(self, field, getattr(self, field) + hours)
+        event = EVENT_REMARKS.get(remarks)
+        if event is not None and not continued:
+            setattr(self, event, getattr(self, event) + 1)
+
+
+class CycleRecap:
+    """
+    On-duty hours of the rolling multi-day cycle (70hr/8day by default), kept
+    as a ring buffer of daily totals indexed by day ordinal. Recording hours
+    and reading the window total are O(1): moving to a later day only clears
+    the slots of the days that rolled out of the window, at most `days` of them.
+    """
+
+    __slots__ = ("days", "totals", "today")
+
+    def __init__(self, today: date, days: int) -> None:
+        self.days = days
+        self.totals = [0.0] * days
+        self.today = today.toordinal()
+
+    def _dropped(self, day: int) -> range:
+        """Ordinals whose slots are reused by the time the window ends on `day`"""
+        return range(self.today + 1, min(day, self.today + self.days) + 1)
+
+    def add(self, day: date, hours: float) -> None:
+        ordinal = day.toordinal()
+        if ordinal > self.today:
+            for dropped in self._dropped(ordinal):
+                self.totals[dropped % self.days] = 0.0
+            self.today = ordinal
+        # Days before the window no longer count
+        if ordinal > self.today - self.days:
+            self.totals[ordinal % self.days] += hours
+
+    def used(self, day: date) -> float:
+        """
+        On-duty hours in the window ending on `day` (today or later), counting
+        only the hours recorded so far.
+        """
+        dropped = sum(
+            self.totals[ordinal % self.days]
+            for ordinal in self._dropped(day.toordinal())
+        )
+        return sum(self.totals) - dropped
+
+    def to_state(self) -> list:
+        return [self.today, list(self.totals)]
+
+    @classmethod
+    def from_state(cls, state: list) -> "CycleRecap":
+        today, totals = state
+        recap = cls(date.fromordinal(today), days=len(totals))
+        recap.totals = list(totals)
+        return recap
+
+    def restart(self) -> None:
+        """A 34hr restart: the cycle starts over with no hours used"""
+        self.totals = [0.0] * self.days
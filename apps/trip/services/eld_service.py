@@ -1,17 +1,36 @@
-from datetime import date, timedelta
+import dataclasses
+import math
+import random
+from collections import defaultdict
+from datetime import date, datetime, timedelta
 
+from asgiref.sync import sync_to_async
 from loguru import logger
 
+from django.conf import settings
+from django.db import transaction
 from django.utils import timezone
 
-from apps.trip.constants import DriverStatus
-from apps.trip.models import ELDLog, TimeLog, Trip
+from apps.core.instrumentation import span
+from apps.trip.constants import DriverStatus, GenerationStage
+from apps.trip.models import DriverState, ELDLog, TimeLog, Trip, TripSummary
+from apps.trip.services import segment_codec
+from apps.trip.services.driver_state_service import DriverStateService
+from apps.trip.services.eld_records import (
+    CycleRecap,
+    DayRecord,
+    SegmentRecord,
+    TripTotals,
+)
 from apps.trip.services.geo_service import GeoService
+from apps.trip.services.location_service import LocationService
 
 AVERAGE_SPEED_MPH = 60  # Used for mileage calculations when not provided
-TOTAL_SECONDS_IN_DAY = 24 * 3600
+EPSILON_HOURS = 1e-6  # Durations below this are float noise, not segments
 
 ON_DUTY_CYCLE_LIMIT = 70  # hours in 8-day cycle
+CYCLE_DAYS = 8  # days in the rolling on-duty cycle
+RESTART_HOURS = 34  # off-duty hours that restart the cycle
 ON_DUTY_HOURS_LIMIT = 14  # hours of on-duty allowed in a day
 DRIVING_HOURS_LIMIT = 11  # hours of driving allowed in a day
 DRIVING_BEFORE_BREAK_LIMIT = 8  # hours of driving before a 30 min break
@@ -24,173 +43,650 @@ class EldService:
         self, trip_id: int, on_duty_cycle_limit: int = ON_DUTY_CYCLE_LIMIT
     ) -> None:
         self.trip = Trip.objects.get(id=trip_id)
+        self._start_clocks(
+            on_duty_cycle_limit, DriverStateService.get(self.trip.driver_id)
+        )
+
+    @classmethod
+    def for_trip(
+        cls,
+        trip: Trip,
+        on_duty_cycle_limit: int = ON_DUTY_CYCLE_LIMIT,
+        driver_state: DriverState | None = None,
+    ):
+        """Builds the service around an already loaded trip, without a query"""
+        service = cls.__new__(cls)
+        service.trip = trip
+        service._start_clocks(on_duty_cycle_limit, driver_state)
+        return service
+
+    @property
+    def log(self):
+        """Logger whose records carry the trip id as a field. Not stored on the
+        instance, which has to stay picklable for the batch process pool."""
+        return logger.bind(trip_id=self.trip.id)
+
+    def _start_clocks(
+        self, on_duty_cycle_limit: int, driver_state: DriverState | None = None
+    ) -> None:
+        # A driver still on their previous trip starts this one when it ends
+        self.started_at = self.trip.created_at
+        if driver_state is not None and driver_state.as_of > self.started_at:
+            self.started_at = driver_state.as_of
+            self.log.info(
+                "Trip ID: {trip_id} starts at {started_at}, when the driver's "
+                "previous trip ends",
+                trip_id=self.trip.id,
+                started_at=self.started_at,
+            )
         # Ensure we start at a clean datetime
-        self.current_time = self.trip.created_at
+        self.current_time = self.started_at
 
         # State tracking
         self.distance_remaining = 0
         self.miles_since_fueling = 0
+        self.speed_mph = AVERAGE_SPEED_MPH
+        self.odometer = 0  # route miles driven so far
 
-        # HOS Clocks
+        # HOS Clocks, reset by the 10hr daily reset rather than by midnight
         self.driving_hrs_today = 0  # Max 11
-        self.day_start_time = self.current_time
+        self.day_start_time = self.current_time  # Start of the 14hr window
         self.break_clock_driving = 0  # Max 8 hrs of driving before 30m break
-        self.cycle_hrs_remaining = on_duty_cycle_limit - self.trip.initial_cycle_hours
 
-    def _get_or_create_eld_log(self, log_date: date):
-        log, _ = ELDLog.objects.get_or_create(trip=self.trip, date=log_date)
-        return log
+        # Rolling cycle. The hours the driver had already used are unknown per
+        # day, so they are all put on the day before the trip: the latest they
+        # can be, hence the longest they stay in the window.
+        self.on_duty_cycle_limit = on_duty_cycle_limit
+        self.recap = CycleRecap(self.current_time.date(), days=CYCLE_DAYS)
+        self.recap.add(
+            self.current_time.date() - timedelta(days=1),
+            self.trip.initial_cycle_hours,
+        )
 
-    def _seconds_until_midnight(self, dt: timezone):
-        start_of_day = dt.replace(hour=0, minute=0, second=0, microsecond=0)
-        seconds_passed = (dt - start_of_day).total_seconds()
-        return TOTAL_SECONDS_IN_DAY - seconds_passed
+        # Generated logs, kept in memory until `persist` writes them in bulk
+        self.days: dict[date, DayRecord] = {}
+        self.segments: list[SegmentRecord] = []
+        # Aggregates of all the trip's segments, including any saved before a
+        # checkpoint, for its TripSummary
+        self.totals = TripTotals()
+
+        # Whether the clocks continue from the driver's previous trip, and
+        # from which state, kept in the checkpoint to replay the trip later
+        self.continued = False
+        self.start_state = DriverStateService.to_checkpoint(driver_state)
+        if driver_state is not None:
+            self._continue_from(driver_state)
+
+    def _continue_from(self, driver_state: DriverState) -> None:
+        """
+        Starts from where the driver's previous trip left the clocks, aged
+        by the off-duty time since (none if this trip starts right after it).
+        `initial_cycle_hours` only counts if it is higher than what the
+        driver's logs add up to.
+        """
+        reported = self.trip.initial_cycle_hours
+        self.recap = CycleRecap.from_state(driver_state.cycle_recap)
+        off_duty_hours = (self.current_time - driver_state.as_of).total_seconds() / 3600
+
+        if off_duty_hours >= RESTART_HOURS:
+            self.recap.restart()
+        elif off_duty_hours < DAILY_RESET_HOURS:
+            self.driving_hrs_today = driver_state.driving_hrs_today
+            self.day_start_time = driver_state.last_reset_at
+            if off_duty_hours < 0.5:
+                self.break_clock_driving = driver_state.break_clock_driving
+
+        used = self.recap.used(self.current_time.date())
+        if reported > used:
+            self.recap.add(
+                self.current_time.date() - timedelta(days=1), reported - used
+            )
+        self.trip.initial_cycle_hours = max(reported, used)
+        self.continued = True
 
-    def _create_record(self, status, hours, location, remarks):
-        log_date = self.current_time.date()
-        eld_log = self._get_or_create_eld_log(log_date)
+    @property
+    def cycle_hrs_remaining(self) -> float:
+        return self.on_duty_cycle_limit - self.recap.used(self.current_time.date())
+
+    def _get_or_create_day(self, log_date: date):
+        day = self.days.get(log_date)
+        if day is None:
+            day = self.days[log_date] = DayRecord(date=log_date)
+        return day
+
+    @staticmethod
+    def _next_midnight(dt: datetime) -> datetime:
+        start_of_day = dt.replace(hour=0, minute=0, second=0, microsecond=0)
+        return start_of_day + timedelta(days=1)
 
-        end_time = self.current_time + timedelta(hours=hours)
+    def _hours_on_shift(self) -> float:
+        return (self.current_time - self.day_start_time).total_seconds() / 3600
 
-        TimeLog.objects.create(
-            eld_log=eld_log,
-            status=status,
-            start_time=self.current_time,
-            end_time=end_time,
-            location_text=location,
-            remarks=remarks,
+    def _create_record(self, status, end_time, location, remarks):
+        log_date = self.current_time.date()
+        day = self._get_or_create_day(log_date)
+        hours = (end_time - self.current_time).total_seconds() / 3600
+
+        previous = self.segments[-1] if self.segments else None
+        self.totals.add(
+            status,
+            hours,
+            remarks,
+            continued=previous is not None
+            and previous.end_time == self.current_time
+            and previous.status == status
+            and previous.remarks == remarks,
+        )
+        self.segments.append(
+            SegmentRecord(
+                date=log_date,
+                status=status,
+                start_time=self.current_time,
+                end_time=end_time,
+                location=location,
+                remarks=remarks,
+                odometer=self.odometer,
+            )
         )
 
         # Track miles per daily log sheet
         if status == DriverStatus.DRIVING:
-            # We assume a standard speed for mileage calculation if not provided
-            miles = hours * 60
-            eld_log.total_miles = (eld_log.total_miles or 0) + miles
-            eld_log.save()
+            day.total_miles += hours * self.speed_mph
+            self.odometer += hours * self.speed_mph
             self.driving_hrs_today += hours
             self.break_clock_driving += hours
 
-        # Cycle tracking (On-Duty and Driving reduce the 70hr/8day bucket)
+        # Cycle tracking (On-Duty and Driving count towards the 70hr/8day cycle)
         if status in [DriverStatus.DRIVING, DriverStatus.ON_DUTY]:
-            self.cycle_hrs_remaining -= hours
+            self.recap.add(log_date, hours)
 
         self.current_time = end_time
 
     def add_log_entry(self, status, duration_hours, location="", remarks=""):
-        """Recursively handles splits across one or more midnights."""
-        if duration_hours <= 0:
+        """Adds an entry, split into one record per calendar day it spans."""
+        if duration_hours <= EPSILON_HOURS:
             return
 
-        seconds_until_midnight = self._seconds_until_midnight(self.current_time)
-        hours_until_midnight = seconds_until_midnight / 3600
+        end_time = self.current_time + timedelta(hours=duration_hours)
+        while self.current_time < end_time:
+            record_end = min(end_time, self._next_midnight(self.current_time))
+            self._create_record(status, record_end, location, remarks)
 
-        if duration_hours > hours_until_midnight:
-            # Fill the rest of today
-            self._create_record(status, hours_until_midnight, location, remarks)
+    def _take_break(self):
+        self.add_log_entry(DriverStatus.OFF_DUTY, 0.5, remarks="30min Rest Break")
+        self.break_clock_driving = 0
 
-            # Reset daily clocks for the brand new day
-            self.driving_hrs_today = 0
-            self.day_start_time = self.current_time  # Now 00:00 of the new day
-            self.break_clock_driving = (
-                0  # Breaks are reset by 10hr sleep, but logic handles it
-            )
+    def _take_fuel_stop(self):
+        self.add_log_entry(DriverStatus.ON_DUTY, 0.5, remarks="Fueling Stop")
+        self.miles_since_fueling = 0
+
+    def _take_daily_reset(self):
+        self.add_log_entry(
+            DriverStatus.SLEEPER_BERTH, DAILY_RESET_HOURS, remarks="10hr Daily Reset"
+        )
+        self.driving_hrs_today = 0
+        self.break_clock_driving = 0
+        self.day_start_time = self.current_time
+
+    def _take_restart(self):
+        self.add_log_entry(DriverStatus.OFF_DUTY, RESTART_HOURS, remarks="34hr Restart")
+        self.recap.restart()
+        self.driving_hrs_today = 0
+        self.break_clock_driving = 0
+        self.day_start_time = self.current_time
+
+    def _rest(self, hours_left):
+        """
+        Off-duty time between two shifts. Normally the 10hr reset; if the cycle
+        has no hours for the next shift by then, the reset is extended until
+        enough hours roll out of the window, unless a 34hr restart frees them
+        sooner.
+        """
+        needed = min(hours_left, DRIVING_HOURS_LIMIT)
+        restart_end = self.current_time + timedelta(hours=RESTART_HOURS)
+
+        # Hours only roll out of the window at midnight, so after the reset
+        # those are the only moments worth checking
+        ready = self.current_time + timedelta(hours=DAILY_RESET_HOURS)
+        while ready < restart_end:
+            available = self.on_duty_cycle_limit - self.recap.used(ready.date())
+            if available >= needed - EPSILON_HOURS:
+                break
+            ready = self._next_midnight(ready)
+
+        if ready >= restart_end:
+            self._take_restart()
+            return
 
-            # Recurse for the remaining time (handles multi-day rests)
+        self._take_daily_reset()
+        wait = (ready - self.current_time).total_seconds() / 3600
+        if wait > EPSILON_HOURS:
             self.add_log_entry(
-                status, duration_hours - hours_until_midnight, location, remarks
+                DriverStatus.OFF_DUTY, wait, remarks="Waiting for Cycle Hours"
             )
-        else:
-            self._create_record(status, duration_hours, location, remarks)
+            self.day_start_time = self.current_time
+
+    def _plan_shift_stops(self, drive_hours, avg_speed):
+        """
+        Returns the driving offsets (hours from now) at which the current shift
+        is interrupted by a break or a fuel stop, in order. Both are arithmetic
+        progressions of the clocks, so no stepping is needed to find them.
+        """
+        fuel_interval = FUEL_MILEAGE_LIMIT / avg_speed
+        first_fuel = fuel_interval - self.miles_since_fueling / avg_speed
+        first_break = DRIVING_BEFORE_BREAK_LIMIT - self.break_clock_driving
+
+        stops = []
+        if first_fuel <= drive_hours:
+            count = int((drive_hours - first_fuel) // fuel_interval) + 1
+            stops += [
+                (first_fuel + k * fuel_interval, self._take_fuel_stop)
+                for k in range(count)
+            ]
+        # A break only matters if there is driving left after it
+        if first_break < drive_hours:
+            count = math.ceil((drive_hours - first_break) / DRIVING_BEFORE_BREAK_LIMIT)
+            stops += [
+                (first_break + k * DRIVING_BEFORE_BREAK_LIMIT, self._take_break)
+                for k in range(count)
+            ]
+        return sorted(stops, key=lambda stop: stop[0])
+
+    def _drive_shift(self, hours_left, avg_speed):
+        """
+        Emits the driving and stops of the current duty shift, i.e. until the
+        destination or the 11hr driving / 14hr window / cycle limit is reached.
+        Returns the driving hours still left after the shift.
+        """
+        # Conservative: hours rolling out of the cycle at a midnight during
+        # the shift are only used from the next shift on
+        cycle_left = max(self.cycle_hrs_remaining, 0)
+        drive_hours = min(
+            hours_left, DRIVING_HOURS_LIMIT - self.driving_hrs_today, cycle_left
+        )
+        window_left = ON_DUTY_HOURS_LIMIT - self._hours_on_shift()
+
+        driven = 0
+        for offset, take_stop in self._plan_shift_stops(drive_hours, avg_speed) + [
+            (drive_hours, None)
+        ]:
+            stint = min(offset - driven, window_left, cycle_left)
+            if stint > 0:
+                self.add_log_entry(DriverStatus.DRIVING, stint)
+                self.miles_since_fueling += stint * avg_speed
+                driven += stint
+                window_left -= stint
+                cycle_left -= stint
+            if take_stop is None or offset - driven > EPSILON_HOURS:
+                # Reached the shift's driving limit or ran out of window / cycle
+                break
+            take_stop()
+            window_left -= 0.5
+            if take_stop == self._take_fuel_stop:
+                cycle_left -= 0.5
+
+        return hours_left - driven
 
     def simulate_driving(self, total_distance, avg_speed=AVERAGE_SPEED_MPH):
-        logger.info(
-            f"Simulating driving for Trip ID: {self.trip.id} - Total Distance: {total_distance} miles at Avg Speed: {avg_speed} mph"
+        self.log.debug(
+            "Simulating driving: {miles} miles at {speed_mph} mph",
+            miles=total_distance,
+            speed_mph=avg_speed,
         )
-        self.distance_remaining = total_distance
+        self.speed_mph = avg_speed
+        hours_left = total_distance / avg_speed
 
-        while self.distance_remaining > 0:
-            # 1. Determine constraints
-            logger.info(
-                f"Current Time: {self.current_time}, Distance Remaining: {self.distance_remaining} miles, Driving Hrs Today: {self.driving_hrs_today}, Break Clock: {self.break_clock_driving}, Cycle Hrs Remaining: {self.cycle_hrs_remaining}"
-            )
-            drive_left = DRIVING_HOURS_LIMIT - self.driving_hrs_today
+        while hours_left > EPSILON_HOURS:
+            hours_left = self._drive_shift(hours_left, avg_speed)
+            if hours_left > EPSILON_HOURS:
+                self._rest(hours_left)
 
-            # 14-hour window is: 14 - (time elapsed since day started)
-            elapsed_today = (
-                self.current_time - self.day_start_time
-            ).total_seconds() / 3600
-            window_left = max(0, ON_DUTY_HOURS_LIMIT - elapsed_today)
+        self.distance_remaining = 0
 
-            break_left = DRIVING_BEFORE_BREAK_LIMIT - self.break_clock_driving
-            fuel_left = (FUEL_MILEAGE_LIMIT - self.miles_since_fueling) / avg_speed
+    def replay(self, segments: list[SegmentRecord]) -> None:
+        """
+        Re-records already logged segments (in order, split per day, from the
+        trip's start) and rebuilds the clocks they leave behind, so the
+        simulation can carry on from their end. Rest periods are recognised by
+        their length, as the simulation would have taken them.
+        """
+        if segments:
+            self.started_at = segments[0].start_time
+        off_duty_hours = 0.0
+        for segment in segments:
+            self.current_time = segment.start_time
+            self.speed_mph = AVERAGE_SPEED_MPH
+            hours = (segment.end_time - segment.start_time).total_seconds() / 3600
+            self._create_record(
+                segment.status, segment.end_time, segment.location, segment.remarks
+            )
 
-            # How much can we drive before we hit ANY limit?
-            can_drive_hours = min(drive_left, window_left, fuel_left, break_left)
+            if segment.status == DriverStatus.DRIVING:
+                self.miles_since_fueling += hours * AVERAGE_SPEED_MPH
+            elif segment.remarks == "Fueling Stop":
+                self.miles_since_fueling = 0
 
-            if can_drive_hours <= 0:
-                if break_left <= 0:
-                    # After 8 hours of driving, need 30 min break
-                    self.add_log_entry(
-                        DriverStatus.OFF_DUTY, 0.5, remarks="30min Rest Break"
-                    )
-                    self.break_clock_driving = 0
-                else:
-                    # Hit 11hr drive limit or 14hr window: Must take 10hr reset
-                    self.add_log_entry(
-                        DriverStatus.SLEEPER_BERTH,
-                        DAILY_RESET_HOURS,
-                        remarks="10hr Daily Reset",
-                    )
+            if segment.status in [DriverStatus.DRIVING, DriverStatus.ON_DUTY]:
+                off_duty_hours = 0.0
                 continue
 
-            # 2. Drive
-            hours_to_reach_dest = self.distance_remaining / avg_speed
-            actual_drive_hours = min(can_drive_hours, hours_to_reach_dest)
+            off_duty_hours += hours
+            if off_duty_hours >= RESTART_HOURS - EPSILON_HOURS:
+                self.recap.restart()
+            if off_duty_hours >= DAILY_RESET_HOURS - EPSILON_HOURS:
+                self.driving_hrs_today = 0
+                self.day_start_time = self.current_time
+            if off_duty_hours >= 0.5 - EPSILON_HOURS:
+                self.break_clock_driving = 0
+
+        self.log.info(
+            "Replayed {segments} segments of Trip ID: {trip_id} up to {until}: "
+            "{driving_hrs_today:.2f} driving hrs today, {break_clock_driving:.2f} "
+            "since the last break, {cycle_hrs_remaining:.2f} cycle hrs left, "
+            "{miles_since_fueling:.0f} miles since fueling",
+            segments=len(segments),
+            trip_id=self.trip.id,
+            until=self.current_time,
+            driving_hrs_today=self.driving_hrs_today,
+            break_clock_driving=self.break_clock_driving,
+            cycle_hrs_remaining=self.cycle_hrs_remaining,
+            miles_since_fueling=self.miles_since_fueling,
+        )
 
-            distance_covered = actual_drive_hours * avg_speed
-            self.add_log_entry(DriverStatus.DRIVING, actual_drive_hours)
+    def generate_trip(self, route_data):
+        self.simulate_trip(route_data)
+        self.persist()
+
+    def simulate_trip(self, route_data):
+        """Generates the trip's logs in memory, without touching the database"""
+        # Only rendered if DEBUG is enabled
+        self.log.opt(lazy=True).debug(
+            "Generating trip logs with route data: {route_data}",
+            route_data=lambda: route_data,
+        )
 
-            self.distance_remaining -= distance_covered
-            self.miles_since_fueling += distance_covered
+        self._pre_trip()
+        self.simulate_legs(
+            route_data["to_pickup_miles"], route_data["to_drop_off_miles"]
+        )
 
-            # 3. Handle specific triggers
-            if self.miles_since_fueling >= FUEL_MILEAGE_LIMIT:
-                self.add_log_entry(DriverStatus.ON_DUTY, 0.5, remarks="Fueling Stop")
-                self.miles_since_fueling = 0
+    def simulate_legs(self, to_pickup_miles, to_drop_off_miles, loaded=False):
+        """
+        Everything after the pre-trip inspection. An amended trip resumes here
+        from its replayed clocks, with the miles left to the pickup, or with
+        the freight already loaded.
+        """
+        if not loaded:
+            self._to_pickup(to_pickup_miles)
+        self._to_drop_off(to_drop_off_miles)
+        self._log_summary()
+
+    def _pre_trip(self):
+        with span("eld.pre_trip"):
+            self.log.debug("Adding pre-trip inspection log")
+            self.add_log_entry(
+                DriverStatus.ON_DUTY, 0.25, remarks="Pre-trip Inspection"
+            )
 
-    def generate_trip(self, route_data):
-        logger.info(
-            f"Generating trip logs for Trip ID: {self.trip.id} with route data: {route_data}"
-        )
+    def _to_pickup(self, miles):
+        with span("eld.drive_to_pickup"):
+            self.log.debug("Simulating drive to pickup location")
+            self.simulate_driving(miles)
+
+        with span("eld.loading"):
+            self.log.debug("Adding loading log")
+            self.add_log_entry(DriverStatus.ON_DUTY, 1.0, remarks="Loading Freight")
 
-        logger.info(f"Adding pre-trip inspection log for Trip ID: {self.trip.id}")
-        self.add_log_entry(DriverStatus.ON_DUTY, 0.25, remarks="Pre-trip Inspection")
+    def _to_drop_off(self, miles):
+        with span("eld.drive_to_drop_off"):
+            self.log.debug("Simulating drive to drop_off location")
+            self.simulate_driving(miles)
 
-        logger.info(f"Simulating drive to pickup location for Trip ID: {self.trip.id}")
-        self.simulate_driving(route_data["to_pickup_miles"])
+        with span("eld.unloading"):
+            self.log.debug("Adding unloading log")
+            self.add_log_entry(DriverStatus.ON_DUTY, 1.0, remarks="Unloading Freight")
 
-        logger.info(f"Adding loading log for Trip ID: {self.trip.id}")
-        self.add_log_entry(DriverStatus.ON_DUTY, 1.0, remarks="Loading Freight")
+        with span("eld.post_trip"):
+            self.log.debug("Adding post-trip inspection log")
+            self.add_log_entry(
+                DriverStatus.ON_DUTY, 0.25, remarks="Post-trip Inspection"
+            )
 
-        logger.info(
-            f"Simulating drive to drop_off location for Trip ID: {self.trip.id}"
+    def _log_summary(self):
+        """One INFO line per simulated trip, for a sampled share of trips"""
+        if random.random() >= settings.TRIP_LOG_SAMPLE_RATE:
+            return
+        self.log.info(
+            "Simulated Trip ID: {trip_id} - {miles:.1f} miles, {segments} segments "
+            "over {days} days, {cycle_hrs_remaining:.2f} cycle hours left",
+            trip_id=self.trip.id,
+            miles=self.odometer,
+            segments=len(self.segments),
+            days=len(self.days),
+            cycle_hrs_remaining=self.cycle_hrs_remaining,
         )
-        self.simulate_driving(route_data["to_drop_off_miles"])
 
-        logger.info(f"Adding unloading log for Trip ID: {self.trip.id}")
-        self.add_log_entry(DriverStatus.ON_DUTY, 1.0, remarks="Unloading Freight")
+    def persist(self, since: date | None = None):
+        with span("eld.persist"):
+            self.persist_many([self], since=since)
+
+    @classmethod
+    @transaction.atomic
+    def persist_many(cls, services: list["EldService"], since: date | None = None):
+        """
+        Writes the generated days and segments of any number of trips with one
+        bulk insert per model. In packed storage mode, each day's segments go
+        into its ELDLog row and no TimeLog rows are written. With `since`, only
+        the days from that date on are written. Each trip's `TripSummary` is
+        rewritten as of its last segment, and its `updated_at` is bumped,
+        which changes its version for HTTP caching.
+        """
+        logger.info("Persisting generated logs for {trips} trips", trips=len(services))
+        packed = settings.ELD_SEGMENT_STORAGE == "packed"
+        Trip.objects.filter(id__in=[service.trip.id for service in services]).update(
+            updated_at=timezone.now()
+        )
+        TripSummary.objects.bulk_create(
+            [service.summary() for service in services],
+            update_conflicts=True,
+            unique_fields=["trip"],
+            update_fields=[
+                field.name
+                for field in TripSummary._meta.concrete_fields
+                if field.name not in ("id", "trip", "created_at")
+            ],
+        )
 
-        logger.info(f"Adding post-trip inspection log for Trip ID: {self.trip.id}")
-        self.add_log_entry(DriverStatus.ON_DUTY, 0.25, remarks="Post-trip Inspection")
+        segments_by_day = defaultdict(list)
+        for service in services:
+            for segment in service.segments:
+                if since is None or segment.date >= since:
+                    segments_by_day[(service.trip.id, segment.date)].append(segment)
+
+        eld_logs = ELDLog.objects.bulk_create(
+            ELDLog(
+                trip=service.trip,
+                date=day.date,
+                total_miles=day.total_miles,
+                packed_segments=(
+                    segment_codec.encode(
+                        day.date, segments_by_day[(service.trip.id, day.date)]
+                    )
+                    if packed
+                    else None
+                ),
+            )
+            for service in services
+            for day in service.days.values()
+            if since is None or day.date >= since
+        )
+        if packed:
+            return
+
+        eld_logs_by_day = {(log.trip.id, log.date): log for log in eld_logs}
+        TimeLog.objects.bulk_create(
+            TimeLog(
+                eld_log=eld_logs_by_day[day],
+                status=segment.status,
+                start_time=segment.start_time,
+                end_time=segment.end_time,
+                location_text=segment.location,
+                remarks=segment.remarks,
+            )
+            for day, segments in segments_by_day.items()
+            for segment in segments
+        )
+
+    def summary(self) -> TripSummary:
+        """The trip's aggregates so far, as of its last segment"""
+        started_at = self.started_at
+        # Sheets run from the trip's first day to its last, without gaps
+        last_day = max(self.days, default=started_at.date())
+        return TripSummary(
+            trip=self.trip,
+            driver_id=self.trip.driver_id,
+            vehicle_id=self.trip.vehicle_id,
+            started_at=started_at,
+            ended_at=self.current_time,
+            days=(last_day - started_at.date()).days + 1,
+            total_miles=self.odometer,
+            **dataclasses.asdict(self.totals),
+        )
 
-    def generate_full_trip(self):
-        logger.info(f"Generating full trip for Trip ID: {self.trip.id}")
-        route_data = GeoService.get_route_data(
-            self.trip.start_address,
-            self.trip.pickup_address,
-            self.trip.drop_off_address,
+    def checkpoint(self, stage: GenerationStage) -> dict:
+        """The clock state after `stage`, as stored in `Trip.checkpoint`"""
+        return {
+            "stage": stage,
+            "started_at": self.started_at.isoformat(),
+            "current_time": self.current_time.isoformat(),
+            "day_start_time": self.day_start_time.isoformat(),
+            "driving_hrs_today": self.driving_hrs_today,
+            "break_clock_driving": self.break_clock_driving,
+            "miles_since_fueling": self.miles_since_fueling,
+            "odometer": self.odometer,
+            "on_duty_cycle_limit": self.on_duty_cycle_limit,
+            "recap": self.recap.to_state(),
+            "totals": dataclasses.asdict(self.totals),
+            "driver_state": self.start_state,
+        }
+
+    def _restore(self, checkpoint: dict) -> None:
+        """
+        Resumes from a checkpoint. Days before the checkpoint's are saved for
+        good; the last one is loaded back, as it is rewritten with whatever
+        the rest of the trip adds to it.
+        """
+        if "started_at" in checkpoint:
+            self.started_at = datetime.fromisoformat(checkpoint["started_at"])
+        self.current_time = datetime.fromisoformat(checkpoint["current_time"])
+        self.day_start_time = datetime.fromisoformat(checkpoint["day_start_time"])
+        self.driving_hrs_today = checkpoint["driving_hrs_today"]
+        self.break_clock_driving = checkpoint["break_clock_driving"]
+        self.miles_since_fueling = checkpoint["miles_since_fueling"]
+        self.odometer = checkpoint["odometer"]
+        self.on_duty_cycle_limit = checkpoint["on_duty_cycle_limit"]
+        self.recap = CycleRecap.from_state(checkpoint["recap"])
+        self.totals = TripTotals(**checkpoint.get("totals", {}))
+        self.start_state = checkpoint.get("driver_state")
+
+        eld_log = (
+            self.trip.daily_logs.filter(date=self.current_time.date())
+            .prefetch_related("status_changes")
+            .first()
         )
-        self.trip.route_geometry = route_data["geometry"]
-        self.trip.metrics = route_data["metrics"]
-        self.trip.save(update_fields=["route_geometry", "metrics", "updated_at"])
-        self.generate_trip(route_data["metrics"])
+        if eld_log is not None:
+            day = self._get_or_create_day(eld_log.date)
+            day.total_miles = eld_log.total_miles
+            self.segments = segment_codec.load_segments(eld_log)
+
+    def _save_stage(self, stage: GenerationStage, since: date | None) -> date:
+        """
+        Labels and writes the segments generated since the last saved stage,
+        together with the checkpoint to resume from. Returns the date the next
+        stage has to rewrite from.
+        """
+        with span("trip.labelling"):
+            LocationService.label_segments([self])
+        self.trip.checkpoint = self.checkpoint(stage)
+        with transaction.atomic():
+            if since is not None:
+                ELDLog.objects.filter(trip=self.trip, date__gte=since).delete()
+            self.persist(since=since)
+            self.trip.save(update_fields=["checkpoint", "updated_at"])
+            if stage == GenerationStage.DONE:
+                DriverStateService.record([self])
+        return self.current_time.date()
+
+    def generate_full_trip(self, route_data: dict | None = None):
+        """
+        Routes, simulates and saves the trip in stages, each saved with a
+        checkpoint. Called again after an interruption (e.g. for a retried
+        job), it carries on after the last saved stage. `route_data` skips
+        the routing call, for a caller that already routed the trip.
+        """
+        checkpoint = self.trip.checkpoint
+        stage = checkpoint["stage"] if checkpoint else None
+        if stage == GenerationStage.DONE:
+            self.log.info("Trip ID: {trip_id} already generated", trip_id=self.trip.id)
+            return
+
+        since = None
+        if stage is None:
+            self.log.info(
+                "Generating full trip for Trip ID: {trip_id}", trip_id=self.trip.id
+            )
+            if route_data is None:
+                with span("trip.routing"):
+                    route_data = GeoService.get_route_data(
+                        self.trip.start_address,
+                        self.trip.pickup_address,
+                        self.trip.drop_off_address,
+                    )
+            self.trip.route_geometry = route_data["geometry"]
+            self.trip.geometry_levels = None
+            self.trip.metrics = route_data["metrics"]
+            self.trip.checkpoint = self.checkpoint(GenerationStage.ROUTED)
+            self.trip.save(
+                update_fields=[
+                    "initial_cycle_hours",
+                    "route_geometry",
+                    "geometry_levels",
+                    "metrics",
+                    "checkpoint",
+                    "updated_at",
+                ]
+            )
+        else:
+            self.log.info(
+                "Resuming Trip ID: {trip_id} after stage {stage}",
+                trip_id=self.trip.id,
+                stage=stage,
+            )
+            self._restore(checkpoint)
+            since = self.current_time.date()
+
+        metrics = self.trip.metrics
+        if stage in (None, GenerationStage.ROUTED):
+            self._pre_trip()
+            self._to_pickup(metrics["to_pickup_miles"])
+            since = self._save_stage(GenerationStage.LOADED, since)
+
+        self._to_drop_off(metrics["to_drop_off_miles"])
+        self._log_summary()
+        self._save_stage(GenerationStage.DONE, since)
+
+    async def agenerate_full_trip(self):
+        """
+        `generate_full_trip` for async views: the routing call is awaited
+        without holding a thread, then the simulation and the writes run in
+        one.
+        """
+        route_data = None
+        if self.trip.checkpoint is None:
+            with span("trip.routing"):
+                route_data = await GeoService.aget_route_data(
+                    self.trip.start_address,
+                    self.trip.pickup_address,
+                    self.trip.drop_off_address,
+                )
+        await sync_to_async(self.generate_full_trip)(route_data)
@@ -0,0 +1,168 @@
+import csv
+import json
+from collections.abc import AsyncIterator, Iterator
+from html import escape
+from itertools import islice
+
+from asgiref.sync import sync_to_async
+from loguru import logger
+
+from apps.trip.models import ELDLog
+from apps.trip.services import log_sheet, segment_codec
+
+# Daily logs fetched per round trip; each chunk also prefetches its TimeLogs
+CHUNK_SIZE = 500
+# Lines built per trip to the sync thread when streaming over ASGI
+ASYNC_BATCH_LINES = 200
+
+CSV_HEADER = [
+    "driver_id",
+    "vehicle_id",
+    "trip_id",
+    "date",
+    "status",
+    "start_time",
+    "end_time",
+    "duration_hours",
+    "location",
+    "remarks",
+]
+
+
+class _Echo:
+    """File-like object whose `write` hands back the line csv.writer built"""
+
+    def write(self, value: str) -> str:
+        return value
+
+
+class ExportService:
+    """
+    Streams daily logs out as CSV (one row per segment), NDJSON (one object
+    per day) or printable HTML log sheets. Logs are read through a
+    server-side cursor in chunks, so memory use does not grow with the size
+    of the export.
+    """
+
+    @staticmethod
+    async def astream(lines: Iterator[str]) -> AsyncIterator[str]:
+        """
+        Any of the line iterators, for a response served over ASGI: Django
+        would read a sync iterator whole before sending any of it. Lines are
+        built a batch at a time in the request's sync thread, which holds the
+        cursor, and sent as they come.
+        """
+        next_batch = sync_to_async(lambda: list(islice(lines, ASYNC_BATCH_LINES)))
+        try:
+            while batch := await next_batch():
+                yield "".join(batch)
+        finally:
+            await sync_to_async(lines.close)()
+
+    @staticmethod
+    def daily_logs(driver_id=None, vehicle_id=None, date_from=None, date_to=None):
+        queryset = ELDLog.objects.select_related("trip").only(
+            "id",
+            "date",
+            "total_miles",
+            "packed_segments",
+            "trip__id",
+            "trip__driver_id",
+            "trip__vehicle_id",
+        )
+        if driver_id:
+            queryset = queryset.filter(trip__driver_id=driver_id)
+        if vehicle_id:
+            queryset = queryset.filter(trip__vehicle_id=vehicle_id)
+        if date_from:
+            queryset = queryset.filter(date__gte=date_from)
+        if date_to:
+            queryset = queryset.filter(date__lte=date_to)
+        # (trip, date) is the unique index, so no sort is needed
+        return queryset.order_by("trip_id", "date")
+
+    @classmethod
+    def _days(cls, queryset) -> Iterator[tuple[ELDLog, list]]:
+        count = 0
+        for eld_log in queryset.prefetch_related("status_changes").iterator(
+            chunk_size=CHUNK_SIZE
+        ):
+            count += 1
+            yield eld_log, segment_codec.load_segments(eld_log)
+        logger.info("Exported {count} daily logs", count=count)
+
+    @classmethod
+    def csv_lines(cls, queryset) -> Iterator[str]:
+        writer = csv.writer(_Echo())
+        yield writer.writerow(CSV_HEADER)
+        for eld_log, segments in cls._days(queryset):
+            trip = eld_log.trip
+            for segment in segments:
+                yield writer.writerow(
+                    [
+                        trip.driver_id,
+                        trip.vehicle_id,
+                        trip.id,
+                        eld_log.date.isoformat(),
+                        segment.status,
+                        segment.start_time.isoformat(),
+                        segment.end_time.isoformat(),
+                        round(
+                            (segment.end_time - segment.start_time).total_seconds()
+                            / 3600,
+                            4,
+                        ),
+                        segment.location,
+                        segment.remarks,
+                    ]
+                )
+
+    @classmethod
+    def ndjson_lines(cls, queryset) -> Iterator[str]:
+        for eld_log, segments in cls._days(queryset):
+            trip = eld_log.trip
+            day = {
+                "driver_id": trip.driver_id,
+                "vehicle_id": trip.vehicle_id,
+                "trip_id": trip.id,
+                "date": eld_log.date.isoformat(),
+                "total_miles": round(eld_log.total_miles, 2),
+                "status_changes": [
+                    {
+                        "status": segment.status,
+                        "start_time": segment.start_time.isoformat(),
+                        "end_time": segment.end_time.isoformat(),
+                        "location_text": segment.location,
+                        "remarks": segment.remarks,
+                    }
+                    for segment in segments
+                ],
+            }
+            yield json.dumps(day) + "\n"
+
+    @classmethod
+    def sheet_lines(cls, queryset) -> Iterator[str]:
+        """An HTML document with one log sheet per day, ready to print"""
+        yield (
+            "<!DOCTYPE html><html><head><meta charset='utf-8'><title>Daily logs</title>"
+            "<style>body{font-family:sans-serif}section{break-after:page;"
+            "margin-bottom:2em}td{padding:0 1em 0 0}</style></head><body>"
+        )
+        for eld_log, segments in cls._days(queryset):
+            trip = eld_log.trip
+            remarks = "".join(
+                f"<tr><td>{segment.start_time:%H:%M}</td>"
+                f"<td>{escape(segment.location)}</td>"
+                f"<td>{escape(segment.remarks)}</td></tr>"
+                for segment in segments
+                if segment.remarks
+            )
+            yield (
+                f"<section><h2>{eld_log.date.isoformat()}</h2>"
+                f"<p>Driver {escape(trip.driver_id)} &middot; Vehicle "
+                f"{escape(trip.vehicle_id)} &middot; Trip {trip.id} &middot; "
+                f"{eld_log.total_miles:.1f} miles</p>"
+                f"{log_sheet.render_svg(eld_log.date, segments)}"
+                f"<table>{remarks}</table></section>"
+            )
+        yield "</body></html>"
@@ -1,47 +1,238 @@
-from googlemaps import Client as GoogleMapsClient
+import asyncio
+import contextvars
+from concurrent.futures import Future, ThreadPoolExecutor
+
+from asgiref.sync import sync_to_async
 from loguru import logger
 
 from django.conf import settings
 
+from apps.core.instrumentation import span
+from apps.trip.services.lane_matrix import LaneMatrix
+from apps.trip.services.route_cache import RouteCache
+from apps.trip.services.routing import RoutingProvider, get_provider
+
 METERS_TO_MILES = 0.000621371
 SECONDS_TO_HOURS = 1 / 3600
 
 
 class GeoService:
-    client: GoogleMapsClient = GoogleMapsClient(key=settings.GOOGLE_MAPS_API_KEY)
+    provider: RoutingProvider = get_provider()
+    # Namespaced by provider, so switching backends never serves stale legs
+    cache: RouteCache = RouteCache(
+        ttl=settings.ROUTE_CACHE_TTL_SECONDS,
+        max_entries=settings.ROUTE_CACHE_MAX_ENTRIES,
+        namespace=provider.name,
+    )
+    geocode_cache: RouteCache = RouteCache(
+        ttl=settings.ROUTE_CACHE_TTL_SECONDS,
+        max_entries=settings.ROUTE_CACHE_MAX_ENTRIES,
+        namespace=f"{provider.name}:geocode",
+    )
+    lanes: LaneMatrix = LaneMatrix(reload_seconds=settings.LANE_MATRIX_RELOAD_SECONDS)
+    # Shared by all requests, so it also bounds concurrent calls per process
+    executor: ThreadPoolExecutor = ThreadPoolExecutor(
+        max_workers=settings.ROUTE_FETCH_MAX_WORKERS, thread_name_prefix="route-leg"
+    )
+
+    @classmethod
+    def _submit(cls, name: str, fn, *args) -> Future:
+        """Runs `fn` in the pool, timed as span `name` of the calling request"""
+
+        def call():
+            with span(name):
+                return fn(*args)
+
+        return cls.executor.submit(contextvars.copy_context().run, call)
+
+    @classmethod
+    def _lanes(cls, pairs: list[tuple[str, str]]) -> dict[str, tuple[str, str]]:
+        """The distinct lanes of the pairs, by cache key"""
+        lanes: dict[str, tuple[str, str]] = {}
+        for pair in pairs:
+            lanes.setdefault(cls.cache.make_key(*pair), pair)
+        return lanes
+
+    @classmethod
+    def _known_legs(cls, lanes: dict[str, tuple[str, str]]) -> dict:
+        """Hub lanes and cached legs by key; `None` for the legs to fetch"""
+        legs = cls.lanes.get_legs(lanes)
+        from_hubs = len(legs)
+        unknown = [key for key in lanes if key not in legs]
+        cached = cls.cache.get_many([lanes[key] for key in unknown])
+        legs.update(zip(unknown, cached, strict=True))
+        missing = sum(leg is None for leg in legs.values())
+        logger.info(
+            "Route legs: {from_hubs} from hub lanes, {cached} cached, {missing} to fetch",
+            from_hubs=from_hubs,
+            cached=len(lanes) - from_hubs - missing,
+            missing=missing,
+        )
+        return legs
+
+    @classmethod
+    def _fetch_legs(cls, pairs: list[tuple[str, str]]):
+        """
+        Returns the leg for each (origin, destination) pair, `None` for any
+        that failed. Pairs naming the same lane are resolved once; hub lanes
+        and cached legs are served directly and the rest are fetched
+        concurrently.
+        """
+        lanes = cls._lanes(pairs)
+        legs = cls._known_legs(lanes)
+        missing = [key for key, leg in legs.items() if leg is None]
+
+        # Only the network call runs in the pool; cache (DB) access stays on
+        # the request thread and its connection
+        futures = {
+            key: cls._submit("geo.route", cls.provider.route, *lanes[key])
+            for key in missing
+        }
+        for key, future in futures.items():
+            legs[key] = future.result()
+        cls.cache.set_many(
+            [(*lanes[key], legs[key]) for key in missing if legs[key] is not None]
+        )
+
+        return [legs[cls.cache.make_key(*pair)] for pair in pairs]
+
+    @classmethod
+    async def _aroute(cls, origin: str, destination: str):
+        with span("geo.route"):
+            return await cls.provider.aroute(origin, destination)
+
+    @classmethod
+    async def _afetch_legs(cls, pairs: list[tuple[str, str]]):
+        """
+        `_fetch_legs` for async views. The missing legs are awaited from the
+        provider together, holding no thread while they are in flight; only
+        the hub lane and cache (DB) lookups run in one.
+        """
+        lanes = cls._lanes(pairs)
+        legs = await sync_to_async(cls._known_legs)(lanes)
+        missing = [key for key, leg in legs.items() if leg is None]
+
+        fetched = await asyncio.gather(*(cls._aroute(*lanes[key]) for key in missing))
+        legs.update(zip(missing, fetched, strict=True))
+        await sync_to_async(cls.cache.set_many)(
+            [(*lanes[key], legs[key]) for key in missing if legs[key] is not None]
+        )
+
+        return [legs[cls.cache.make_key(*pair)] for pair in pairs]
 
     @classmethod
-    def _fetch_google_route(cls, origin: str, destination: str):
-        """Helper to fetch directions between two points"""
-        try:
-            result = cls.client.directions(origin, destination, mode="driving")
-
-            if not result:
-                return None
-
-            route = result[0]["legs"][0]
-            return {
-                "distance_meters": route["distance"]["value"],
-                "duration_seconds": route["duration"]["value"],
-                "polyline": result[0]["overview_polyline"]["points"],
-                "start_coords": route["start_location"],
-                "end_coords": route["end_location"],
-                "bounds": result[0]["bounds"],
-            }
-        except Exception as e:
-            logger.error(f"Directions error: {e}")
-            return None
+    def _fetch_route_legs(cls, stops: list[str]):
+        """Returns the legs between consecutive stops, `None` for any that failed"""
+        return cls._fetch_legs(list(zip(stops, stops[1:], strict=False)))
+
+    @classmethod
+    def get_leg(cls, origin: str, destination: str) -> dict | None:
+        """
+        The leg from `origin` to `destination`, served like any other (hub
+        lane, cache or provider); `None` if it could not be routed.
+        """
+        (leg,) = cls._fetch_legs([(origin, destination)])
+        return leg
+
+    @staticmethod
+    def _grid_cell(lat: float, lng: float) -> str:
+        """Key of the ~1 km grid cell holding a point (digits only, so it
+        survives address normalization)"""
+        return f"{round((lat + 90) * 100)} {round((lng + 180) * 100)}"
+
+    @classmethod
+    def reverse_geocode_many(cls, points: list[tuple[float, float]]) -> list[str]:
+        """
+        Labels each (lat, lng) point with its place name. Points are grouped
+        into ~1 km cells, so nearby stops cost one lookup; cached cells are
+        served directly and the rest are fetched concurrently. Points that
+        cannot be resolved are labelled with their coordinates.
+        """
+        cells: dict[str, tuple[float, float]] = {}
+        for lat, lng in points:
+            cells.setdefault(cls._grid_cell(lat, lng), (lat, lng))
+
+        cached = cls.geocode_cache.get_many([(cell, "") for cell in cells])
+        labels = {
+            cell: entry["label"] if entry else None
+            for cell, entry in zip(cells, cached, strict=True)
+        }
+
+        missing = [cell for cell, label in labels.items() if label is None]
+        logger.info(
+            "Reverse geocode: {cached} cached, {missing} to fetch",
+            cached=len(cells) - len(missing),
+            missing=len(missing),
+        )
+        futures = {
+            cell: cls._submit(
+                "geo.reverse_geocode", cls.provider.reverse_geocode, *cells[cell]
+            )
+            for cell in missing
+        }
+        for cell, future in futures.items():
+            labels[cell] = future.result()
+        cls.geocode_cache.set_many(
+            [(cell, "", {"label": labels[cell]}) for cell in missing if labels[cell]]
+        )
+
+        return [
+            labels[cls._grid_cell(lat, lng)] or f"{lat:.4f}, {lng:.4f}"
+            for lat, lng in points
+        ]
+
+    @staticmethod
+    def _log_route(current: str, pickup: str, drop_off: str) -> None:
+        logger.info(
+            "Fetching route data: {current!r} -> {pickup!r} -> {drop_off!r}",
+            current=current,
+            pickup=pickup,
+            drop_off=drop_off,
+        )
 
     @classmethod
     def get_route_data(cls, current: str, pickup: str, drop_off: str):
         """
-        Calculates trip metrics and geometry using Google Routes/Directions.
+        Calculates trip metrics and geometry using the configured routing
+        provider.
+        """
+        cls._log_route(current, pickup, drop_off)
+
+        leg1, leg2 = cls._fetch_route_legs([current, pickup, drop_off])
+        return cls._build_route_data(leg1, leg2)
+
+    @classmethod
+    async def aget_route_data(cls, current: str, pickup: str, drop_off: str):
+        """`get_route_data` for async views"""
+        cls._log_route(current, pickup, drop_off)
+
+        leg1, leg2 = await cls._afetch_legs([(current, pickup), (pickup, drop_off)])
+        return cls._build_route_data(leg1, leg2)
+
+    @classmethod
+    def get_route_data_many(cls, routes: list[tuple[str, str, str]]):
+        """
+        Batch form of `get_route_data` for (current, pickup, drop_off) routes.
+        Legs shared between routes are fetched once. Returns the route data
+        for each route, or the `ValueError` raised while building it.
         """
-        logger.info(f"Fetching route data: {current=} -> {pickup=} -> {drop_off=}")
+        logger.info("Fetching route data for {routes} routes", routes=len(routes))
+
+        pairs = []
+        for current, pickup, drop_off in routes:
+            pairs += [(current, pickup), (pickup, drop_off)]
+        legs = cls._fetch_legs(pairs)
 
-        leg1 = cls._fetch_google_route(current, pickup)
-        leg2 = cls._fetch_google_route(pickup, drop_off)
+        results = []
+        for i in range(len(routes)):
+            try:
+                results.append(cls._build_route_data(legs[2 * i], legs[2 * i + 1]))
+            except ValueError as e:
+                results.append(e)
+        return results
 
+    @staticmethod
+    def _build_route_data(leg1, leg2):
         if not leg1 or not leg2:
             raise ValueError("Routing service failed to calculate legs.")
 
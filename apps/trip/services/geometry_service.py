@@ -0,0 +1,149 @@
+import numpy as np
+from googlemaps.convert import encode_polyline
+from loguru import logger
+
+from apps.trip.models import Trip
+
+EARTH_RADIUS_METERS = 6_371_008.8
+# Web Mercator ground resolution at the equator for zoom 0, in meters/pixel
+METERS_PER_PIXEL_Z0 = 156_543.03
+
+# Zoom levels the simplified geometry is precomputed for; anything above the
+# last level is served at full resolution
+ZOOM_LEVELS = (3, 5, 7, 9, 11, 13)
+
+
+def decode_polyline(encoded: str) -> np.ndarray:
+    """
+    Decodes a Google encoded polyline into an (n, 2) array of (lat, lng).
+    Fully vectorized: chunks are delimited by bytes without the 0x20
+    continuation bit, and each chunk's 5-bit groups are shifted into place.
+    """
+    values = np.frombuffer(encoded.encode(), dtype=np.uint8).astype(np.int64) - 63
+    if values.size == 0:
+        return np.empty((0, 2))
+
+    is_last = (values & 0x20) == 0
+    chunk_ids = np.concatenate(([0], np.cumsum(is_last)[:-1]))
+    chunk_starts = np.flatnonzero(np.concatenate(([True], is_last[:-1])))
+    shifts = 5 * (np.arange(values.size) - chunk_starts[chunk_ids])
+
+    numbers = np.zeros(chunk_starts.size, dtype=np.int64)
+    np.add.at(numbers, chunk_ids, (values & 0x1F) << shifts)
+
+    # Zig-zag decoding, then the deltas become absolute coordinates
+    deltas = np.where(numbers & 1, ~(numbers >> 1), numbers >> 1)
+    return np.cumsum(deltas.reshape(-1, 2), axis=0) / 1e5
+
+
+def _project(coords: np.ndarray) -> np.ndarray:
+    """Equirectangular projection to planar meters around the mean latitude"""
+    lat = np.radians(coords[:, 0])
+    lng = np.radians(coords[:, 1])
+    x = lng * np.cos(lat.mean()) * EARTH_RADIUS_METERS
+    y = lat * EARTH_RADIUS_METERS
+    return np.column_stack((x, y))
+
+
+def significance(coords: np.ndarray, min_tolerance: float) -> np.ndarray:
+    """
+    Runs Douglas–Peucker once and returns, for every point, the largest
+    tolerance (meters) at which it is still kept. Simplifying at tolerance t
+    is then just `significance > t`, so all zoom levels share one pass.
+    Points that only matter below `min_tolerance` get 0.
+    """
+    n = len(coords)
+    result = np.zeros(n)
+    if n == 0:
+        return result
+    result[0] = result[-1] = np.inf
+    points = _project(coords)
+
+    # (start, end, tolerance inherited from the enclosing split)
+    stack = [(0, n - 1, np.inf)]
+    while stack:
+        start, end, ceiling = stack.pop()
+        if end - start < 2:
+            continue
+
+        origin, direction = points[start], points[end] - points[start]
+        offsets = points[start + 1 : end] - origin
+        length = np.hypot(*direction)
+        if length == 0:
+            distances = np.hypot(offsets[:, 0], offsets[:, 1])
+        else:
+            cross = direction[0] * offsets[:, 1] - direction[1] * offsets[:, 0]
+            distances = np.abs(cross) / length
+
+        i = int(np.argmax(distances))
+        if distances[i] <= min_tolerance:
+            continue
+
+        split = start + 1 + i
+        # A point can never outlive the split that made it reachable
+        result[split] = min(distances[i], ceiling)
+        stack += [(start, split, result[split]), (split, end, result[split])]
+    return result
+
+
+def zoom_tolerance(zoom: int, latitude: float) -> float:
+    """Ground size of one screen pixel at `zoom`, in meters"""
+    return METERS_PER_PIXEL_Z0 * np.cos(np.radians(latitude)) / 2**zoom
+
+
+class GeometryService:
+    """Server-side simplified route geometry, cached on the trip per zoom level."""
+
+    @staticmethod
+    def build_levels(polylines: list[str]) -> dict:
+        levels: dict[str, list[str]] = {str(zoom): [] for zoom in ZOOM_LEVELS}
+        for encoded in polylines:
+            coords = decode_polyline(encoded)
+            if len(coords) == 0:
+                for zoom in ZOOM_LEVELS:
+                    levels[str(zoom)].append("")
+                continue
+
+            latitude = float(np.abs(coords[:, 0]).max())
+            weights = significance(
+                coords, min_tolerance=zoom_tolerance(ZOOM_LEVELS[-1], latitude)
+            )
+            for zoom in ZOOM_LEVELS:
+                kept = coords[weights > zoom_tolerance(zoom, latitude)]
+                levels[str(zoom)].append(encode_polyline(kept.tolist()))
+        return levels
+
+    @classmethod
+    def get_levels(cls, trip: Trip) -> dict:
+        if trip.geometry_levels is None:
+            logger.info(
+                "Building simplified geometry for Trip ID: {trip_id}", trip_id=trip.id
+            )
+            polylines = (trip.route_geometry or {}).get("polyline", [])
+            trip.geometry_levels = cls.build_levels(polylines)
+            trip.save(update_fields=["geometry_levels"])
+        return trip.geometry_levels
+
+    @classmethod
+    def get_geometry(cls, trip: Trip, zoom: int | None) -> dict:
+        """
+        Route geometry for a map at `zoom`: the coarsest precomputed level that
+        is at least as detailed, or the full-resolution polylines.
+        """
+        route_geometry = trip.route_geometry or {}
+        level = None
+        if zoom is not None:
+            level = next((z for z in ZOOM_LEVELS if z >= zoom), None)
+
+        if level is None:
+            polylines = route_geometry.get("polyline", [])
+        else:
+            polylines = cls.get_levels(trip)[str(level)]
+
+        return {
+            "zoom": level,
+            "polyline": polylines,
+            "start_coords": route_geometry.get("start_coords"),
+            "pickup_coords": route_geometry.get("pickup_coords"),
+            "drop_off_coords": route_geometry.get("drop_off_coords"),
+        }
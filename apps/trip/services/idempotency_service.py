@@ -0,0 +1,144 @@
+import hashlib
+import json
+import threading
+import time
+from datetime import timedelta
+
+from loguru import logger
+
+from django.conf import settings
+from django.db import IntegrityError, transaction
+from django.utils import timezone
+
+from apps.trip.models import IdempotencyKey
+
+# An in-flight request not finished by then is assumed to have died with its
+# worker, and the key is handed to the next retry
+ABANDONED_AFTER = timedelta(minutes=10)
+# How often a request waiting on another process's computation checks on it
+POLL_INTERVAL_SECONDS = 0.25
+
+
+class IdempotencyService:
+    """
+    Runs a request at most once per `Idempotency-Key`.
+
+    The first request with a key claims it with an insert and computes the
+    response; its retries get the stored response back. Retries arriving
+    while it is still computing wait for it: on an in-process event when the
+    computation runs in the same process, else by polling the row.
+    """
+
+    _inflight: dict[str, threading.Event] = {}
+    _lock = threading.Lock()
+
+    @staticmethod
+    def fingerprint(method: str, path: str, data) -> str:
+        payload = json.dumps(data, sort_keys=True, default=str)
+        return hashlib.sha256(f"{method} {path} {payload}".encode()).hexdigest()
+
+    @staticmethod
+    def _claim(key: str, fingerprint: str) -> tuple[IdempotencyKey | None, bool]:
+        """Returns the key's row and whether this request now owns it"""
+        now = timezone.now()
+        expires_at = now + timedelta(seconds=settings.IDEMPOTENCY_KEY_TTL_SECONDS)
+        try:
+            with transaction.atomic():
+                entry = IdempotencyKey.objects.create(
+                    key=key, fingerprint=fingerprint, expires_at=expires_at
+                )
+            # Expired keys are dropped as new ones come in (on the indexed expiry)
+            IdempotencyKey.objects.filter(expires_at__lte=now).delete()
+            return entry, True
+        except IntegrityError:
+            entry = IdempotencyKey.objects.filter(key=key).first()
+        if entry is None:
+            # Released between the insert and the read; claim it again
+            return None, False
+
+        abandoned = (
+            entry.status_code is None and entry.updated_at < now - ABANDONED_AFTER
+        )
+        if entry.expires_at > now and not abandoned:
+            return entry, False
+
+        # Take over an expired or abandoned key, unless another retry just did
+        taken = IdempotencyKey.objects.filter(
+            id=entry.id, updated_at=entry.updated_at
+        ).update(
+            fingerprint=fingerprint,
+            status_code=None,
+            response=None,
+            expires_at=expires_at,
+            updated_at=now,
+        )
+        if not taken:
+            return None, False
+        entry.fingerprint, entry.status_code, entry.response = fingerprint, None, None
+        return entry, True
+
+    @classmethod
+    def _compute(cls, entry: IdempotencyKey, compute) -> tuple[int, dict]:
+        event = threading.Event()
+        with cls._lock:
+            cls._inflight[entry.key] = event
+        try:
+            try:
+                status_code, data = compute()
+            except Exception:
+                # Nothing to replay; the next retry runs the request again
+                entry.delete()
+                raise
+            if not 200 <= status_code < 300:
+                # Errors are not replayed: they may be transient (e.g. routing)
+                entry.delete()
+            else:
+                entry.status_code, entry.response = status_code, data
+                entry.save(update_fields=["status_code", "response", "updated_at"])
+            return status_code, data
+        finally:
+            with cls._lock:
+                cls._inflight.pop(entry.key, None)
+            event.set()
+
+    @classmethod
+    def _wait(cls, key: str, deadline: float) -> None:
+        with cls._lock:
+            event = cls._inflight.get(key)
+        remaining = max(deadline - time.monotonic(), 0)
+        if event is not None:
+            event.wait(remaining)
+        else:
+            time.sleep(min(POLL_INTERVAL_SECONDS, remaining))
+
+    @classmethod
+    def run(cls, key: str, fingerprint: str, compute) -> tuple[int, dict, bool]:
+        """
+        Returns the (status code, data) of the request identified by `key`,
+        running `compute` for it only if no other request has, and whether
+        the response is a replay.
+        """
+        deadline = time.monotonic() + settings.IDEMPOTENCY_WAIT_SECONDS
+        while True:
+            entry, owned = cls._claim(key, fingerprint)
+            if owned:
+                return (*cls._compute(entry, compute), False)
+            if entry is None:
+                continue
+
+            if entry.fingerprint != fingerprint:
+                return (
+                    422,
+                    {"error": "Idempotency-Key already used for a different request."},
+                    False,
+                )
+            if entry.status_code is not None:
+                logger.info("Replaying the response for Idempotency-Key {key}", key=key)
+                return entry.status_code, entry.response, True
+            if time.monotonic() >= deadline:
+                return (
+                    409,
+                    {"error": "A request with this Idempotency-Key is in progress."},
+                    False,
+                )
+            cls._wait(key, deadline)
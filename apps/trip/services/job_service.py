@@ -0,0 +1,118 @@
+from datetime import timedelta
+
+from loguru import logger
+
+from django.conf import settings
+from django.db import transaction
+from django.db.models import Q
+from django.utils import timezone
+
+from apps.trip.constants import JobStatus
+from apps.trip.models import Trip, TripJob
+from apps.trip.services.eld_service import EldService
+
+
+class JobService:
+    """
+    Database-backed queue for trip generation, no external broker needed. A
+    failed job is retried, after a growing delay, until it has been attempted
+    `TRIP_JOB_MAX_ATTEMPTS` times.
+    """
+
+    @classmethod
+    def enqueue(cls, trip: Trip) -> TripJob:
+        logger.info("Queueing trip generation for Trip ID: {trip_id}", trip_id=trip.id)
+        return TripJob.objects.create(trip=trip)
+
+    @classmethod
+    def claim_next(cls) -> TripJob | None:
+        """
+        Marks the oldest pending job as running and returns it. Rows locked by
+        other workers are skipped, so any number of workers can poll at once.
+        Jobs waiting out a retry delay are left alone.
+        """
+        with transaction.atomic():
+            job = (
+                TripJob.objects.select_for_update(skip_locked=True)
+                .filter(status=JobStatus.PENDING)
+                .filter(Q(retry_at__isnull=True) | Q(retry_at__lte=timezone.now()))
+                .order_by("created_at")
+                .first()
+            )
+            if job is None:
+                return None
+
+            job.status = JobStatus.RUNNING
+            job.attempts += 1
+            job.started_at = timezone.now()
+            job.save(update_fields=["status", "attempts", "started_at", "updated_at"])
+        return job
+
+    @classmethod
+    def run(cls, job: TripJob) -> None:
+        logger.info(
+            "Running job {job_id} for Trip ID: {trip_id}",
+            job_id=job.id,
+            trip_id=job.trip_id,
+        )
+        try:
+            EldService(job.trip_id).generate_full_trip()
+        except Exception as e:
+            job.error = str(e)
+            cls._fail(job)
+        else:
+            job.status = JobStatus.DONE
+            job.error = ""
+
+        job.finished_at = timezone.now()
+        job.save(
+            update_fields=["status", "error", "finished_at", "retry_at", "updated_at"]
+        )
+
+    @staticmethod
+    def _fail(job: TripJob) -> None:
+        """Queues a failed attempt again, unless it was the job's last one"""
+        if job.attempts >= settings.TRIP_JOB_MAX_ATTEMPTS:
+            logger.error(
+                "Job {job_id} failed for Trip ID {trip_id} after {attempts} "
+                "attempts: {error}",
+                job_id=job.id,
+                trip_id=job.trip_id,
+                attempts=job.attempts,
+                error=job.error,
+            )
+            job.status = JobStatus.FAILED
+            return
+
+        # Generation resumes from the trip's checkpoint, so a retry only
+        # redoes the stage that failed
+        delay = settings.TRIP_JOB_RETRY_DELAY_SECONDS * 2 ** (job.attempts - 1)
+        logger.warning(
+            "Job {job_id} failed for Trip ID {trip_id} (attempt {attempts}), "
+            "retrying in {delay}s: {error}",
+            job_id=job.id,
+            trip_id=job.trip_id,
+            attempts=job.attempts,
+            delay=delay,
+            error=job.error,
+        )
+        job.status = JobStatus.PENDING
+        job.retry_at = timezone.now() + timedelta(seconds=delay)
+
+    @classmethod
+    def requeue_stale(cls, stale_after: timedelta) -> int:
+        """
+        Returns jobs left running by a worker that died back to the queue, or
+        fails them if that was their last attempt.
+        """
+        now = timezone.now()
+        stale = TripJob.objects.filter(
+            status=JobStatus.RUNNING, started_at__lt=now - stale_after
+        )
+        stale.filter(attempts__gte=settings.TRIP_JOB_MAX_ATTEMPTS).update(
+            status=JobStatus.FAILED,
+            error="Abandoned by its worker",
+            finished_at=now,
+            updated_at=now,
+        )
+        return stale.update(status=JobStatus.PENDING, retry_at=None, updated_at=now)
@@ -0,0 +1,166 @@
+import threading
+import time
+from typing import NamedTuple
+
+import numpy as np
+from loguru import logger
+
+from django.db import connection
+from django.db.models import Q
+
+from apps.trip.models import Hub, HubLane
+from apps.trip.services.route_cache import normalize_address
+
+# Marks hub pairs with no precomputed lane
+NO_LANE = -1
+
+
+class _Matrix(NamedTuple):
+    hub_index: dict[str, int]
+    hub_ids: np.ndarray
+    distance: np.ndarray
+    duration: np.ndarray
+
+
+class LaneMatrix:
+    """
+    In-process hub-to-hub distance/duration matrix.
+
+    Hubs are indexed by normalized address, so recognising a lane and reading
+    its metrics is a dict lookup plus an array read. Only the lane geometry
+    stays in the `HubLane` table and is fetched, for all requested lanes at
+    once, when legs are built. The matrix is reloaded every `reload_seconds`
+    to pick up `build_lane_matrix` refreshes: in a background thread, while
+    requests keep reading the previous matrix.
+    """
+
+    def __init__(self, reload_seconds: int) -> None:
+        self.reload_seconds = reload_seconds
+        self._lock = threading.Lock()
+        self._loaded_at: float | None = None
+        self._matrix: _Matrix | None = None
+        self._reloading = False
+
+    def _load(self) -> None:
+        hubs = list(Hub.objects.order_by("id").values_list("id", "normalized_address"))
+        positions = {hub_id: i for i, (hub_id, _) in enumerate(hubs)}
+        distance = np.full((len(hubs), len(hubs)), NO_LANE, dtype=np.int64)
+        duration = np.full((len(hubs), len(hubs)), NO_LANE, dtype=np.int64)
+
+        lanes = HubLane.objects.values_list(
+            "origin_id", "destination_id", "distance_meters", "duration_seconds"
+        )
+        count = 0
+        for origin_id, destination_id, meters, seconds in lanes.iterator(
+            chunk_size=5000
+        ):
+            i, j = positions.get(origin_id), positions.get(destination_id)
+            # Lanes of hubs added after the hub query wait for the next reload
+            if i is None or j is None:
+                continue
+            distance[i, j], duration[i, j] = meters, seconds
+            count += 1
+
+        # Swapped in whole, so concurrent readers never see a half-built matrix
+        self._matrix = _Matrix(
+            hub_index={address: i for i, (_, address) in enumerate(hubs)},
+            hub_ids=np.array([hub_id for hub_id, _ in hubs], dtype=np.int64),
+            distance=distance,
+            duration=duration,
+        )
+        logger.info(
+            "Loaded lane matrix: {hubs} hubs, {lanes} lanes",
+            hubs=len(hubs),
+            lanes=count,
+        )
+
+    def _reload(self) -> None:
+        try:
+            self._load()
+        except Exception as e:
+            # The previous matrix stays in use until the next attempt
+            logger.error("Lane matrix reload failed: {error}", error=e)
+        finally:
+            with self._lock:
+                self._loaded_at = time.monotonic()
+                self._reloading = False
+            connection.close()
+
+    def _ensure_loaded(self) -> _Matrix:
+        with self._lock:
+            if self._matrix is None:
+                # Nothing to serve yet, so the first requests wait for it
+                self._load()
+                self._loaded_at = time.monotonic()
+            elif not self._reloading and (
+                self._loaded_at is None
+                or time.monotonic() - self._loaded_at > self.reload_seconds
+            ):
+                self._reloading = True
+                threading.Thread(
+                    target=self._reload, name="lane-matrix-reload", daemon=True
+                ).start()
+            return self._matrix
+
+    def invalidate(self) -> None:
+        """Has the next lookup start a reload"""
+        with self._lock:
+            self._loaded_at = None
+
+    @staticmethod
+    def _position(
+        matrix: _Matrix, origin: str, destination: str
+    ) -> tuple[int, int] | None:
+        i = matrix.hub_index.get(normalize_address(origin))
+        j = matrix.hub_index.get(normalize_address(destination))
+        if i is None or j is None or matrix.distance[i, j] == NO_LANE:
+            return None
+        return i, j
+
+    def metrics(self, origin: str, destination: str) -> tuple[int, int] | None:
+        """(distance_meters, duration_seconds) of a hub lane, if there is one"""
+        matrix = self._ensure_loaded()
+        position = self._position(matrix, origin, destination)
+        if position is None:
+            return None
+        return int(matrix.distance[position]), int(matrix.duration[position])
+
+    def get_legs(self, pairs: dict) -> dict:
+        """
+        Legs for the (origin, destination) pairs, keyed like `pairs`, that
+        run between known hubs. Other pairs are left out.
+        """
+        matrix = self._ensure_loaded()
+        positions = {}
+        for key, pair in pairs.items():
+            position = self._position(matrix, *pair)
+            if position is not None:
+                positions[key] = position
+        if not positions:
+            return {}
+
+        query = Q()
+        for i, j in set(positions.values()):
+            query |= Q(
+                origin_id=int(matrix.hub_ids[i]),
+                destination_id=int(matrix.hub_ids[j]),
+            )
+        geometry = {
+            (origin_id, destination_id): value
+            for origin_id, destination_id, value in HubLane.objects.filter(
+                query
+            ).values_list("origin_id", "destination_id", "geometry")
+        }
+
+        legs = {}
+        for key, (i, j) in positions.items():
+            lane = geometry.get((int(matrix.hub_ids[i]), int(matrix.hub_ids[j])))
+            # Deleted since the last reload; the caller falls back to routing it
+            if lane is None:
+                continue
+            legs[key] = {
+                "distance_meters": int(matrix.distance[i, j]),
+                "duration_seconds": int(matrix.duration[i, j]),
+                **lane,
+            }
+        return legs
@@ -0,0 +1,116 @@
+import numpy as np
+from loguru import logger
+
+from apps.trip.services.geo_service import GeoService
+from apps.trip.services.geometry_service import EARTH_RADIUS_METERS, decode_polyline
+
+METERS_PER_MILE = 1609.344
+
+
+def _haversine_miles(coords: np.ndarray) -> np.ndarray:
+    """Great-circle length of each consecutive pair of (lat, lng) points"""
+    lat, lng = np.radians(coords[:, 0]), np.radians(coords[:, 1])
+    dlat, dlng = np.diff(lat), np.diff(lng)
+    a = (
+        np.sin(dlat / 2) ** 2
+        + np.cos(lat[:-1]) * np.cos(lat[1:]) * np.sin(dlng / 2) ** 2
+    )
+    return 2 * EARTH_RADIUS_METERS * np.arcsin(np.sqrt(a)) / METERS_PER_MILE
+
+
+class RoutePositionIndex:
+    """
+    Maps route miles driven to coordinates along a trip's decoded polylines.
+
+    Built once per trip: every vertex gets its cumulative distance, with each
+    leg rescaled so it ends exactly at the leg's routed mileage (the overview
+    polyline is shorter than the road). A lookup is then a binary search plus
+    a linear interpolation.
+    """
+
+    def __init__(self, polylines: list[str], leg_miles: list[float]) -> None:
+        coords, distances = [], []
+        offset = 0.0
+        for encoded, miles in zip(polylines, leg_miles, strict=True):
+            points = decode_polyline(encoded)
+            if len(points) == 0:
+                offset += miles
+                continue
+
+            cumulative = np.concatenate(([0.0], np.cumsum(_haversine_miles(points))))
+            if cumulative[-1] > 0:
+                cumulative *= miles / cumulative[-1]
+            coords.append(points)
+            distances.append(cumulative + offset)
+            offset += miles
+
+        self.coords = np.concatenate(coords) if coords else np.empty((0, 2))
+        self.distances = np.concatenate(distances) if distances else np.empty(0)
+
+    def locate(self, miles: np.ndarray) -> np.ndarray:
+        """Returns an (n, 2) array of (lat, lng) for each odometer reading"""
+        if len(self.coords) == 0:
+            return np.empty((0, 2))
+
+        miles = np.clip(miles, self.distances[0], self.distances[-1])
+        upper = np.clip(
+            np.searchsorted(self.distances, miles, side="right"),
+            1,
+            len(self.coords) - 1,
+        )
+        lower = upper - 1
+        span = self.distances[upper] - self.distances[lower]
+        weight = np.divide(
+            miles - self.distances[lower],
+            span,
+            out=np.zeros_like(miles, dtype=float),
+            where=span > 0,
+        )[:, None]
+        return self.coords[lower] + weight * (self.coords[upper] - self.coords[lower])
+
+
+class LocationService:
+    """Fills in where each generated segment starts, for one or many trips."""
+
+    @staticmethod
+    def _build_index(trip) -> RoutePositionIndex | None:
+        geometry, metrics = trip.route_geometry or {}, trip.metrics or {}
+        polylines = geometry.get("polyline") or []
+        if not polylines:
+            return None
+        leg_miles = [
+            metrics.get("to_pickup_miles", 0),
+            metrics.get("to_drop_off_miles", 0),
+        ]
+        return RoutePositionIndex(polylines, leg_miles[: len(polylines)])
+
+    @classmethod
+    def label_segments(cls, services) -> None:
+        """
+        Sets `location` on every segment of the given (simulated, not yet
+        persisted) EldServices that has none yet, with a single
+        reverse-geocode pass for all of them.
+        """
+        points, targets = [], []
+        for service in services:
+            index = cls._build_index(service.trip)
+            segments = [segment for segment in service.segments if not segment.location]
+            if index is None or not segments:
+                continue
+
+            odometer = np.fromiter(
+                (segment.odometer for segment in segments),
+                dtype=float,
+                count=len(segments),
+            )
+            points += [tuple(point) for point in index.locate(odometer).tolist()]
+            targets += segments
+
+        if not points:
+            return
+
+        logger.info("Labelling {points} segment locations", points=len(points))
+        for segment, label in zip(
+            targets, GeoService.reverse_geocode_many(points), strict=True
+        ):
+            segment.location = label[:255]
@@ -0,0 +1,89 @@
+"""
+SVG rendering of a daily log sheet: the FMCSA-style 24-hour grid with one
+row per duty status and the driver's status line drawn across it.
+"""
+
+from datetime import UTC, datetime, time
+from html import escape
+
+from apps.trip.constants import DriverStatus
+from apps.trip.services.eld_records import SegmentRecord
+
+# Grid rows, top to bottom, as on the paper form
+ROWS = (
+    DriverStatus.OFF_DUTY,
+    DriverStatus.SLEEPER_BERTH,
+    DriverStatus.DRIVING,
+    DriverStatus.ON_DUTY,
+)
+LABEL_WIDTH = 140
+HOUR_WIDTH = 30
+ROW_HEIGHT = 28
+HEADER_HEIGHT = 24
+WIDTH = LABEL_WIDTH + 24 * HOUR_WIDTH + 60
+HEIGHT = HEADER_HEIGHT + len(ROWS) * ROW_HEIGHT
+
+
+def _x(dt: datetime, midnight: datetime) -> float:
+    hours = (dt - midnight).total_seconds() / 3600
+    return LABEL_WIDTH + min(max(hours, 0), 24) * HOUR_WIDTH
+
+
+def _y(status: str) -> float:
+    return HEADER_HEIGHT + (ROWS.index(status) + 0.5) * ROW_HEIGHT
+
+
+def _grid() -> list[str]:
+    parts = []
+    for i, status in enumerate(ROWS):
+        top = HEADER_HEIGHT + i * ROW_HEIGHT
+        parts.append(
+            f'<text x="4" y="{top + ROW_HEIGHT * 0.65:g}">'
+            f"{escape(DriverStatus(status).label)}</text>"
+        )
+        parts.append(
+            f'<line x1="{LABEL_WIDTH}" y1="{top}" x2="{LABEL_WIDTH + 24 * HOUR_WIDTH}" '
+            f'y2="{top}" stroke="#999"/>'
+        )
+    for hour in range(25):
+        x = LABEL_WIDTH + hour * HOUR_WIDTH
+        label = {0: "M", 12: "N", 24: "M"}.get(hour, str(hour % 12))
+        parts.append(f'<text x="{x}" y="16" text-anchor="middle">{label}</text>')
+        parts.append(
+            f'<line x1="{x}" y1="{HEADER_HEIGHT}" x2="{x}" y2="{HEIGHT}" stroke="#999"/>'
+        )
+    return parts
+
+
+# The same for every sheet, so it is built once
+_GRID = "".join(_grid())
+
+
+def render_svg(log_date, segments: list[SegmentRecord]) -> str:
+    """The day's grid with its status line and the hours per status"""
+    midnight = datetime.combine(log_date, time.min, tzinfo=UTC)
+    parts = [_GRID]
+    totals = dict.fromkeys(ROWS, 0.0)
+
+    points = []
+    for segment in segments:
+        x1, x2 = _x(segment.start_time, midnight), _x(segment.end_time, midnight)
+        y = _y(segment.status)
+        points += [(x1, y), (x2, y)]
+        totals[segment.status] += (x2 - x1) / HOUR_WIDTH
+    if points:
+        path = " ".join(f"{x:.1f},{y:.1f}" for x, y in points)
+        parts.append(
+            f'<polyline points="{path}" fill="none" stroke="#1a56db" stroke-width="2"/>'
+        )
+    for i, status in enumerate(ROWS):
+        y = HEADER_HEIGHT + (i + 0.65) * ROW_HEIGHT
+        parts.append(
+            f'<text x="{LABEL_WIDTH + 24 * HOUR_WIDTH + 8}" y="{y:g}">'
+            f"{totals[status]:.2f}</text>"
+        )
+
+    return (
+        f'<svg xmlns="http://www.w3.org/2000/svg" width="{WIDTH}" height="{HEIGHT}" '
+        f'font-family="sans-serif" font-size="11">{"".join(parts)}</svg>'
+    )
@@ -0,0 +1,176 @@
+import hashlib
+import re
+import threading
+import time
+from collections import OrderedDict
+from datetime import timedelta
+
+from loguru import logger
+
+from django.db import DatabaseError, transaction
+from django.utils import timezone
+
+from apps.trip.models import RouteCacheEntry
+
+_PUNCTUATION = re.compile(r"[^\w\s]")
+_WHITESPACE = re.compile(r"\s+")
+# How often a process deletes the table's expired rows, at most
+PURGE_INTERVAL_SECONDS = 600
+
+
+def normalize_address(address: str) -> str:
+    """Case, punctuation and whitespace insensitive form of an address"""
+    address = _PUNCTUATION.sub(" ", address.lower())
+    return _WHITESPACE.sub(" ", address).strip()
+
+
+class RouteCache:
+    """
+    Two-tier cache for route legs.
+
+    The first tier is a per-process LRU; the second is the `RouteCacheEntry`
+    table, shared by every worker. Entries in both tiers expire after `ttl`
+    seconds; expired rows are dropped every `PURGE_INTERVAL_SECONDS` as new
+    ones are written. Caches with different `namespace`s share the table but
+    never each other's keys.
+    """
+
+    # Shared by every cache of the process, as they share the table
+    _purged_at: float | None = None
+    _purge_lock = threading.Lock()
+
+    def __init__(self, ttl: int, max_entries: int, namespace: str = "") -> None:
+        self.ttl = ttl
+        self.max_entries = max_entries
+        self.namespace = namespace
+
+        self._entries: OrderedDict[str, tuple[float, dict]] = OrderedDict()
+        self._lock = threading.Lock()
+
+        # Counters
+        self.memory_hits = 0
+        self.db_hits = 0
+        self.misses = 0
+
+    def make_key(self, origin: str, destination: str) -> str:
+        lane = f"{normalize_address(origin)}|{normalize_address(destination)}"
+        if self.namespace:
+            lane = f"{self.namespace}:{lane}"
+        return hashlib.sha256(lane.encode()).hexdigest()
+
+    def _remember(self, key: str, leg: dict, expires_at: float) -> None:
+        with self._lock:
+            self._entries[key] = (expires_at, leg)
+            self._entries.move_to_end(key)
+            while len(self._entries) > self.max_entries:
+                self._entries.popitem(last=False)
+
+    def _memory_get(self, key: str) -> dict | None:
+        with self._lock:
+            entry = self._entries.get(key)
+            if entry is not None:
+                expires_at, leg = entry
+                if expires_at > time.time():
+                    self._entries.move_to_end(key)
+                    self.memory_hits += 1
+                    return leg
+                del self._entries[key]
+        return None
+
+    def get(self, origin: str, destination: str) -> dict | None:
+        return self.get_many([(origin, destination)])[0]
+
+    def get_many(self, pairs: list[tuple[str, str]]) -> list[dict | None]:
+        """
+        The cached leg of each (origin, destination) pair, `None` for misses.
+        Pairs not held in process are read from the table with one query.
+        """
+        keys = [self.make_key(*pair) for pair in pairs]
+        legs = {key: self._memory_get(key) for key in keys}
+
+        missing = [key for key, leg in legs.items() if leg is None]
+        if missing:
+            rows = RouteCacheEntry.objects.filter(
+                key__in=missing, expires_at__gt=timezone.now()
+            ).values_list("key", "leg", "expires_at")
+            for key, leg, expires_at in rows:
+                self._remember(key, leg, expires_at.timestamp())
+                legs[key] = leg
+            with self._lock:
+                self.db_hits += sum(legs[key] is not None for key in missing)
+                self.misses += sum(legs[key] is None for key in missing)
+
+        return [legs[key] for key in keys]
+
+    def set(self, origin: str, destination: str, leg: dict) -> None:
+        self.set_many([(origin, destination, leg)])
+
+    def set_many(self, entries: list[tuple[str, str, dict]]) -> None:
+        """Caches each (origin, destination, leg), with one upsert for the table"""
+        if not entries:
+            return
+        expires_at = timezone.now() + timedelta(seconds=self.ttl)
+
+        rows = {}
+        for origin, destination, leg in entries:
+            key = self.make_key(origin, destination)
+            self._remember(key, leg, expires_at.timestamp())
+            rows[key] = RouteCacheEntry(
+                key=key,
+                origin=normalize_address(origin)[:255],
+                destination=normalize_address(destination)[:255],
+                leg=leg,
+                expires_at=expires_at,
+            )
+        try:
+            # A savepoint, so a failed write never aborts the caller's transaction
+            with transaction.atomic():
+                RouteCacheEntry.objects.bulk_create(
+                    rows.values(),
+                    update_conflicts=True,
+                    unique_fields=["key"],
+                    update_fields=[
+                        "origin",
+                        "destination",
+                        "leg",
+                        "expires_at",
+                        "updated_at",
+                    ],
+                )
+                if self._purge_due():
+                    self.purge()
+        except DatabaseError as e:
+            # The in-process tier still holds the legs; sharing them is best-effort
+            logger.error("Route cache write error: {error}", error=e)
+
+    @classmethod
+    def _purge_due(cls) -> bool:
+        now = time.monotonic()
+        with cls._purge_lock:
+            if cls._purged_at is not None and now - cls._purged_at < (
+                PURGE_INTERVAL_SECONDS
+            ):
+                return False
+            cls._purged_at = now
+            return True
+
+    @staticmethod
+    def purge() -> int:
+        """Deletes the expired rows of every namespace (on the indexed expiry)"""
+        deleted, _ = RouteCacheEntry.objects.filter(
+            expires_at__lte=timezone.now()
+        ).delete()
+        return deleted
+
+    def clear(self) -> None:
+        with self._lock:
+            self._entries.clear()
+
+    def stats(self) -> dict:
+        with self._lock:
+            return {
+                "memory_hits": self.memory_hits,
+                "db_hits": self.db_hits,
+                "misses": self.misses,
+                "size": len(self._entries),
+            }
@@ -0,0 +1,20 @@
+from django.conf import settings
+
+from apps.trip.services.routing.base import RoutingProvider
+
+
+def get_provider() -> RoutingProvider:
+    """The routing backend selected by `ROUTING_PROVIDER`"""
+    if settings.ROUTING_PROVIDER == "local_graph":
+        from apps.trip.services.routing.local_graph import LocalGraphRoutingProvider
+
+        return LocalGraphRoutingProvider(settings.ROUTING_GRAPH_DIR)
+
+    from apps.trip.services.routing.google import GoogleRoutingProvider
+
+    return GoogleRoutingProvider(
+        api_key=settings.GOOGLE_MAPS_API_KEY,
+        pool_size=settings.ROUTE_FETCH_MAX_WORKERS,
+        max_connections=settings.ROUTE_HTTP_MAX_CONNECTIONS,
+        timeout=settings.ROUTE_HTTP_TIMEOUT_SECONDS,
+    )
@@ -0,0 +1,32 @@
+import asyncio
+from abc import ABC, abstractmethod
+
+
+class RoutingProvider(ABC):
+    """
+    A source of driving directions for GeoService.
+
+    `route` returns a leg as a dict with `distance_meters`,
+    `duration_seconds`, `polyline` (Google encoded), `start_coords`,
+    `end_coords` and `bounds`, or `None` when no route can be found.
+    Providers are shared across threads.
+
+    `aroute` / `areverse_geocode` are their forms for async views. By default
+    they run the blocking call in a worker thread; providers that talk to a
+    network service override them with non-blocking I/O.
+    """
+
+    name: str
+
+    @abstractmethod
+    def route(self, origin: str, destination: str) -> dict | None: ...
+
+    @abstractmethod
+    def reverse_geocode(self, lat: float, lng: float) -> str | None:
+        """Short place label for a point, or `None` if it cannot be resolved"""
+
+    async def aroute(self, origin: str, destination: str) -> dict | None:
+        return await asyncio.to_thread(self.route, origin, destination)
+
+    async def areverse_geocode(self, lat: float, lng: float) -> str | None:
+        return await asyncio.to_thread(self.reverse_geocode, lat, lng)
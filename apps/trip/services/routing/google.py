@@ -0,0 +1,148 @@
+import asyncio
+import weakref
+
+import httpx
+from googlemaps import Client as GoogleMapsClient
+from loguru import logger
+from requests.adapters import HTTPAdapter
+
+from apps.trip.services.routing.base import RoutingProvider
+
+DIRECTIONS_URL = "https://maps.googleapis.com/maps/api/directions/json"
+GEOCODE_URL = "https://maps.googleapis.com/maps/api/geocode/json"
+
+
+async def _close_with_loop(client: httpx.AsyncClient):
+    """
+    Parked at its first step for as long as the event loop runs: a loop
+    finalizes its pending async generators when it shuts down (as
+    `asyncio.run`, uvicorn and asgiref's `async_to_sync` do), which closes
+    the client and its pooled connections.
+    """
+    try:
+        yield
+    finally:
+        await client.aclose()
+
+
+class GoogleRoutingProvider(RoutingProvider):
+    name = "google"
+
+    def __init__(
+        self,
+        api_key: str,
+        pool_size: int,
+        max_connections: int = 100,
+        timeout: float = 10.0,
+    ) -> None:
+        self.api_key = api_key
+        self.client = GoogleMapsClient(key=api_key)
+        # Keep one pooled connection per fetch thread so concurrent legs reuse them
+        self.client.session.mount("https://", HTTPAdapter(pool_maxsize=pool_size))
+
+        # Async clients, one per event loop: their pooled connections belong
+        # to the loop that opened them, and are closed when it shuts down
+        self.async_limits = httpx.Limits(max_connections=max_connections)
+        self.async_timeout = timeout
+        self._async_clients: weakref.WeakKeyDictionary = weakref.WeakKeyDictionary()
+
+    @staticmethod
+    def _leg(result):
+        """The first leg of a Directions result, in RoutingProvider's shape"""
+        if not result:
+            return None
+
+        route = result[0]["legs"][0]
+        return {
+            "distance_meters": route["distance"]["value"],
+            "duration_seconds": route["duration"]["value"],
+            "polyline": result[0]["overview_polyline"]["points"],
+            "start_coords": route["start_location"],
+            "end_coords": route["end_location"],
+            "bounds": result[0]["bounds"],
+        }
+
+    @staticmethod
+    def _label(results):
+        """Short "City, ST" label of the best reverse geocoding result"""
+        if not results:
+            return None
+
+        components = results[0]["address_components"]
+
+        def find(kind, name="long_name"):
+            return next((c[name] for c in components if kind in c["types"]), None)
+
+        place = find("locality") or find("administrative_area_level_2")
+        state = find("administrative_area_level_1", "short_name")
+        label = ", ".join(part for part in (place, state) if part)
+        return label or results[0].get("formatted_address")
+
+    def route(self, origin: str, destination: str):
+        """Helper to fetch directions between two points"""
+        try:
+            return self._leg(
+                self.client.directions(origin, destination, mode="driving")
+            )
+        except Exception as e:
+            logger.error("Directions error: {error}", error=e)
+            return None
+
+    def reverse_geocode(self, lat: float, lng: float):
+        """Helper to reverse geocode a point into a short "City, ST" label"""
+        try:
+            return self._label(self.client.reverse_geocode((lat, lng)))
+        except Exception as e:
+            logger.error("Reverse geocode error: {error}", error=e)
+            return None
+
+    async def _async_client(self) -> httpx.AsyncClient:
+        loop = asyncio.get_running_loop()
+        entry = self._async_clients.get(loop)
+        if entry is None:
+            client = httpx.AsyncClient(
+                limits=self.async_limits, timeout=self.async_timeout
+            )
+            # Kept with the client, as the loop only holds it weakly
+            closer = _close_with_loop(client)
+            await anext(closer)
+            entry = self._async_clients[loop] = (client, closer)
+        return entry[0]
+
+    async def _aget(self, url: str, params: dict, key: str) -> list:
+        """
+        Calls a Maps web service and returns the `key` list of its body,
+        empty when nothing matched. Requests beyond the pool's connections
+        wait for one to free up.
+        """
+        client = await self._async_client()
+        response = await client.get(url, params={**params, "key": self.api_key})
+        response.raise_for_status()
+        body = response.json()
+        if body["status"] == "ZERO_RESULTS":
+            return []
+        if body["status"] != "OK":
+            raise RuntimeError(f"{body['status']}: {body.get('error_message', '')}")
+        return body[key]
+
+    async def aroute(self, origin: str, destination: str):
+        try:
+            result = await self._aget(
+                DIRECTIONS_URL,
+                {"origin": origin, "destination": destination, "mode": "driving"},
+                "routes",
+            )
+            return self._leg(result)
+        except Exception as e:
+            logger.error("Directions error: {error}", error=e)
+            return None
+
+    async def areverse_geocode(self, lat: float, lng: float):
+        try:
+            results = await self._aget(
+                GEOCODE_URL, {"latlng": f"{lat},{lng}"}, "results"
+            )
+            return self._label(results)
+        except Exception as e:
+            logger.error("Reverse geocode error: {error}", error=e)
+            return None
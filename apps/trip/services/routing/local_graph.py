@@ -0,0 +1,185 @@
+"""
+Offline router over a prebuilt road graph (see the `build_road_graph` command).
+
+The graph directory holds compressed-sparse-row arrays, memory-mapped so
+every worker process shares the same pages:
+
+    nodes.npy      float64 (n, 2)  node (lat, lng)
+    indptr.npy     int64   (n + 1) edges of node u are indptr[u]:indptr[u + 1]
+    indices.npy    int64   (m,)    edge target node
+    lengths.npy    float32 (m,)    edge length, meters
+    durations.npy  float32 (m,)    edge travel time, seconds
+    places.json    optional {name: node} gazetteer for addresses and labels
+
+Addresses resolve either as a "lat,lng" literal (snapped to the nearest
+node) or by normalized name through the gazetteer. Paths are found with A*
+on travel time, using the straight-line distance at the graph's top speed
+as the (admissible) heuristic.
+"""
+
+import heapq
+import json
+import math
+import re
+from pathlib import Path
+
+import numpy as np
+from googlemaps.convert import encode_polyline
+from loguru import logger
+
+from apps.trip.services.geometry_service import EARTH_RADIUS_METERS
+from apps.trip.services.route_cache import normalize_address
+from apps.trip.services.routing.base import RoutingProvider
+
+# Gazetteer places further than this from a point are not used as its label
+MAX_LABEL_DISTANCE_METERS = 50_000
+
+_COORDINATES = re.compile(r"^\s*(-?\d+(?:\.\d+)?)\s*,\s*(-?\d+(?:\.\d+)?)\s*$")
+
+
+def _haversine(lat1, lng1, lat2, lng2):
+    lat1, lng1, lat2, lng2 = map(np.radians, (lat1, lng1, lat2, lng2))
+    a = (
+        np.sin((lat2 - lat1) / 2) ** 2
+        + np.cos(lat1) * np.cos(lat2) * np.sin((lng2 - lng1) / 2) ** 2
+    )
+    return 2 * EARTH_RADIUS_METERS * np.arcsin(np.sqrt(a))
+
+
+class LocalGraphRoutingProvider(RoutingProvider):
+    name = "local_graph"
+
+    def __init__(self, graph_dir: Path) -> None:
+        graph_dir = Path(graph_dir)
+        self.nodes = np.load(graph_dir / "nodes.npy", mmap_mode="r")
+        self.indptr = np.load(graph_dir / "indptr.npy", mmap_mode="r")
+        self.indices = np.load(graph_dir / "indices.npy", mmap_mode="r")
+        self.lengths = np.load(graph_dir / "lengths.npy", mmap_mode="r")
+        self.durations = np.load(graph_dir / "durations.npy", mmap_mode="r")
+
+        places_file = graph_dir / "places.json"
+        places = json.loads(places_file.read_text()) if places_file.exists() else {}
+        self.places = {normalize_address(name): node for name, node in places.items()}
+        self.place_names = list(places)
+        self.place_nodes = np.array(list(places.values()), dtype=np.int64)
+
+        # Fastest edge in the graph, so time heuristics never overestimate
+        with np.errstate(divide="ignore", invalid="ignore"):
+            speeds = np.asarray(self.lengths) / np.asarray(self.durations)
+        finite = speeds[np.isfinite(speeds)]
+        self.max_speed = float(finite.max()) if finite.size else 1.0
+
+        logger.info(
+            "Loaded road graph from {graph_dir}: {nodes} nodes, {edges} edges, "
+            "{places} places",
+            graph_dir=graph_dir,
+            nodes=len(self.nodes),
+            edges=len(self.indices),
+            places=len(self.places),
+        )
+
+    def _nearest_node(self, lat: float, lng: float) -> int:
+        return int(np.argmin(_haversine(lat, lng, self.nodes[:, 0], self.nodes[:, 1])))
+
+    def _resolve(self, address: str) -> int | None:
+        match = _COORDINATES.match(address)
+        if match:
+            return self._nearest_node(float(match[1]), float(match[2]))
+        return self.places.get(normalize_address(address))
+
+    def _shortest_path(self, source: int, target: int) -> list[int] | None:
+        """A* on travel time; returns the edge indices of the path"""
+        target_lat, target_lng = self.nodes[target]
+
+        def heuristic(node):
+            lat, lng = self.nodes[node]
+            return _haversine(lat, lng, target_lat, target_lng) / self.max_speed
+
+        best = {source: 0.0}
+        via_edge: dict[int, int] = {}
+        heap = [(heuristic(source), 0.0, source)]
+        closed = set()
+        while heap:
+            _, cost, node = heapq.heappop(heap)
+            if node == target:
+                break
+            if node in closed:
+                continue
+            closed.add(node)
+
+            start, end = int(self.indptr[node]), int(self.indptr[node + 1])
+            neighbours = self.indices[start:end].tolist()
+            times = self.durations[start:end].tolist()
+            for offset, (neighbour, time) in enumerate(
+                zip(neighbours, times, strict=True)
+            ):
+                new_cost = cost + time
+                if new_cost < best.get(neighbour, math.inf):
+                    best[neighbour] = new_cost
+                    via_edge[neighbour] = start + offset
+                    heapq.heappush(
+                        heap, (new_cost + heuristic(neighbour), new_cost, neighbour)
+                    )
+        else:
+            return None
+
+        edges = []
+        node = target
+        while node != source:
+            edge = via_edge[node]
+            edges.append(edge)
+            # The edge's source is the node whose CSR range contains it
+            node = int(np.searchsorted(self.indptr, edge, side="right")) - 1
+        return edges[::-1]
+
+    def route(self, origin: str, destination: str):
+        source, target = self._resolve(origin), self._resolve(destination)
+        if source is None or target is None:
+            logger.error(
+                "Local graph cannot resolve: {origin!r} -> {destination!r}",
+                origin=origin,
+                destination=destination,
+            )
+            return None
+
+        edges = self._shortest_path(source, target)
+        if edges is None:
+            logger.error(
+                "Local graph has no path: {origin!r} -> {destination!r}",
+                origin=origin,
+                destination=destination,
+            )
+            return None
+
+        path = [source] + [int(self.indices[edge]) for edge in edges]
+        coords = np.asarray(self.nodes[path])
+        (south, west), (north, east) = (
+            coords.min(axis=0).tolist(),
+            coords.max(axis=0).tolist(),
+        )
+        points = coords.tolist()
+        return {
+            "distance_meters": round(float(self.lengths[edges].sum())),
+            "duration_seconds": round(float(self.durations[edges].sum())),
+            "polyline": encode_polyline(points),
+            "start_coords": {"lat": points[0][0], "lng": points[0][1]},
+            "end_coords": {"lat": points[-1][0], "lng": points[-1][1]},
+            "bounds": {
+                "northeast": {"lat": north, "lng": east},
+                "southwest": {"lat": south, "lng": west},
+            },
+        }
+
+    def reverse_geocode(self, lat: float, lng: float):
+        if not self.place_names:
+            return None
+        distances = _haversine(
+            lat,
+            lng,
+            self.nodes[self.place_nodes, 0],
+            self.nodes[self.place_nodes, 1],
+        )
+        nearest = int(np.argmin(distances))
+        if distances[nearest] > MAX_LABEL_DISTANCE_METERS:
+            return None
+        return self.place_names[nearest]
@@ -0,0 +1,125 @@
+"""
+Packed, column-oriented encoding of one day's duty-status segments.
+
+Instead of a `TimeLog` row per segment, an `ELDLog` can hold its segments
+as a single blob of parallel arrays:
+
+    header   version (u8), segment count (u32)
+    status   u8 code per segment, the index into `DriverStatus.values`
+    start    u64 microseconds since the log date's midnight (UTC)
+    end      u64 microseconds since the log date's midnight (UTC)
+    location u16 index into the string table
+    remarks  u16 index into the string table
+    strings  JSON list of the distinct location / remark texts
+
+Offsets are kept at microsecond resolution so decoded segments render
+exactly as the row-backed ones do.
+"""
+
+import json
+import struct
+import sys
+from array import array
+from datetime import UTC, date, datetime, time, timedelta
+
+from apps.trip.constants import DriverStatus
+from apps.trip.services.eld_records import SegmentRecord
+
+VERSION = 1
+_HEADER = struct.Struct("<BI")
+_STATUSES = list(DriverStatus.values)
+_STATUS_CODES = {status: code for code, status in enumerate(_STATUSES)}
+
+# (typecode, attribute) of each column, in blob order
+_COLUMNS = (
+    ("B", "status"),
+    ("Q", "start"),
+    ("Q", "end"),
+    ("H", "location"),
+    ("H", "remarks"),
+)
+
+
+def _midnight(log_date: date) -> datetime:
+    return datetime.combine(log_date, time.min, tzinfo=UTC)
+
+
+def _to_little_endian(column: array) -> bytes:
+    if sys.byteorder != "little":
+        column.byteswap()
+    return column.tobytes()
+
+
+def encode(log_date: date, segments: list[SegmentRecord]) -> bytes:
+    midnight = _midnight(log_date)
+    strings: dict[str, int] = {}
+
+    def intern(text: str) -> int:
+        return strings.setdefault(text, len(strings))
+
+    def offset(dt: datetime) -> int:
+        return (dt - midnight) // timedelta(microseconds=1)
+
+    columns = {
+        "status": array("B", (_STATUS_CODES[s.status] for s in segments)),
+        "start": array("Q", (offset(s.start_time) for s in segments)),
+        "end": array("Q", (offset(s.end_time) for s in segments)),
+        "location": array("H", (intern(s.location) for s in segments)),
+        "remarks": array("H", (intern(s.remarks) for s in segments)),
+    }
+
+    return b"".join(
+        [
+            _HEADER.pack(VERSION, len(segments)),
+            *(_to_little_endian(columns[name]) for _, name in _COLUMNS),
+            json.dumps(list(strings)).encode(),
+        ]
+    )
+
+
+def decode(log_date: date, blob: bytes) -> list[SegmentRecord]:
+    version, count = _HEADER.unpack_from(blob)
+    if version != VERSION:
+        raise ValueError(f"Unsupported packed segment version: {version}")
+
+    columns = {}
+    position = _HEADER.size
+    for typecode, name in _COLUMNS:
+        column = array(typecode)
+        size = column.itemsize * count
+        column.frombytes(blob[position : position + size])
+        if sys.byteorder != "little":
+            column.byteswap()
+        columns[name] = column
+        position += size
+    strings = json.loads(bytes(blob[position:]))
+
+    midnight = _midnight(log_date)
+    return [
+        SegmentRecord(
+            date=log_date,
+            status=_STATUSES[columns["status"][i]],
+            start_time=midnight + timedelta(microseconds=columns["start"][i]),
+            end_time=midnight + timedelta(microseconds=columns["end"][i]),
+            location=strings[columns["location"][i]],
+            remarks=strings[columns["remarks"][i]],
+        )
+        for i in range(count)
+    ]
+
+
+def load_segments(eld_log) -> list[SegmentRecord]:
+    """Segments of a daily log, whichever storage mode it was written in"""
+    if eld_log.packed_segments:
+        return decode(eld_log.date, eld_log.packed_segments)
+    return [
+        SegmentRecord(
+            date=eld_log.date,
+            status=time_log.status,
+            start_time=time_log.start_time,
+            end_time=time_log.end_time,
+            location=time_log.location_text,
+            remarks=time_log.remarks,
+        )
+        for time_log in eld_log.status_changes.all()
+    ]
@@ -0,0 +1,97 @@
+from django.db.models import Count, Sum
+from django.db.models.functions import TruncDate
+
+from apps.trip.models import TripSummary
+from apps.trip.services import segment_codec
+from apps.trip.services.eld_service import EldService
+
+# Rollup `group_by` -> the column its rows are grouped on (None: one fleet row)
+GROUPS = {"driver": "driver_id", "vehicle": "vehicle_id", "day": "date", "fleet": None}
+SUMMED_FIELDS = [
+    "days",
+    "total_miles",
+    "driving_hours",
+    "on_duty_hours",
+    "off_duty_hours",
+    "sleeper_berth_hours",
+    "daily_resets",
+    "restarts",
+    "rest_breaks",
+    "fuel_stops",
+]
+# Trips replayed per bulk insert when backfilling
+BACKFILL_CHUNK_SIZE = 200
+
+
+def _rounded(value):
+    if value is None:
+        # SUM over no rows
+        return 0
+    return round(value, 2) if isinstance(value, float) else value
+
+
+class SummaryService:
+    """Fleet-wide rollups of the trips' precomputed TripSummary rows."""
+
+    @staticmethod
+    def rollup(
+        group_by: str,
+        driver_id=None,
+        vehicle_id=None,
+        started_after=None,
+        started_before=None,
+    ) -> list[dict]:
+        """
+        Sums the summaries of the trips started in the range, per driver,
+        vehicle or day: one GROUP BY over the table's (driver / vehicle,
+        started_at) indexes, however many trips it covers.
+        """
+        queryset = TripSummary.objects.all()
+        if driver_id:
+            queryset = queryset.filter(driver_id=driver_id)
+        if vehicle_id:
+            queryset = queryset.filter(vehicle_id=vehicle_id)
+        if started_after:
+            queryset = queryset.filter(started_at__gte=started_after)
+        if started_before:
+            queryset = queryset.filter(started_at__lt=started_before)
+
+        aggregates = {"trips": Count("id")} | {
+            field: Sum(field) for field in SUMMED_FIELDS
+        }
+        column = GROUPS[group_by]
+        if column is None:
+            rows = [queryset.aggregate(**aggregates)]
+        else:
+            if group_by == "day":
+                queryset = queryset.annotate(date=TruncDate("started_at"))
+            rows = queryset.values(column).annotate(**aggregates).order_by(column)
+
+        return [{name: _rounded(value) for name, value in row.items()} for row in rows]
+
+    @staticmethod
+    def backfill(trips) -> int:
+        """
+        Writes the missing summaries of already generated trips, by replaying
+        their stored logs through the HOS clocks. Returns how many it wrote.
+        """
+        written = 0
+        trips = trips.filter(summary__isnull=True, daily_logs__isnull=False)
+        chunk = []
+        for trip in trips.distinct().iterator(chunk_size=BACKFILL_CHUNK_SIZE):
+            segments = sorted(
+                (
+                    segment
+                    for eld_log in trip.daily_logs.prefetch_related("status_changes")
+                    for segment in segment_codec.load_segments(eld_log)
+                ),
+                key=lambda segment: segment.start_time,
+            )
+            service = EldService.for_trip(trip)
+            service.replay(segments)
+            chunk.append(service.summary())
+            if len(chunk) == BACKFILL_CHUNK_SIZE:
+                written += len(TripSummary.objects.bulk_create(chunk))
+                chunk = []
+        written += len(TripSummary.objects.bulk_create(chunk))
+        return written
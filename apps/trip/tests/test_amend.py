@@ -0,0 +1,122 @@
+from datetime import timedelta
+
+from rest_framework.test import APITestCase
+
+from django.urls import reverse
+
+from apps.trip.constants import DriverStatus
+from apps.trip.models import Trip
+from apps.trip.services.amend_service import AmendService
+from apps.trip.services.eld_service import (
+    DRIVING_BEFORE_BREAK_LIMIT,
+    DRIVING_HOURS_LIMIT,
+    EPSILON_HOURS,
+    EldService,
+)
+from apps.trip.services.geo_service import METERS_TO_MILES
+from apps.trip.services.segment_codec import load_segments
+from apps.trip.tests.utils import create_trip, fake_leg, fake_routing
+
+# Leg miles by destination: the first trip ends 7hr of driving after its last
+# break, and the back-to-back trip continues from there
+LEG_MILES = {"Pickup": 100, "Drop": 330, "Elsewhere": 900}
+
+
+def _leg(origin: str, destination: str) -> dict:
+    return fake_leg(origin, destination, miles=LEG_MILES[destination])
+
+
+class AmendTests(APITestCase):
+    def setUp(self):
+        routing = fake_routing(_leg)
+        routing.__enter__()
+        self.addCleanup(routing.__exit__, None, None, None)
+
+    @staticmethod
+    def _generate(driver_id: str = "DVI-AMEND") -> Trip:
+        trip = create_trip(driver_id=driver_id)
+        EldService(trip.id).generate_full_trip()
+        trip.refresh_from_db()
+        return trip
+
+    @staticmethod
+    def _segments(trip: Trip) -> list:
+        return [
+            segment
+            for eld_log in trip.daily_logs.prefetch_related("status_changes")
+            for segment in load_segments(eld_log)
+        ]
+
+    def _amend(self, trip: Trip, amended_at):
+        return self.client.post(
+            reverse("v1:trip-amend", args=[trip.id]),
+            {"drop_off_address": "Elsewhere", "amended_at": amended_at.isoformat()},
+            format="json",
+        )
+
+    def test_amends_the_rest_of_the_trip(self):
+        trip = self._generate()
+        amended_at = trip.created_at + timedelta(hours=3)
+        response = self._amend(trip, amended_at)
+        self.assertEqual(response.status_code, 200)
+
+        trip.refresh_from_db()
+        self.assertEqual(trip.drop_off_address, "Elsewhere")
+        segments = self._segments(trip)
+        self.assertEqual(segments[0].start_time, trip.created_at)
+        for previous, segment in zip(segments, segments[1:], strict=False):
+            self.assertEqual(previous.end_time, segment.start_time)
+
+    def test_amendment_before_a_back_to_back_trip_starts_is_rejected(self):
+        self._generate()
+        # Planned while the driver is on the first trip, so it starts later
+        trip = self._generate()
+        first_start = self._segments(trip)[0].start_time
+        self.assertGreater(first_start, trip.created_at)
+
+        response = self._amend(trip, trip.created_at + timedelta(hours=1))
+        self.assertEqual(response.status_code, 400)
+        self.assertEqual(response.data, {"error": "The trip has not started yet."})
+        trip.refresh_from_db()
+        self.assertEqual(self._segments(trip)[0].start_time, first_start)
+
+    def _assert_within_hos_limits(self, segments: list):
+        """Driving between breaks and between daily resets stays in limits"""
+        since_break = since_reset = resting = 0.0
+        for segment in segments:
+            hours = (segment.end_time - segment.start_time).total_seconds() / 3600
+            if segment.status == DriverStatus.DRIVING:
+                since_break += hours
+                since_reset += hours
+                self.assertLessEqual(
+                    since_break, DRIVING_BEFORE_BREAK_LIMIT + EPSILON_HOURS
+                )
+                self.assertLessEqual(since_reset, DRIVING_HOURS_LIMIT + EPSILON_HOURS)
+            if segment.status in (DriverStatus.OFF_DUTY, DriverStatus.SLEEPER_BERTH):
+                resting += hours
+                if resting >= 0.5 - EPSILON_HOURS:
+                    since_break = 0.0
+                if resting >= 10 - EPSILON_HOURS:
+                    since_reset = 0.0
+            else:
+                resting = 0.0
+
+    def test_amended_back_to_back_trip_keeps_the_inherited_clocks(self):
+        first = self._generate()
+        trip = self._generate()
+        self._assert_within_hos_limits(self._segments(first) + self._segments(trip))
+
+        # Amended a few minutes into the trip, before the break it owes
+        amended_at = self._segments(trip)[0].start_time + timedelta(minutes=40)
+        self.assertEqual(self._amend(trip, amended_at).status_code, 200)
+        self._assert_within_hos_limits(self._segments(first) + self._segments(trip))
+
+    def test_metrics_of_a_trip_without_miles(self):
+        metrics = {"total_miles": 0, "raw_seconds": 0}
+        leg = fake_leg("Pickup", "Elsewhere", miles=120)
+        amended = AmendService._metrics(metrics, 0, 0, leg)
+        self.assertAlmostEqual(amended["total_miles"], 120)
+        self.assertEqual(amended["raw_seconds"], leg["duration_seconds"])
+        self.assertAlmostEqual(
+            amended["raw_meters"], leg["distance_meters"], delta=1 / METERS_TO_MILES
+        )
@@ -0,0 +1,82 @@
+from unittest import mock
+
+from django.test import TestCase, override_settings
+
+from apps.trip.constants import GenerationStage
+from apps.trip.models import Trip
+from apps.trip.serializers import TripSummarySerializer
+from apps.trip.services.eld_service import EldService
+from apps.trip.services.segment_codec import load_segments
+from apps.trip.tests.utils import create_trip, fake_leg, fake_routing
+
+
+def _long_leg(origin: str, destination: str) -> dict:
+    # Long enough legs that the pickup is reached days into the trip
+    return fake_leg(origin, destination, miles=1400)
+
+
+class CheckpointResumeTests(TestCase):
+    """A generation resumed from its checkpoint ends as an uninterrupted one"""
+
+    def setUp(self):
+        routing = fake_routing(_long_leg)
+        routing.__enter__()
+        self.addCleanup(routing.__exit__, None, None, None)
+
+    @staticmethod
+    def _generated(trip: Trip) -> tuple:
+        trip.refresh_from_db()
+        days = [
+            (eld_log.date, eld_log.total_miles, load_segments(eld_log))
+            for eld_log in trip.daily_logs.prefetch_related("status_changes")
+        ]
+        return days, TripSummarySerializer(trip.summary).data
+
+    def _resumed_after(self, stage: GenerationStage, interrupted: str) -> Trip:
+        trip = create_trip(driver_id=f"DVI-{stage}")
+        with mock.patch.object(
+            EldService, interrupted, side_effect=RuntimeError("Worker died")
+        ):
+            with self.assertRaises(RuntimeError):
+                EldService(trip.id).generate_full_trip()
+        trip.refresh_from_db()
+        self.assertEqual(trip.checkpoint["stage"], stage)
+
+        EldService(trip.id).generate_full_trip()
+        trip.refresh_from_db()
+        self.assertEqual(trip.checkpoint["stage"], GenerationStage.DONE)
+        return trip
+
+    def _assert_same_as_uninterrupted(self, resumed: Trip):
+        trip = create_trip(driver_id="DVI-UNINTERRUPTED")
+        EldService(trip.id).generate_full_trip()
+        expected_days, expected_summary = self._generated(trip)
+        days, summary = self._generated(resumed)
+
+        self.assertGreater(len(expected_days), 3)
+        self.assertEqual(days, expected_days)
+        self.assertEqual(summary, expected_summary)
+
+    def test_resume_after_routing(self):
+        resumed = self._resumed_after(GenerationStage.ROUTED, "_to_pickup")
+        self._assert_same_as_uninterrupted(resumed)
+
+    def test_resume_after_loading(self):
+        resumed = self._resumed_after(GenerationStage.LOADED, "_to_drop_off")
+        # The days up to the pickup were saved before the interruption
+        self.assertTrue(resumed.daily_logs.exists())
+        self._assert_same_as_uninterrupted(resumed)
+
+    @override_settings(ELD_SEGMENT_STORAGE="packed")
+    def test_resume_after_loading_with_packed_segments(self):
+        resumed = self._resumed_after(GenerationStage.LOADED, "_to_drop_off")
+        self._assert_same_as_uninterrupted(resumed)
+
+    def test_generated_trip_is_not_generated_again(self):
+        trip = create_trip()
+        EldService(trip.id).generate_full_trip()
+        expected = self._generated(trip)
+        with mock.patch.object(EldService, "_pre_trip") as pre_trip:
+            EldService(trip.id).generate_full_trip()
+        pre_trip.assert_not_called()
+        self.assertEqual(self._generated(trip), expected)
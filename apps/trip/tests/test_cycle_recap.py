@@ -0,0 +1,115 @@
+from datetime import date, timedelta
+
+from django.test import SimpleTestCase, TestCase
+
+from apps.trip.constants import DriverStatus
+from apps.trip.services.eld_records import CycleRecap
+from apps.trip.services.eld_service import (
+    CYCLE_DAYS,
+    EPSILON_HOURS,
+    ON_DUTY_CYCLE_LIMIT,
+    EldService,
+)
+from apps.trip.tests.utils import create_trip
+
+MONDAY = date(2026, 1, 5)
+
+
+class CycleRecapTests(SimpleTestCase):
+    def _recap(self, hours_per_day: list[float]) -> CycleRecap:
+        recap = CycleRecap(MONDAY, days=CYCLE_DAYS)
+        for offset, hours in enumerate(hours_per_day):
+            recap.add(MONDAY + timedelta(days=offset), hours)
+        return recap
+
+    def test_window_rolls_forward_one_day_at_a_time(self):
+        recap = self._recap([10] * CYCLE_DAYS)
+        last_day = MONDAY + timedelta(days=CYCLE_DAYS - 1)
+        self.assertEqual(recap.used(last_day), 80)
+        # Each later day drops the oldest day of the window
+        self.assertEqual(recap.used(last_day + timedelta(days=1)), 70)
+        self.assertEqual(recap.used(last_day + timedelta(days=3)), 50)
+        # Reading ahead does not move the window; recording does
+        recap.add(last_day + timedelta(days=1), 4)
+        self.assertEqual(recap.used(last_day + timedelta(days=1)), 74)
+        self.assertEqual(recap.used(last_day + timedelta(days=2)), 64)
+
+    def test_window_is_empty_after_a_cycle_of_days_off(self):
+        recap = self._recap([10] * 3)
+        later = MONDAY + timedelta(days=2 + CYCLE_DAYS)
+        self.assertEqual(recap.used(later), 0)
+        recap.add(later, 6)
+        self.assertEqual(recap.used(later), 6)
+
+    def test_hours_before_the_window_do_not_count(self):
+        recap = self._recap([0] * CYCLE_DAYS)
+        recap.add(MONDAY - timedelta(days=1), 12)
+        recap.add(MONDAY, 5)
+        self.assertEqual(recap.used(MONDAY + timedelta(days=CYCLE_DAYS - 1)), 5)
+
+    def test_restart_resets_the_cycle(self):
+        recap = self._recap([11] * 6)
+        last_day = MONDAY + timedelta(days=5)
+        recap.restart()
+        self.assertEqual(recap.used(last_day), 0)
+        # Hours after the restart count from zero, and keep rolling
+        recap.add(last_day + timedelta(days=1), 8)
+        self.assertEqual(recap.used(last_day + timedelta(days=1)), 8)
+        self.assertEqual(recap.used(last_day + timedelta(days=1 + CYCLE_DAYS)), 0)
+
+    def test_state_round_trip(self):
+        recap = self._recap([3, 0, 7.5, 11])
+        restored = CycleRecap.from_state(recap.to_state())
+        for offset in range(CYCLE_DAYS + 4):
+            day = MONDAY + timedelta(days=offset)
+            self.assertEqual(restored.used(day), recap.used(day))
+
+
+class CycleLimitTests(TestCase):
+    """Simulated trips never go over the 70hr/8day cycle"""
+
+    @staticmethod
+    def _simulate(miles: float, initial_cycle_hours: float) -> EldService:
+        trip = create_trip(initial_cycle_hours=initial_cycle_hours)
+        service = EldService.for_trip(trip)
+        service.simulate_trip({"to_pickup_miles": 0, "to_drop_off_miles": miles})
+        return service
+
+    def _assert_within_cycle(self, service: EldService):
+        # Replays the segments into a recap of their own, like an inspector
+        start = service.started_at.date()
+        recap = CycleRecap(start, days=CYCLE_DAYS)
+        recap.add(start - timedelta(days=1), service.trip.initial_cycle_hours)
+        for segment in service.segments:
+            if segment.remarks == "34hr Restart":
+                recap.restart()
+            if segment.status in (DriverStatus.DRIVING, DriverStatus.ON_DUTY):
+                hours = (segment.end_time - segment.start_time).total_seconds() / 3600
+                recap.add(segment.date, hours)
+                self.assertLessEqual(
+                    recap.used(segment.date), ON_DUTY_CYCLE_LIMIT + EPSILON_HOURS
+                )
+
+    @staticmethod
+    def _remarks(service: EldService) -> set[str]:
+        return {segment.remarks for segment in service.segments}
+
+    def test_long_trip_with_hours_left_needs_no_restart(self):
+        service = self._simulate(1500, initial_cycle_hours=0)
+        self.assertNotIn("34hr Restart", self._remarks(service))
+        self._assert_within_cycle(service)
+
+    def test_restart_when_the_cycle_would_be_exceeded(self):
+        service = self._simulate(1500, initial_cycle_hours=68)
+        self.assertEqual(service.summary().restarts, 1)
+        restart = next(s for s in service.segments if s.remarks == "34hr Restart")
+        # Taken as soon as the cycle runs out, not when its hours roll off
+        self.assertLess(restart.start_time - service.started_at, timedelta(days=1))
+        self._assert_within_cycle(service)
+
+    def test_cycle_rolls_forward_over_a_long_trip(self):
+        # Eight days of driving: the first days' hours roll out of the window
+        service = self._simulate(7000, initial_cycle_hours=0)
+        days = (service.current_time - service.started_at).days
+        self.assertGreaterEqual(days, CYCLE_DAYS)
+        self._assert_within_cycle(service)
@@ -0,0 +1,40 @@
+from asgiref.sync import sync_to_async
+
+from django.test import TestCase
+from django.urls import reverse
+
+from apps.trip.tests.utils import plan_trip
+
+
+class ExportTests(TestCase):
+    def setUp(self):
+        plan_trip(2500, driver_id="DVI-EXPORT")
+        plan_trip(300, driver_id="DVI-OTHER")
+
+    def _url(self, output: str) -> str:
+        return f"{reverse('v1:trip-export')}?driver_id=DVI-EXPORT&output={output}"
+
+    def _export(self, output: str) -> str:
+        response = self.client.get(self._url(output))
+        self.assertEqual(response.status_code, 200)
+        self.assertFalse(response.is_async)
+        return b"".join(response.streaming_content).decode()
+
+    async def _aexport(self, output: str) -> str:
+        response = await self.async_client.get(self._url(output))
+        self.assertEqual(response.status_code, 200)
+        # Streamed as it is built, not read whole before the first byte
+        self.assertTrue(response.is_async)
+        return b"".join([part async for part in response.streaming_content]).decode()
+
+    def test_csv_lists_each_segment_of_the_driver(self):
+        lines = self._export("csv").splitlines()
+        self.assertTrue(lines[0].startswith("driver_id,vehicle_id,trip_id,date"))
+        self.assertGreater(len(lines), 20)
+        self.assertTrue(all(line.startswith("DVI-EXPORT,") for line in lines[1:]))
+
+    async def test_asgi_export_streams_the_same_body(self):
+        for output in ("csv", "ndjson", "sheets"):
+            with self.subTest(output=output):
+                expected = await sync_to_async(self._export)(output)
+                self.assertEqual(await self._aexport(output), expected)
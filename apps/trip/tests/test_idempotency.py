@@ -0,0 +1,116 @@
+import threading
+from concurrent.futures import ThreadPoolExecutor, wait
+
+from rest_framework.test import APITestCase
+
+from django.db import connection
+from django.test import TransactionTestCase, override_settings
+from django.urls import reverse
+
+from apps.trip.models import IdempotencyKey, Trip
+from apps.trip.services.idempotency_service import IdempotencyService
+from apps.trip.tests.utils import fake_routing
+
+TRIP = {
+    "start_address": "Start",
+    "pickup_address": "Pickup",
+    "drop_off_address": "Drop",
+    "initial_cycle_hours": 0,
+}
+
+
+class IdempotentCreateTests(APITestCase):
+    def setUp(self):
+        routing = fake_routing()
+        routing.__enter__()
+        self.addCleanup(routing.__exit__, None, None, None)
+
+    def _create(self, data: dict, key: str = "trip-1"):
+        return self.client.post(
+            reverse("v1:trip-list"), data, format="json", HTTP_IDEMPOTENCY_KEY=key
+        )
+
+    def test_retry_with_the_same_body_is_replayed(self):
+        first = self._create(TRIP)
+        self.assertEqual(first.status_code, 201)
+        self.assertNotIn("Idempotent-Replayed", first)
+
+        retry = self._create(TRIP)
+        self.assertEqual(retry.status_code, 201)
+        self.assertEqual(retry["Idempotent-Replayed"], "true")
+        self.assertEqual(retry.data, first.data)
+        self.assertEqual(Trip.objects.count(), 1)
+
+    def test_same_key_with_a_different_body_is_refused(self):
+        self._create(TRIP)
+        response = self._create({**TRIP, "drop_off_address": "Elsewhere"})
+        self.assertEqual(response.status_code, 422)
+        self.assertEqual(Trip.objects.count(), 1)
+
+    def test_other_keys_create_other_trips(self):
+        self._create(TRIP, key="trip-1")
+        self._create(TRIP, key="trip-2")
+        self.assertEqual(Trip.objects.count(), 2)
+
+    def test_failed_request_is_run_again(self):
+        failed = self._create({**TRIP, "start_address": ""})
+        self.assertEqual(failed.status_code, 400)
+        self.assertFalse(IdempotencyKey.objects.exists())
+        self.assertEqual(self._create(TRIP).status_code, 201)
+
+
+class InFlightTests(TransactionTestCase):
+    """Retries that arrive while the first request is still being computed"""
+
+    KEY = "in-flight"
+    FINGERPRINT = IdempotencyService.fingerprint("POST", "/v1/trips/", TRIP)
+
+    def setUp(self):
+        self.started, self.release = threading.Event(), threading.Event()
+        self.executor = ThreadPoolExecutor(max_workers=2)
+        self.addCleanup(self.executor.shutdown)
+        self.addCleanup(self.release.set)
+
+    def _first(self):
+        def compute():
+            self.started.set()
+            self.release.wait(5)
+            return 201, {"id": 1}
+
+        return self._run(compute)
+
+    def _run(self, compute):
+        try:
+            return IdempotencyService.run(self.KEY, self.FINGERPRINT, compute)
+        finally:
+            connection.close()
+
+    def _retry(self):
+        def compute():
+            raise AssertionError("The retry must not run the request again")
+
+        return self._run(compute)
+
+    def test_retry_waits_for_the_first_response(self):
+        first = self.executor.submit(self._first)
+        self.assertTrue(self.started.wait(5))
+        retry = self.executor.submit(self._retry)
+        # Still waiting on the first request
+        done, _ = wait([retry], timeout=0.3)
+        self.assertFalse(done)
+
+        self.release.set()
+        self.assertEqual(first.result(5), (201, {"id": 1}, False))
+        self.assertEqual(retry.result(5), (201, {"id": 1}, True))
+
+    @override_settings(IDEMPOTENCY_WAIT_SECONDS=0)
+    def test_retry_gives_up_while_the_first_is_in_progress(self):
+        first = self.executor.submit(self._first)
+        self.assertTrue(self.started.wait(5))
+
+        status_code, _, replayed = self.executor.submit(self._retry).result(5)
+        self.assertEqual(status_code, 409)
+        self.assertFalse(replayed)
+
+        self.release.set()
+        self.assertEqual(first.result(5)[0], 201)
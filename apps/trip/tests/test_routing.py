@@ -0,0 +1,34 @@
+import asyncio
+
+from asgiref.sync import async_to_sync
+
+from django.test import SimpleTestCase
+
+from apps.trip.services.routing.google import GoogleRoutingProvider
+
+
+class GoogleAsyncClientTests(SimpleTestCase):
+    """The pooled async HTTP clients live and die with their event loop"""
+
+    def setUp(self):
+        self.provider = GoogleRoutingProvider(api_key="AIza-test", pool_size=1)
+
+    def test_one_client_per_loop(self):
+        async def clients():
+            return await self.provider._async_client(), (
+                await self.provider._async_client()
+            )
+
+        first, again = asyncio.run(clients())
+        self.assertIs(first, again)
+        self.assertIsNot(asyncio.run(clients())[0], first)
+
+    def test_client_is_closed_when_its_loop_shuts_down(self):
+        async def client():
+            client = await self.provider._async_client()
+            self.assertFalse(client.is_closed)
+            return client
+
+        self.assertTrue(asyncio.run(client()).is_closed)
+        # Also for the loops async_to_sync runs async views on under WSGI
+        self.assertTrue(async_to_sync(client)().is_closed)
@@ -0,0 +1,98 @@
+import dataclasses
+from datetime import UTC, date, datetime, timedelta
+
+from rest_framework.test import APITestCase
+
+from django.test import SimpleTestCase, override_settings
+from django.urls import reverse
+
+from apps.trip.constants import DriverStatus
+from apps.trip.services import segment_codec
+from apps.trip.services.eld_records import SegmentRecord
+from apps.trip.tests.utils import plan_trip
+
+LOG_DATE = date(2026, 1, 5)
+MIDNIGHT = datetime(2026, 1, 5, tzinfo=UTC)
+
+
+def _segment(status, start_hours, end_hours, location="", remarks=""):
+    return SegmentRecord(
+        date=LOG_DATE,
+        status=status,
+        start_time=MIDNIGHT + timedelta(hours=start_hours),
+        end_time=MIDNIGHT + timedelta(hours=end_hours),
+        location=location,
+        remarks=remarks,
+    )
+
+
+class SegmentCodecTests(SimpleTestCase):
+    def _round_trip(self, segments):
+        return segment_codec.decode(LOG_DATE, segment_codec.encode(LOG_DATE, segments))
+
+    def test_round_trips_every_status(self):
+        segments = [
+            _segment(status, i, i + 1, location=f"Place {i}", remarks=status.label)
+            for i, status in enumerate(DriverStatus)
+        ]
+        self.assertEqual(self._round_trip(segments), segments)
+
+    def test_round_trips_segments_up_to_and_across_midnight(self):
+        segments = [
+            # From the previous day's reset, and to the end of the day
+            _segment(DriverStatus.OFF_DUTY, 0, 6, remarks="10hr Daily Reset"),
+            _segment(DriverStatus.DRIVING, 6, 24),
+            # Not split at midnight: the offset outgrows the day
+            _segment(DriverStatus.SLEEPER_BERTH, 24, 34),
+        ]
+        self.assertEqual(self._round_trip(segments), segments)
+
+    def test_keeps_microseconds_and_shared_texts(self):
+        segments = [
+            _segment(DriverStatus.DRIVING, 1, 2.123456789, location="Dallas, TX"),
+            _segment(DriverStatus.ON_DUTY, 2.123456789, 3, location="Dallas, TX"),
+            _segment(DriverStatus.DRIVING, 3, 4, location="Tulsa, OK"),
+        ]
+        decoded = self._round_trip(segments)
+        self.assertEqual(decoded, segments)
+        self.assertEqual(decoded[0].end_time, segments[1].start_time)
+
+    def test_round_trips_an_empty_day(self):
+        self.assertEqual(self._round_trip([]), [])
+
+    def test_odometer_is_not_stored(self):
+        # Only used to place segments on the map before they are saved
+        segment = dataclasses.replace(
+            _segment(DriverStatus.DRIVING, 1, 2, location="Dallas, TX"),
+            odometer=123.4,
+        )
+        self.assertEqual(
+            self._round_trip([segment]), [dataclasses.replace(segment, odometer=0.0)]
+        )
+
+    def test_rejects_unknown_versions(self):
+        blob = bytearray(segment_codec.encode(LOG_DATE, []))
+        blob[0] = segment_codec.VERSION + 1
+        with self.assertRaises(ValueError):
+            segment_codec.decode(LOG_DATE, bytes(blob))
+
+
+class PackedStorageTests(APITestCase):
+    """A trip reads the same whichever storage mode its logs were saved in"""
+
+    def _detail(self, storage: str) -> dict:
+        with override_settings(ELD_SEGMENT_STORAGE=storage):
+            trip = plan_trip(2500, to_pickup_miles=300)
+        self.assertEqual(
+            trip.daily_logs.filter(packed_segments__isnull=False).exists(),
+            storage == "packed",
+        )
+        response = self.client.get(reverse("v1:trip-detail", args=[trip.id]))
+        self.assertEqual(response.status_code, 200)
+        return response.data
+
+    def test_packed_logs_match_rows(self):
+        rows, packed = self._detail("rows"), self._detail("packed")
+        self.assertGreater(len(rows["daily_logs"]), 3)
+        self.assertEqual(packed["daily_logs"], rows["daily_logs"])
+        self.assertEqual(packed["summary"], rows["summary"])
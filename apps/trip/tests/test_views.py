@@ -0,0 +1,84 @@
+from rest_framework.test import APITestCase
+
+from django.core.cache import cache
+from django.db import connection
+from django.test.utils import CaptureQueriesContext
+from django.urls import reverse
+
+from apps.trip.models import Trip
+from apps.trip.tests.utils import TRIP_START, plan_trip
+
+
+class TripQueryCountTests(APITestCase):
+    """The trip endpoints cost the same number of queries however long the trip"""
+
+    def setUp(self):
+        self.short_trip = plan_trip(100, driver_id="DVI-SHORT")
+        self.long_trip = plan_trip(2500, driver_id="DVI-LONG")
+        self.assertEqual(self.short_trip.daily_logs.count(), 1)
+        self.assertGreater(self.long_trip.daily_logs.count(), 3)
+
+    def _get(self, url: str):
+        # Details are cached per version; every request here has to build them
+        cache.clear()
+        response = self.client.get(url)
+        self.assertEqual(response.status_code, 200)
+        return response
+
+    def _count_queries(self, url: str) -> int:
+        with CaptureQueriesContext(connection) as queries:
+            self._get(url)
+        return len(queries)
+
+    def test_retrieve_query_count_is_constant(self):
+        expected = self._count_queries(
+            reverse("v1:trip-detail", args=[self.short_trip.id])
+        )
+        with self.assertNumQueries(expected):
+            response = self._get(reverse("v1:trip-detail", args=[self.long_trip.id]))
+        self.assertGreater(len(response.data["daily_logs"]), 3)
+
+    def test_list_query_count_is_constant(self):
+        url = reverse("v1:trip-list")
+        expected = self._count_queries(f"{url}?driver_id=DVI-SHORT")
+        with self.assertNumQueries(expected):
+            response = self._get(f"{url}?driver_id=DVI-LONG")
+        self.assertEqual(len(response.data["results"]), 1)
+
+
+class TripPaginationTests(APITestCase):
+    """The trip list pages by (created_at, id), across trips created together"""
+
+    def setUp(self):
+        Trip.objects.bulk_create(
+            Trip(start_address=f"Start {i}", pickup_address="Pickup") for i in range(5)
+        )
+        # All at the same instant, like a batch
+        Trip.objects.update(created_at=TRIP_START)
+        self.ids = list(Trip.objects.order_by("-id").values_list("id", flat=True))
+
+    def _page(self, url: str):
+        response = self.client.get(url)
+        self.assertEqual(response.status_code, 200)
+        return [trip["id"] for trip in response.data["results"]], response.data
+
+    def test_pages_forward_and_back_without_gaps(self):
+        ids, data = self._page(f"{reverse('v1:trip-list')}?page_size=2")
+        self.assertIsNone(data["previous"])
+        seen, pages = ids, [data]
+        while data["next"]:
+            ids, data = self._page(data["next"])
+            seen += ids
+            pages.append(data)
+        self.assertEqual(seen, self.ids)
+        self.assertEqual(len(pages), 3)
+
+        ids, data = self._page(pages[-1]["previous"])
+        self.assertEqual(ids, self.ids[2:4])
+        ids, data = self._page(data["previous"])
+        self.assertEqual(ids, self.ids[:2])
+        self.assertIsNone(data["previous"])
+
+    def test_invalid_cursor_is_not_found(self):
+        response = self.client.get(f"{reverse('v1:trip-list')}?cursor=cD1ub3BlCg==")
+        self.assertEqual(response.status_code, 404)
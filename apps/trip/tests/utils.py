@@ -0,0 +1,77 @@
+from contextlib import ExitStack, contextmanager
+from datetime import UTC, datetime
+from unittest import mock
+
+from apps.trip.models import Trip
+from apps.trip.services.eld_service import EldService
+from apps.trip.services.geo_service import METERS_TO_MILES, GeoService
+from apps.trip.services.route_cache import RouteCache
+
+# Trips start in the morning, so a short one fits in one day
+TRIP_START = datetime(2026, 1, 5, 6, tzinfo=UTC)
+
+
+def create_trip(created_at: datetime = TRIP_START, **fields) -> Trip:
+    """An unplanned trip, as if created at `created_at`"""
+    trip = Trip.objects.create(
+        start_address="Start",
+        pickup_address="Pickup",
+        drop_off_address="Drop",
+        **fields,
+    )
+    Trip.objects.filter(id=trip.id).update(created_at=created_at)
+    trip.refresh_from_db()
+    return trip
+
+
+def plan_trip(miles: float, to_pickup_miles: float = 0, **fields) -> Trip:
+    """A trip with its logs simulated and saved, without routing it"""
+    trip = create_trip(**fields)
+    service = EldService.for_trip(trip)
+    service.simulate_trip(
+        {"to_pickup_miles": to_pickup_miles, "to_drop_off_miles": miles}
+    )
+    service.persist()
+    return trip
+
+
+def fake_leg(origin: str, destination: str, miles: float = 500) -> dict:
+    """A leg `miles` long at 60 mph, along the same three-point polyline"""
+    return {
+        "distance_meters": miles / METERS_TO_MILES,
+        "duration_seconds": miles * 60,
+        # (38.5, -120.2) -> (40.7, -120.95) -> (43.252, -126.453)
+        "polyline": "_p~iF~ps|U_ulLnnqC_mqNvxq`@",
+        "start_coords": {"lat": 38.5, "lng": -120.2},
+        "end_coords": {"lat": 43.252, "lng": -126.453},
+        "bounds": {},
+    }
+
+
+@contextmanager
+def fake_routing(route=fake_leg):
+    """
+    Routes and reverse-geocodes without calling the routing provider. The
+    in-process caches start empty, so no leg is kept from another test.
+    """
+    with ExitStack() as stack:
+        for name in ("cache", "geocode_cache"):
+            cache = getattr(GeoService, name)
+            stack.enter_context(
+                mock.patch.object(
+                    GeoService,
+                    name,
+                    RouteCache(cache.ttl, cache.max_entries, cache.namespace),
+                )
+            )
+        stack.enter_context(
+            mock.patch.object(GeoService.provider, "route", side_effect=route)
+        )
+        stack.enter_context(
+            mock.patch.object(
+                GeoService.provider,
+                "reverse_geocode",
+                side_effect=lambda lat, lng: f"Town {lat:.1f},{lng:.1f}",
+            )
+        )
+        yield
@@ -1,5 +1,6 @@
 from rest_framework import routers
 
+from django.conf import settings
 from django.urls import include, path
 
 from apps.trip import views
@@ -11,7 +12,20 @@ API_VERSION = "v1"
 trip = routers.DefaultRouter()
 trip.register(r"trips", viewset=views.TripViewSet, basename="trip")
 
+# With ASYNC_TRIP_VIEWS, the async views take the list and detail routes
+async_routes = (
+    [
+        path("trips/", views.trip_list, name="trip-list"),
+        path("trips/<int:pk>/", views.trip_detail, name="trip-detail"),
+    ]
+    if settings.ASYNC_TRIP_VIEWS
+    else []
+)
+
 # urlpatterns
 urlpatterns = [
-    path(f"{API_VERSION}/", include((trip.urls, "trip"), namespace=API_VERSION)),
+    path(
+        f"{API_VERSION}/",
+        include(([*async_routes, *trip.urls], "trip"), namespace=API_VERSION),
+    ),
 ]
@@ -1,35 +1,558 @@
+from datetime import datetime, time, timedelta
+
+from asgiref.sync import sync_to_async
 from loguru import logger
 from rest_framework import status, viewsets
+from rest_framework.decorators import action
+from rest_framework.exceptions import ValidationError
+from rest_framework.negotiation import BaseContentNegotiation
 from rest_framework.response import Response
 
+from django.conf import settings
+from django.core.cache import cache
+from django.core.handlers.asgi import ASGIRequest
+from django.http import Http404, StreamingHttpResponse
+from django.utils import timezone
+from django.utils.cache import get_conditional_response, patch_cache_control
+from django.utils.dateparse import parse_date, parse_datetime
+from django.utils.http import http_date, quote_etag
+from django.views.decorators.csrf import csrf_exempt
+
+from apps.trip.constants import JobStatus
 from apps.trip.models import Trip
-from apps.trip.serializers import TripDetailSerializer, TripListSerializer
+from apps.trip.pagination import TripCursorPagination
+from apps.trip.serializers import (
+    TripAmendSerializer,
+    TripDetailSerializer,
+    TripJobSerializer,
+    TripListSerializer,
+    TripSpecSerializer,
+)
+from apps.trip.services.amend_service import AmendService
+from apps.trip.services.batch_service import BatchService
 from apps.trip.services.eld_service import EldService
+from apps.trip.services.export_service import ExportService
+from apps.trip.services.geometry_service import GeometryService
+from apps.trip.services.idempotency_service import IdempotencyService
+from apps.trip.services.job_service import JobService
+from apps.trip.services.summary_service import GROUPS, SummaryService
+
+
+def _parse_created_bound(name: str, value: str, end_of_day: bool = False):
+    """
+    Parses an ISO date or datetime for the created_at / started_at range
+    filters. A bare date becomes midnight (or the following midnight for an
+    inclusive upper bound), so the filter stays a plain range scan on the
+    index.
+    """
+    day = parse_date(value)
+    if day is not None:
+        if end_of_day:
+            day += timedelta(days=1)
+        parsed = datetime.combine(day, time.min)
+    else:
+        parsed = parse_datetime(value)
+        if parsed is None:
+            raise ValidationError({name: "Expected an ISO 8601 date or datetime."})
+    if timezone.is_naive(parsed):
+        parsed = timezone.make_aware(parsed)
+    return parsed
+
+
+def _parse_date_param(params, name: str):
+    if not params.get(name):
+        return None
+    day = parse_date(params[name])
+    if day is None:
+        raise ValidationError({name: "Expected an ISO 8601 date."})
+    return day
+
+
+def _field_names(data) -> list:
+    """The field names of a request body, logged instead of its addresses"""
+    return sorted(data) if isinstance(data, dict) else []
+
+
+class _ExportNegotiation(BaseContentNegotiation):
+    """The export's format comes from `output`, whatever the Accept header"""
+
+    def select_parser(self, request, parsers):
+        return parsers[0]
+
+    def select_renderer(self, request, renderers, format_suffix=None):
+        return renderers[0], renderers[0].media_type
+
+
+# Export `output` -> (line generator, content type, file extension)
+EXPORT_FORMATS = {
+    "csv": (ExportService.csv_lines, "text/csv", "csv"),
+    "ndjson": (ExportService.ndjson_lines, "application/x-ndjson", "ndjson"),
+    "sheets": (ExportService.sheet_lines, "text/html; charset=utf-8", None),
+}
+
+
+def _version(trip: Trip) -> str:
+    """Changes whenever the trip or its logs are written (see `updated_at`)"""
+    return f"{trip.id}-{int(trip.updated_at.timestamp() * 1_000_000)}"
+
+
+def _validators(trip: Trip) -> tuple[str, int]:
+    return quote_etag(_version(trip)), int(trip.updated_at.timestamp())
+
+
+def _with_validators(response, etag: str, last_modified: int):
+    response["ETag"] = etag
+    response["Last-Modified"] = http_date(last_modified)
+    # Clients may keep a copy, but must revalidate it before each use
+    patch_cache_control(response, no_cache=True)
+    return response
+
+
+def _conditional(request, trip: Trip, respond):
+    """
+    Answers a GET for one version of a trip: 304 if the client already has
+    it (per If-None-Match / If-Modified-Since), else `respond()`. Either
+    way the response carries the version's validators.
+    """
+    etag, last_modified = _validators(trip)
+    response = get_conditional_response(request, etag=etag, last_modified=last_modified)
+    if response is None:
+        response = respond()
+    return _with_validators(response, etag, last_modified)
+
+
+def _filter_trips(queryset, params):
+    """The trip list's driver_id / vehicle_id / created_* filters"""
+    for field in ("driver_id", "vehicle_id"):
+        if params.get(field):
+            queryset = queryset.filter(**{field: params[field]})
+
+    if params.get("created_after"):
+        queryset = queryset.filter(
+            created_at__gte=_parse_created_bound(
+                "created_after", params["created_after"]
+            )
+        )
+    if params.get("created_before"):
+        queryset = queryset.filter(
+            created_at__lt=_parse_created_bound(
+                "created_before", params["created_before"], end_of_day=True
+            )
+        )
+    return queryset
 
 
 class TripViewSet(viewsets.ModelViewSet):
-    queryset = Trip.objects.all().order_by("-created_at")
+    queryset = Trip.objects.all().order_by("-created_at", "-id")
+    pagination_class = TripCursorPagination
+
+    def get_queryset(self):
+        queryset = super().get_queryset()
+        if self.action == "retrieve":
+            # Enough for the validators; the log tree is only loaded (or read
+            # from the cache) when the client's copy is stale
+            return queryset.only("id", "updated_at")
+        if self.action == "list":
+            # Skip the metrics / route_geometry blobs the list never shows
+            return _filter_trips(queryset, self.request.query_params).only(
+                *TripListSerializer.Meta.fields
+            )
+        if self.action == "job_status":
+            return queryset.select_related("job")
+        if self.action == "geometry":
+            return queryset.only(
+                "id", "updated_at", "route_geometry", "geometry_levels"
+            )
+        return queryset
 
     def get_serializer_class(self):
         if self.action == "retrieve":
             return TripDetailSerializer
+        if self.action == "create":
+            return TripSpecSerializer
         return TripListSerializer
 
+    def retrieve(self, request, *args, **kwargs):
+        trip = self.get_object()
+        return _conditional(request, trip, lambda: Response(self._detail_data(trip)))
+
+    @staticmethod
+    def _detail_data(trip: Trip) -> dict:
+        """
+        The serialized trip with its log tree, cached per version: a write
+        bumps `updated_at`, so stale entries are never read again and just
+        expire.
+        """
+        key = f"trip-detail:{_version(trip)}"
+        data = cache.get(key)
+        if data is None:
+            # Two extra queries for the whole log tree, however long the trip
+            trip = (
+                Trip.objects.select_related("summary")
+                .prefetch_related("daily_logs__status_changes")
+                .get(id=trip.id)
+            )
+            data = dict(TripDetailSerializer(trip).data)
+            cache.set(
+                f"trip-detail:{_version(trip)}",
+                data,
+                settings.TRIP_DETAIL_CACHE_SECONDS,
+            )
+        return data
+
+    def _idempotent(self, request, handler):
+        """
+        Runs `handler` once per `Idempotency-Key` header value, if one is
+        given: retries get the stored response, concurrent ones wait for it.
+        """
+        key = request.headers.get("Idempotency-Key")
+        if not key:
+            return handler(request)
+        if len(key) > 255:
+            return Response(
+                {"error": "Idempotency-Key is limited to 255 characters."},
+                status=status.HTTP_400_BAD_REQUEST,
+            )
+
+        def compute():
+            response = handler(request)
+            return response.status_code, response.data
+
+        status_code, data, replayed = IdempotencyService.run(
+            key,
+            IdempotencyService.fingerprint(
+                request.method, request.get_full_path(), request.data
+            ),
+            compute,
+        )
+        response = Response(data, status=status_code)
+        if replayed:
+            response["Idempotent-Replayed"] = "true"
+        return response
+
     def create(self, request, *args, **kwargs):
-        logger.info(f"Received Trip creation request: {request.data}")
+        return self._idempotent(request, self._create)
+
+    def _create(self, request):
+        logger.info(
+            "Received Trip creation request with fields {fields}",
+            fields=_field_names(request.data),
+        )
         serializer = self.get_serializer(data=request.data)
         serializer.is_valid(raise_exception=True)
 
         trip = serializer.save()
-        logger.info(f"Trip created with ID: {trip.id}")
+        logger.info("Trip created with ID: {trip_id}", trip_id=trip.id)
+
+        if request.query_params.get("async") in ("1", "true"):
+            job = JobService.enqueue(trip)
+            data = {**TripListSerializer(trip).data, "status": job.status}
+            return Response(data, status=status.HTTP_202_ACCEPTED)
 
         try:
-            logger.info(f"Starting ELD simulation for Trip ID: {trip.id}")
+            logger.info(
+                "Starting ELD simulation for Trip ID: {trip_id}", trip_id=trip.id
+            )
             service = EldService(trip.id)
             service.generate_full_trip()
         except Exception as e:
-            logger.error(f"Error during ELD simulation for Trip ID {trip.id}: {str(e)}")
+            logger.error(
+                "Error during ELD simulation for Trip ID {trip_id}: {error}",
+                trip_id=trip.id,
+                error=e,
+            )
             trip.delete()
             return Response({"error": str(e)}, status=status.HTTP_400_BAD_REQUEST)
 
+        trip = (
+            Trip.objects.select_related("summary")
+            .prefetch_related("daily_logs__status_changes")
+            .get(id=trip.id)
+        )
         return Response(TripDetailSerializer(trip).data, status=status.HTTP_201_CREATED)
+
+    @action(detail=True, methods=["get"], url_path="status")
+    def job_status(self, request, pk=None):
+        trip = self.get_object()
+        if not hasattr(trip, "job"):
+            # Generated synchronously, so it is complete if it exists
+            return Response({"trip": trip.id, "status": JobStatus.DONE})
+        return Response(TripJobSerializer(trip.job).data)
+
+    @action(detail=True, methods=["post"])
+    def amend(self, request, pk=None):
+        serializer = TripAmendSerializer(data=request.data)
+        serializer.is_valid(raise_exception=True)
+
+        trip = self.get_object()
+        try:
+            AmendService.amend(trip, **serializer.validated_data)
+        except ValueError as e:
+            logger.error(
+                "Error amending Trip ID {trip_id}: {error}", trip_id=trip.id, error=e
+            )
+            return Response({"error": str(e)}, status=status.HTTP_400_BAD_REQUEST)
+
+        trip = (
+            Trip.objects.select_related("summary")
+            .prefetch_related("daily_logs__status_changes")
+            .get(id=trip.id)
+        )
+        return Response(TripDetailSerializer(trip).data)
+
+    @action(detail=True, methods=["get"])
+    def geometry(self, request, pk=None):
+        zoom = request.query_params.get("zoom")
+        if zoom is not None and not zoom.isdigit():
+            raise ValidationError({"zoom": "Expected a non-negative integer."})
+
+        trip = self.get_object()
+        return _conditional(
+            request,
+            trip,
+            lambda: Response(
+                GeometryService.get_geometry(trip, int(zoom) if zoom else None)
+            ),
+        )
+
+    @action(detail=False, methods=["get"], content_negotiation_class=_ExportNegotiation)
+    def export(self, request):
+        """
+        Streams the daily logs of all trips matching driver_id / vehicle_id
+        and the date_from / date_to range (inclusive), as `output=csv`,
+        `ndjson` or printable HTML `sheets`.
+        """
+        params = request.query_params
+        output = params.get("output", "csv")
+        if output not in EXPORT_FORMATS:
+            raise ValidationError(
+                {"output": f"Expected one of {list(EXPORT_FORMATS)}."}
+            )
+        lines, content_type, extension = EXPORT_FORMATS[output]
+
+        queryset = ExportService.daily_logs(
+            driver_id=params.get("driver_id"),
+            vehicle_id=params.get("vehicle_id"),
+            date_from=_parse_date_param(params, "date_from"),
+            date_to=_parse_date_param(params, "date_to"),
+        )
+        logger.info(
+            "Exporting daily logs as {output}: {filters}",
+            output=output,
+            filters=params.dict(),
+        )
+        content = lines(queryset)
+        if isinstance(request._request, ASGIRequest):
+            content = ExportService.astream(content)
+        response = StreamingHttpResponse(content, content_type=content_type)
+        if extension:
+            response["Content-Disposition"] = (
+                f'attachment; filename="daily-logs.{extension}"'
+            )
+        return response
+
+    @action(detail=False, methods=["get"])
+    def summary(self, request):
+        """
+        Rolls up the trips matching driver_id / vehicle_id and started in the
+        started_after / started_before range, per `group_by`: driver, vehicle,
+        day or the whole fleet.
+        """
+        params = request.query_params
+        group_by = params.get("group_by", "driver")
+        if group_by not in GROUPS:
+            raise ValidationError({"group_by": f"Expected one of {list(GROUPS)}."})
+
+        started_after = started_before = None
+        if params.get("started_after"):
+            started_after = _parse_created_bound(
+                "started_after", params["started_after"]
+            )
+        if params.get("started_before"):
+            started_before = _parse_created_bound(
+                "started_before", params["started_before"], end_of_day=True
+            )
+        results = SummaryService.rollup(
+            group_by,
+            driver_id=params.get("driver_id"),
+            vehicle_id=params.get("vehicle_id"),
+            started_after=started_after,
+            started_before=started_before,
+        )
+        return Response({"group_by": group_by, "results": results})
+
+    @action(detail=False, methods=["post"], url_path="batch")
+    def batch(self, request):
+        return self._idempotent(request, self._batch)
+
+    def _batch(self, request):
+        items = request.data.get("trips")
+        if not isinstance(items, list) or not items:
+            return Response(
+                {"error": "Expected a non-empty list of trips."},
+                status=status.HTTP_400_BAD_REQUEST,
+            )
+        if len(items) > settings.TRIP_BATCH_MAX_SIZE:
+            return Response(
+                {"error": f"At most {settings.TRIP_BATCH_MAX_SIZE} trips per batch."},
+                status=status.HTTP_400_BAD_REQUEST,
+            )
+        logger.info("Received batch of {trips} trips", trips=len(items))
+
+        results: list[dict] = [{"index": i} for i in range(len(items))]
+        valid, specs = [], []
+        for i, item in enumerate(items):
+            serializer = TripSpecSerializer(data=item)
+            if serializer.is_valid():
+                valid.append(i)
+                specs.append(serializer.validated_data)
+            else:
+                results[i].update(status=400, errors=serializer.errors)
+
+        for i, planned in zip(valid, BatchService.plan_trips(specs), strict=True):
+            if isinstance(planned, Exception):
+                results[i].update(status=400, errors={"error": str(planned)})
+            else:
+                results[i].update(status=201, trip=TripListSerializer(planned).data)
+
+        return Response({"results": results}, status=status.HTTP_200_OK)
+
+
+# ASGI-native views for the busiest trip routes, used in place of the
+# viewset's list and detail routes when ASYNC_TRIP_VIEWS is on. Requests they
+# do not handle themselves go to the viewset, run in a thread.
+_trip_list = TripViewSet.as_view(
+    {"get": "list", "post": "create"}, basename="trip", detail=False
+)
+_trip_detail = TripViewSet.as_view(
+    {
+        "get": "retrieve",
+        "put": "update",
+        "patch": "partial_update",
+        "delete": "destroy",
+    },
+    basename="trip",
+    detail=True,
+)
+
+
+async def _adispatch(request, action: str, handler, detail: bool, **kwargs):
+    """
+    Runs `handler(view, request)` for a viewset `action` the way the
+    viewset's dispatch would: after DRF's authentication, permission and
+    throttle checks and content negotiation, with errors turned into
+    responses by its exception handler. The checks run in a thread; the
+    response is rendered by Django's handler.
+    """
+    view = TripViewSet(
+        basename="trip",
+        detail=detail,
+        action_map={request.method.lower(): action},
+    )
+    view.args, view.kwargs = (), kwargs
+    api_request = view.initialize_request(request, **kwargs)
+    view.request = api_request
+    view.headers = view.default_response_headers
+    try:
+        await sync_to_async(view.initial)(api_request, **kwargs)
+        response = await handler(view, api_request)
+    except Exception as e:
+        response = await sync_to_async(view.handle_exception)(e)
+    return view.finalize_response(api_request, response, **kwargs)
+
+
+async def _adetail_data(trip: Trip) -> dict:
+    """`TripViewSet._detail_data` for async views"""
+    key = f"trip-detail:{_version(trip)}"
+    data = await cache.aget(key)
+    if data is None:
+        trip = await (
+            Trip.objects.select_related("summary")
+            .prefetch_related("daily_logs__status_changes")
+            .aget(id=trip.id)
+        )
+        data = dict(TripDetailSerializer(trip).data)
+        await cache.aset(
+            f"trip-detail:{_version(trip)}",
+            data,
+            settings.TRIP_DETAIL_CACHE_SECONDS,
+        )
+    return data
+
+
+async def _alist(view, request):
+    # The page is read with the async ORM
+    page = await view.paginator.apaginate_queryset(
+        view.get_queryset(), request, view=view
+    )
+    return view.get_paginated_response(view.get_serializer(page, many=True).data)
+
+
+async def _acreate(view, request):
+    logger.info(
+        "Received Trip creation request with fields {fields}",
+        fields=_field_names(request.data),
+    )
+    serializer = view.get_serializer(data=request.data)
+    serializer.is_valid(raise_exception=True)
+
+    trip = await sync_to_async(serializer.save)()
+    logger.info("Trip created with ID: {trip_id}", trip_id=trip.id)
+    try:
+        logger.info("Starting ELD simulation for Trip ID: {trip_id}", trip_id=trip.id)
+        service = await sync_to_async(EldService)(trip.id)
+        await service.agenerate_full_trip()
+    except Exception as e:
+        logger.error(
+            "Error during ELD simulation for Trip ID {trip_id}: {error}",
+            trip_id=trip.id,
+            error=e,
+        )
+        await trip.adelete()
+        return Response({"error": str(e)}, status=status.HTTP_400_BAD_REQUEST)
+
+    trip = await (
+        Trip.objects.select_related("summary")
+        .prefetch_related("daily_logs__status_changes")
+        .aget(id=trip.id)
+    )
+    return Response(TripDetailSerializer(trip).data, status=status.HTTP_201_CREATED)
+
+
+async def _aretrieve(view, request):
+    trip = await view.get_queryset().filter(pk=view.kwargs["pk"]).afirst()
+    if trip is None:
+        raise Http404(f"No {Trip._meta.object_name} matches the given query.")
+    await sync_to_async(view.check_object_permissions)(request, trip)
+
+    etag, last_modified = _validators(trip)
+    response = get_conditional_response(request, etag=etag, last_modified=last_modified)
+    if response is None:
+        response = Response(await _adetail_data(trip))
+    return _with_validators(response, etag, last_modified)
+
+
+@csrf_exempt
+async def trip_list(request):
+    """
+    `/trips/`: lists and creates trips without holding a thread while the
+    routing provider answers. Creations that are idempotent or queued as a
+    job go to the viewset.
+    """
+    if request.method == "GET":
+        return await _adispatch(request, "list", _alist, detail=False)
+    if (
+        request.method == "POST"
+        and "Idempotency-Key" not in request.headers
+        and request.GET.get("async") not in ("1", "true")
+    ):
+        return await _adispatch(request, "create", _acreate, detail=False)
+    return await sync_to_async(_trip_list)(request)
+
+
+@csrf_exempt
+async def trip_detail(request, pk: int):
+    """`/trips/<id>/`: reads trips with the async ORM and cache"""
+    if request.method == "GET":
+        return await _adispatch(request, "retrieve", _aretrieve, detail=True, pk=pk)
+    return await sync_to_async(_trip_detail)(request, pk=pk)
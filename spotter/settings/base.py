@@ -28,9 +28,10 @@ INSTALLED_APPS = DEFAULT_APPS + SELF_APPS + THIRD_PARTY_APPS
 
 # Middleware
 MIDDLEWARE = [
+    "apps.core.middleware.InstrumentationMiddleware",
     "corsheaders.middleware.CorsMiddleware",
     "django.middleware.security.SecurityMiddleware",
-    "whitenoise.middleware.WhiteNoiseMiddleware",
+    "apps.core.middleware.AsyncWhiteNoiseMiddleware",
     "django.contrib.sessions.middleware.SessionMiddleware",
     "django.middleware.common.CommonMiddleware",
     "django.middleware.csrf.CsrfViewMiddleware",
@@ -77,6 +78,76 @@ DATABASES = {
 }
 
 
+# Logging (loguru, see apps.core.log_config)
+LOGGING_CONFIG = "apps.core.log_config.configure_logging"
+LOGGING = {
+    "level": configs.LOG_LEVEL,
+    "serialize": configs.LOG_FORMAT == "json",
+    "enqueue": configs.LOG_ENQUEUE,
+}
+TRIP_LOG_SAMPLE_RATE = configs.TRIP_LOG_SAMPLE_RATE
+
+
+# Routing backend used by GeoService
+ROUTING_PROVIDER = configs.ROUTING_PROVIDER
+ROUTING_GRAPH_DIR = configs.ROUTING_GRAPH_DIR
+
+
+# Route-leg cache and fetch pool used by GeoService
+ROUTE_CACHE_TTL_SECONDS = configs.ROUTE_CACHE_TTL_SECONDS
+ROUTE_CACHE_MAX_ENTRIES = configs.ROUTE_CACHE_MAX_ENTRIES
+ROUTE_FETCH_MAX_WORKERS = configs.ROUTE_FETCH_MAX_WORKERS
+ROUTE_HTTP_MAX_CONNECTIONS = configs.ROUTE_HTTP_MAX_CONNECTIONS
+ROUTE_HTTP_TIMEOUT_SECONDS = configs.ROUTE_HTTP_TIMEOUT_SECONDS
+LANE_MATRIX_RELOAD_SECONDS = configs.LANE_MATRIX_RELOAD_SECONDS
+
+
+# Async trip views, for ASGI deployments
+ASYNC_TRIP_VIEWS = configs.ASYNC_TRIP_VIEWS
+
+
+# Rendered trip details, cached per trip version
+TRIP_DETAIL_CACHE_SECONDS = configs.TRIP_DETAIL_CACHE_SECONDS
+
+# https://docs.djangoproject.com/en/6.0/ref/settings/#caches
+CACHES = {
+    "default": {
+        "database": {
+            "BACKEND": "django.core.cache.backends.db.DatabaseCache",
+            "LOCATION": "django_cache",
+        },
+        "locmem": {
+            "BACKEND": "django.core.cache.backends.locmem.LocMemCache",
+        },
+    }[configs.CACHE_BACKEND]
+}
+
+
+# Idempotent trip submission
+IDEMPOTENCY_KEY_TTL_SECONDS = configs.IDEMPOTENCY_KEY_TTL_SECONDS
+IDEMPOTENCY_WAIT_SECONDS = configs.IDEMPOTENCY_WAIT_SECONDS
+
+
+# Storage mode for generated duty-status segments
+ELD_SEGMENT_STORAGE = configs.ELD_SEGMENT_STORAGE
+
+
+# Queued trip generation
+TRIP_JOB_MAX_ATTEMPTS = configs.TRIP_JOB_MAX_ATTEMPTS
+TRIP_JOB_RETRY_DELAY_SECONDS = configs.TRIP_JOB_RETRY_DELAY_SECONDS
+
+
+# Access to the metrics endpoint
+METRICS_TOKEN = configs.METRICS_TOKEN
+METRICS_ALLOWED_IPS = configs.METRICS_ALLOWED_IPS
+
+
+# Batch trip planning
+TRIP_BATCH_MAX_SIZE = configs.TRIP_BATCH_MAX_SIZE
+TRIP_BATCH_WORKERS = configs.TRIP_BATCH_WORKERS
+TRIP_BATCH_MIN_PARALLEL = configs.TRIP_BATCH_MIN_PARALLEL
+
+
 # Password validation
 # https://docs.djangoproject.com/en/6.0/ref/settings/#auth-password-validators
 AUTH_PASSWORD_VALIDATORS = [
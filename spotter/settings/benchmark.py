@@ -0,0 +1,13 @@
+"""
+Settings for `manage.py benchmark_hos --mode db`: everything as usual, but
+against a throwaway in-memory SQLite database.
+"""
+
+from spotter.settings import *  # noqa
+
+DATABASES = {
+    "default": {
+        "ENGINE": "django.db.backends.sqlite3",
+        "NAME": ":memory:",
+    }
+}
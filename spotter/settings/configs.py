@@ -1,4 +1,6 @@
+import os
 from pathlib import Path
+from typing import Literal
 
 from pydantic_settings import BaseSettings, SettingsConfigDict
 
@@ -33,10 +35,68 @@ class Configs(BaseSettings):
 
     GOOGLE_MAPS_API_KEY: str
 
+    # Logging: "json" writes structured records; enqueued writes never block
+    LOG_LEVEL: str = "INFO"
+    LOG_FORMAT: Literal["text", "json"] = "text"
+    LOG_ENQUEUE: bool = True
+    # Share of simulated trips whose summary is logged at INFO
+    TRIP_LOG_SAMPLE_RATE: float = 1.0
+
+    # Directions backend; "local_graph" routes offline over ROUTING_GRAPH_DIR
+    ROUTING_PROVIDER: Literal["google", "local_graph"] = "google"
+    ROUTING_GRAPH_DIR: Path | None = None
+
+    # Route-leg cache (in-process LRU in front of a shared database table)
+    ROUTE_CACHE_TTL_SECONDS: int = 7 * 24 * 3600
+    ROUTE_CACHE_MAX_ENTRIES: int = 1024
+    # Upper bound on concurrent Directions calls per process
+    ROUTE_FETCH_MAX_WORKERS: int = 8
+    # Pooled HTTP client of the async (ASGI) routing path: connections per
+    # process, and the timeout of each call
+    ROUTE_HTTP_MAX_CONNECTIONS: int = 100
+    ROUTE_HTTP_TIMEOUT_SECONDS: float = 10.0
+    # How often each process reloads the hub-to-hub lane matrix
+    LANE_MATRIX_RELOAD_SECONDS: int = 300
+
+    # Serve trip list/create/detail from async views (for ASGI deployments)
+    ASYNC_TRIP_VIEWS: bool = False
+
+    # How long a rendered trip detail is kept in the cache (per version)
+    TRIP_DETAIL_CACHE_SECONDS: int = 3600
+    # Django cache backend: "database" is shared by every worker (its table is
+    # created with `manage.py createcachetable`), "locmem" is per process
+    CACHE_BACKEND: Literal["database", "locmem"] = "database"
+
+    # Responses replayed for a repeated Idempotency-Key, and how long a
+    # request waits for an identical one already in flight
+    IDEMPOTENCY_KEY_TTL_SECONDS: int = 24 * 3600
+    IDEMPOTENCY_WAIT_SECONDS: int = 30
+
+    # "rows" writes a TimeLog per segment, "packed" one blob per ELDLog day
+    ELD_SEGMENT_STORAGE: Literal["rows", "packed"] = "rows"
+
+    # Queued trip generation: attempts per job, and the delay before its first
+    # retry (doubled after each failed attempt)
+    TRIP_JOB_MAX_ATTEMPTS: int = 3
+    TRIP_JOB_RETRY_DELAY_SECONDS: int = 30
+
+    # Who may read GET /metrics: clients sending this bearer token, or
+    # connecting from these addresses (space separated, like ALLOWED_HOSTS)
+    METRICS_TOKEN: str = ""
+    METRICS_ALLOWED_IPS: str = "127.0.0.1 ::1"
+
+    # Batch trip planning
+    TRIP_BATCH_MAX_SIZE: int = 500
+    TRIP_BATCH_WORKERS: int = os.cpu_count() or 1
+    # Smaller batches are simulated in-process, skipping the pool overhead
+    TRIP_BATCH_MIN_PARALLEL: int = 8
+
     def model_post_init(self, __context):
         # Split ALLOWED_HOSTS string into a list
         if isinstance(self.ALLOWED_HOSTS, str):
             self.ALLOWED_HOSTS = self.ALLOWED_HOSTS.split()
+        if isinstance(self.METRICS_ALLOWED_IPS, str):
+            self.METRICS_ALLOWED_IPS = self.METRICS_ALLOWED_IPS.split()
 
 
 db_configs = DatabaseConfigs()
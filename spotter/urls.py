@@ -5,7 +5,10 @@ URL configuration for spotter project.
 from django.contrib import admin
 from django.urls import include, path
 
+from apps.core import views as core_views
+
 urlpatterns = [
     path("admin/", admin.site.urls),
+    path("metrics", core_views.metrics, name="metrics"),
     path("", include("apps.trip.urls")),
 ]